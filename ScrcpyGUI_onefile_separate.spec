@@ -11,7 +11,7 @@ a = Analysis(
         ('README.md', '.'),
         ('CHANGE_LOG.md', '.'),
     ],
-    hiddenimports=['PyQt5.sip'],
+    hiddenimports=['PyQt5.sip', 'numpy'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
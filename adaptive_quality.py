@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from runtime_helpers import override_scrcpy_options, scrcpy_option_value
+from usb_scheduler import command_bit_rate
+from utils import console_log
+
+"""
+投屏画质闭环调节。
+
+AdaptiveQualityPolicy 是纯逻辑的档位决策器，不依赖 Qt 与时间，按采样次数计数，
+可直接用合成的指标序列驱动：
+1. 跳帧率（skipped / (fps + skipped)）达到 skip_high 或主机 CPU 达到 cpu_high，
+   连续 degrade_after 次后降一档
+2. 跳帧率不超过 skip_low 且主机 CPU 不超过 cpu_low，连续 upgrade_after 次后升一档
+3. 介于两组阈值之间的采样同时清空两个计数（滞回带），切换档位后 cooldown 次采样内不再调整
+画面静止时 scrcpy 不发送新帧，帧率偏低并不代表落后，因此以跳帧率而不是帧率判断。
+
+AdaptiveQualityController 为每个会话维护一个决策器，定时读取帧率统计与主机 CPU，
+需要调整时用新的码率/尺寸/帧率重新启动该会话。录屏会话不参与调节。
+"""
+
+DEFAULT_TARGET_FPS = 60
+DEFAULT_MAX_SIZE = 1920
+
+
+def build_quality_levels(bit_rate, max_size=None, max_fps=None, steps=4,
+                         min_bit_rate=1.0, min_max_size=720, min_max_fps=20):
+    """以当前参数为第 0 档，逐档把码率降到 70%、尺寸与帧率降到 80%。
+
+    Returns:
+        list: [{"bit_rate": Mbps, "max_size": int 或 None, "max_fps": int 或 None}]
+    """
+    levels = [{"bit_rate": float(bit_rate), "max_size": max_size, "max_fps": max_fps}]
+    for _ in range(steps):
+        previous = levels[-1]
+        size = previous["max_size"] or DEFAULT_MAX_SIZE
+        fps = previous["max_fps"] or DEFAULT_TARGET_FPS
+        level = {
+            "bit_rate": max(min_bit_rate, round(previous["bit_rate"] * 0.7, 1)),
+            "max_size": max(min_max_size, int(size * 0.8) // 8 * 8),
+            "max_fps": max(min_max_fps, int(fps * 0.8)),
+        }
+        if level == previous:
+            break
+        levels.append(level)
+    return levels
+
+
+def describe_level(level):
+    parts = [f"码率 {level['bit_rate']:g}M"]
+    parts.append(f"尺寸 {level['max_size']}" if level["max_size"] else "尺寸 原始")
+    parts.append(f"帧率 {level['max_fps']}" if level["max_fps"] else "帧率 不限")
+    return "，".join(parts)
+
+
+class AdaptiveQualityPolicy:
+    """单个会话的画质档位决策器（0 为最高画质）。"""
+
+    def __init__(self, levels, degrade_after=3, upgrade_after=15, cooldown=5,
+                 skip_high=0.10, skip_low=0.02, cpu_high=85.0, cpu_low=60.0):
+        self.levels = list(levels)
+        self.degrade_after = degrade_after
+        self.upgrade_after = upgrade_after
+        self.cooldown = cooldown
+        self.skip_high = skip_high
+        self.skip_low = skip_low
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.level = 0
+        self._bad = 0
+        self._good = 0
+        self._cooldown = 0
+
+    def evaluate(self, fps=None, skipped=0, host_cpu=None):
+        """输入一次采样，需要调整时返回决策 dict，否则返回 None（不会修改当前档位）。
+
+        决策包含 direction（"down"/"up"）、level（目标档位）、reason 与 metrics。
+        """
+        if fps is None and host_cpu is None:
+            return None
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return None
+
+        frames = (fps or 0) + (skipped or 0)
+        skip_ratio = (skipped or 0) / frames if frames else 0.0
+        metrics = {"fps": fps, "skipped": skipped, "skip_ratio": skip_ratio, "host_cpu": host_cpu}
+        behind = fps is not None and skip_ratio >= self.skip_high
+        overloaded = host_cpu is not None and host_cpu >= self.cpu_high
+        healthy = skip_ratio <= self.skip_low and (host_cpu is None or host_cpu <= self.cpu_low)
+
+        if behind or overloaded:
+            self._bad += 1
+            self._good = 0
+        elif healthy:
+            self._good += 1
+            self._bad = 0
+        else:
+            self._bad = self._good = 0
+
+        if self._bad >= self.degrade_after and self.level < len(self.levels) - 1:
+            reason = "跳帧过多" if behind else "主机 CPU 过载"
+            return {"direction": "down", "level": self.level + 1, "reason": reason, "metrics": metrics}
+        if self._good >= self.upgrade_after and self.level > 0:
+            return {"direction": "up", "level": self.level - 1, "reason": "负载恢复", "metrics": metrics}
+        return None
+
+    def apply(self, decision):
+        """确认执行决策：切换档位、清空计数并进入冷却。"""
+        self.level = decision["level"]
+        self._bad = self._good = 0
+        self._cooldown = self.cooldown
+
+
+class AdaptiveQualityController:
+    """为运行中的会话定时评估画质档位，并通过 relaunch 回调以新参数重启会话。"""
+
+    def __init__(self, relaunch, log=None, **policy_options):
+        """
+        Args:
+            relaunch (callable): relaunch(device_id, command) 以新命令重启会话
+            log (callable): 日志输出函数，默认输出到控制台
+            policy_options: 传给 AdaptiveQualityPolicy 的阈值参数
+        """
+        self.relaunch = relaunch
+        self.log = log or console_log
+        self.policy_options = policy_options
+        self.enabled = False
+        self.decisions = 0
+        self._sessions = {}
+        self._adjusting = set()
+
+    def watch(self, device_id, command):
+        """登记新启动的会话；由本控制器发起的重启保留当前档位。"""
+        if device_id in self._adjusting:
+            self._adjusting.discard(device_id)
+            return
+        if "--record" in command:
+            self._sessions.pop(device_id, None)
+            return
+        max_size = scrcpy_option_value(command, "--max-size")
+        max_fps = scrcpy_option_value(command, "--max-fps")
+        levels = build_quality_levels(
+            command_bit_rate(command),
+            int(max_size) if max_size and max_size.isdigit() else None,
+            int(max_fps) if max_fps and max_fps.isdigit() else None,
+        )
+        self._sessions[device_id] = {
+            "command": list(command),
+            "policy": AdaptiveQualityPolicy(levels, **self.policy_options),
+        }
+
+    def forget(self, device_id):
+        if device_id not in self._adjusting:
+            self._sessions.pop(device_id, None)
+
+    def abort(self, device_id):
+        """重启失败时调用，放弃该会话的调节。"""
+        self._adjusting.discard(device_id)
+        self._sessions.pop(device_id, None)
+
+    def tick(self, metrics):
+        """评估一轮。
+
+        Args:
+            metrics (dict): {设备ID: {"fps", "skipped", "host_cpu"}}，仅包含正在运行的会话
+        """
+        if not self.enabled:
+            return
+        overload_applied = False
+        for device_id, sample in metrics.items():
+            session = self._sessions.get(device_id)
+            if session is None or device_id in self._adjusting:
+                continue
+            policy = session["policy"]
+            decision = policy.evaluate(sample.get("fps"), sample.get("skipped", 0), sample.get("host_cpu"))
+            if decision is None:
+                continue
+            # 主机过载时每轮只降一路，避免所有会话同时降级
+            if decision["reason"] == "主机 CPU 过载":
+                if overload_applied:
+                    continue
+                overload_applied = True
+            self._apply(device_id, session, decision)
+
+    def _apply(self, device_id, session, decision):
+        policy = session["policy"]
+        old_level = policy.levels[policy.level]
+        new_level = policy.levels[decision["level"]]
+        policy.apply(decision)
+        self.decisions += 1
+        metrics = decision["metrics"]
+        fps_text = "-" if metrics["fps"] is None else f"{metrics['fps']:.0f}"
+        cpu_text = "-" if metrics["host_cpu"] is None else f"{metrics['host_cpu']:.0f}%"
+        action = "降低" if decision["direction"] == "down" else "提升"
+        self.log(
+            f"设备 {device_id} {decision['reason']}（帧率 {fps_text}，跳帧率 {metrics['skip_ratio'] * 100:.0f}%，"
+            f"主机 CPU {cpu_text}），{action}画质到第 {decision['level']} 档: "
+            f"{describe_level(old_level)} → {describe_level(new_level)}"
+        )
+        command = override_scrcpy_options(session["command"], **new_level)
+        self._adjusting.add(device_id)
+        try:
+            self.relaunch(device_id, command)
+        except Exception as e:
+            self._adjusting.discard(device_id)
+            self.log(f"设备 {device_id} 调整画质失败: {e}")
+
+    def get_stats(self):
+        """返回 {设备ID: 当前档位}。"""
+        return {device_id: session["policy"].level for device_id, session in self._sessions.items()}
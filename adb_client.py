@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import platform
+import socket
+import struct
+import subprocess
+import sys
+import time
+
+from utils import console_log
+
+"""
+ADB 服务端 smart-socket 协议客户端。
+
+直接通过 TCP 连接本机 adb server（默认 127.0.0.1:5037），
+避免每次查询都启动一个 adb 进程。协议格式：
+1. 请求：4 位十六进制长度 + 请求内容，例如 "000chost:version"
+2. 响应：先返回 "OKAY" 或 "FAIL"，FAIL 后紧跟 4 位十六进制长度的错误信息
+3. 设备级服务需先发送 host:transport:<serial> 切换连接，再发送 shell:/exec: 请求
+"""
+
+DEFAULT_ADB_HOST = "127.0.0.1"
+DEFAULT_ADB_PORT = 5037
+
+
+# shell v2 协议的数据包类型
+SHELL_ID_STDOUT = 1
+SHELL_ID_STDERR = 2
+SHELL_ID_EXIT = 3
+
+
+class AdbProtocolError(Exception):
+    """adb server 返回 FAIL 或协议数据不完整。"""
+
+
+class AdbTransportError(AdbProtocolError):
+    """命令下发前失败（连不上 adb server 或服务被拒绝），调用方可安全回退到 CLI。"""
+
+
+class AdbConnectionError(AdbTransportError):
+    """连不上 adb server 或连接在命令下发前断开，影响该 server 上的所有设备。"""
+
+
+class AdbDeviceError(AdbProtocolError):
+    """adb server 拒绝切换到指定设备（离线、未授权或不存在），只影响这一台设备，命令尚未下发。"""
+
+
+def parse_device_lines(text):
+    """解析 `adb devices -l` / `host:track-devices-l` 风格的设备行。
+
+    Returns:
+        list: 每个元素为 (device_id, status, attrs) 元组，attrs 为属性字典
+    """
+    devices = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("List of devices") or line.startswith("*"):
+            continue
+
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+
+        attrs = {}
+        for item in parts[2:]:
+            key, sep, value = item.partition(":")
+            if sep:
+                attrs[key] = value
+        devices.append((parts[0].strip(), parts[1].strip(), attrs))
+    return devices
+
+
+class AdbClient:
+    """adb server smart-socket 协议的最小实现。"""
+
+    def __init__(self, host=DEFAULT_ADB_HOST, port=DEFAULT_ADB_PORT, timeout=3.0):
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+
+    def open_connection(self, timeout=None):
+        """建立到 adb server 的新连接。"""
+        return socket.create_connection(
+            (self.host, self.port),
+            timeout=self.timeout if timeout is None else timeout,
+        )
+
+    def send_request(self, sock, payload):
+        """发送一条带长度前缀的请求并校验 OKAY/FAIL。"""
+        data = payload.encode("utf-8")
+        sock.sendall(f"{len(data):04x}".encode("ascii") + data)
+        self.read_status(sock)
+
+    def read_status(self, sock):
+        status = self.read_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbProtocolError(self.read_length_prefixed(sock).decode("utf-8", errors="ignore"))
+        raise AdbProtocolError(f"未知的 adb 响应: {status!r}")
+
+    def read_length_prefixed(self, sock):
+        """读取 4 位十六进制长度前缀的数据块。"""
+        header = self.read_exact(sock, 4)
+        try:
+            length = int(header.decode("ascii"), 16)
+        except ValueError:
+            raise AdbProtocolError(f"无效的长度前缀: {header!r}")
+        return self.read_exact(sock, length) if length else b""
+
+    def read_exact(self, sock, size):
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            chunk = sock.recv(remaining)
+            if not chunk:
+                raise AdbProtocolError("adb server 连接已关闭")
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    def read_all(self, sock, output=None):
+        """读取到连接关闭为止，output 为文件对象时直接写入并返回 None。"""
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            if output is not None:
+                output.write(chunk)
+            else:
+                chunks.append(chunk)
+        return None if output is not None else b"".join(chunks)
+
+    def query(self, payload):
+        """执行一次 host 级查询（如 host:devices-l）并返回文本。"""
+        try:
+            sock = self.open_connection()
+        except OSError as e:
+            raise AdbConnectionError(f"无法连接 adb server: {e}")
+        with sock:
+            self.send_request(sock, payload)
+            return self.read_length_prefixed(sock).decode("utf-8", errors="ignore")
+
+    def devices_long(self):
+        """等价于 `adb devices -l`，返回 parse_device_lines 格式。"""
+        return parse_device_lines(self.query("host:devices-l"))
+
+    def open_transport(self, serial=None, timeout=None):
+        """建立连接并切换到指定设备，返回已就绪的 socket。"""
+        try:
+            sock = self.open_connection(timeout=timeout)
+        except OSError as e:
+            raise AdbConnectionError(f"无法连接 adb server: {e}")
+        try:
+            self.send_request(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+        except OSError as e:
+            sock.close()
+            raise AdbConnectionError(str(e))
+        except AdbProtocolError as e:
+            sock.close()
+            raise AdbDeviceError(str(e))
+        return sock
+
+    def shell(self, serial, command, timeout=None):
+        """通过 shell v2 协议执行命令。
+
+        Returns:
+            tuple: (退出码, stdout 字节, stderr 字节)；设备不支持 shell v2 时退出码为 None
+        """
+        sock = self.open_transport(serial, timeout=timeout)
+        with sock:
+            sock.settimeout(timeout)
+            try:
+                self.send_request(sock, f"shell,v2,raw:{command}")
+            except AdbProtocolError:
+                sock.close()
+                return self._shell_v1(serial, command, timeout)
+            return self._read_shell_v2(sock)
+
+    def _shell_v1(self, serial, command, timeout=None):
+        sock = self.open_transport(serial, timeout=timeout)
+        with sock:
+            sock.settimeout(timeout)
+            try:
+                self.send_request(sock, f"shell:{command}")
+            except AdbProtocolError as e:
+                raise AdbTransportError(str(e))
+            return None, self.read_all(sock), b""
+
+    def _read_shell_v2(self, sock):
+        stdout, stderr = [], []
+        exit_code = None
+        while exit_code is None:
+            header = sock.recv(5)
+            if not header:
+                break
+            if len(header) < 5:
+                header += self.read_exact(sock, 5 - len(header))
+            packet_id, length = struct.unpack("<BI", header)
+            data = self.read_exact(sock, length) if length else b""
+            if packet_id == SHELL_ID_STDOUT:
+                stdout.append(data)
+            elif packet_id == SHELL_ID_STDERR:
+                stderr.append(data)
+            elif packet_id == SHELL_ID_EXIT:
+                exit_code = data[0] if data else 0
+        return exit_code, b"".join(stdout), b"".join(stderr)
+
+    def exec_out(self, serial, command, output=None, timeout=None):
+        """等价于 `adb exec-out`，返回原始字节；output 为文件对象时直接写入。"""
+        sock = self.open_transport(serial, timeout=timeout)
+        with sock:
+            sock.settimeout(timeout)
+            try:
+                self.send_request(sock, f"exec:{command}")
+            except AdbProtocolError as e:
+                raise AdbTransportError(str(e))
+            return self.read_all(sock, output)
+
+    def track_devices(self, sock):
+        """在已建立的连接上订阅 host:track-devices-l，持续产出设备快照。
+
+        每次 adb server 推送变化时产出一次完整设备列表（parse_device_lines 格式），
+        连接关闭或出错时抛出 AdbProtocolError / OSError。
+        """
+        self.send_request(sock, "host:track-devices-l")
+        sock.settimeout(None)
+        while True:
+            payload = self.read_length_prefixed(sock)
+            yield parse_device_lines(payload.decode("utf-8", errors="ignore"))
+
+
+def benchmark_calls(adb_path, device_id=None, rounds=50, command="echo ok", client=None, with_pool=False):
+    """比较每次调用启动一个 adb 进程与原生协议（每次调用一条到 adb server 的连接）的每秒调用数。
+
+    client 为空时连接默认端口的 adb server；with_pool 为 True 时同时测量常驻 shell 会话池。
+
+    Returns:
+        dict: {"cli": 每秒调用数, "native": 每秒调用数[, "pool": 每秒调用数]}
+    """
+    kwargs = {}
+    if platform.system() == 'Windows':
+        kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+    serial_args = ["-s", device_id] if device_id else []
+    client = client or AdbClient()
+
+    def measure(name, call):
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            call()
+        elapsed = time.perf_counter() - start_time
+        rate = rounds / elapsed if elapsed else 0.0
+        console_log(f"{name}: {rate:.1f} 次/秒 (平均 {elapsed / rounds * 1000:.1f} ms)")
+        return rate
+
+    results = {
+        "cli": measure("每次调用启动 adb 进程", lambda: subprocess.run(
+            [adb_path, *serial_args, "shell", command], capture_output=True, check=False, timeout=30, **kwargs
+        )),
+        "native": measure("adb 原生协议", lambda: client.shell(device_id, command, timeout=30)),
+    }
+    if with_pool:
+        from shell_session_pool import ShellSessionPool
+
+        pool = ShellSessionPool(adb_path)
+        try:
+            # 首次调用包含会话建立时间，不计入
+            pool.run(device_id, command, timeout=30)
+            results["pool"] = measure("常驻会话池", lambda: pool.run(device_id, command, timeout=30))
+        finally:
+            pool.close_all()
+    return results
+
+
+if __name__ == "__main__":
+    # 用法: python adb_client.py [设备ID] [--pool]
+    args = [arg for arg in sys.argv[1:] if arg != "--pool"]
+    benchmark_calls(os.environ.get("ADB", "adb"), args[0] if args else None, with_pool="--pool" in sys.argv[1:])
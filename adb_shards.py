@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from adb_client import DEFAULT_ADB_PORT
+from utils import console_log
+
+"""
+多 adb server 分片。
+
+单个 adb server 需要转发所有设备的 shell/install/screencap 流量，设备数量很多时会成为瓶颈。
+AdbShardManager 在连续端口上维护多个 adb server，并把设备分配到各分片：
+1. 网络设备（ip:port）在首次连接时分配到设备数最少的分片，之后固定在该分片
+2. USB 设备始终留在主 server：每个 adb server 都会尝试占用全部 USB 设备，无法安全拆分。
+   因此分片 server 一律以 ADB_USB=0、ADB_EMU=0 启动，只通过 adb connect 接入网络设备；
+   启动后仍列出 USB 设备（adb 版本不支持 ADB_USB）的分片会被立即关闭并停用
+3. adb 命令通过 `-P <端口>` 路由，scrcpy 等子进程通过 ANDROID_ADB_SERVER_PORT 环境变量路由；
+   分片的环境变量同样带上 ADB_USB=0，子进程意外拉起分片 server 时也不会占用 USB 设备
+
+分片数为 1 时所有方法都退化为默认 server，与未启用分片完全一致。
+"""
+
+ADB_SERVER_PORT_ENV = "ANDROID_ADB_SERVER_PORT"
+# 分片 server 不扫描 USB 与本机模拟器，避免与主 server 争抢设备
+SHARD_SERVER_ENV = {"ADB_USB": "0", "ADB_EMU": "0"}
+
+
+def is_network_serial(device_id):
+    return bool(device_id) and ":" in device_id
+
+
+class AdbShardManager:
+    """管理多个 adb server 端口与设备到分片的映射。"""
+
+    def __init__(self, adb_path="adb", shard_count=1, base_port=DEFAULT_ADB_PORT):
+        self.adb_path = adb_path or "adb"
+        self.base_port = int(base_port)
+        self.ports = [self.base_port + index for index in range(max(1, int(shard_count or 1)))]
+        self._assignments = {}
+        self._started = {self.base_port}
+        self._disabled = set()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return len(self.ports) > 1
+
+    @property
+    def active_ports(self):
+        """未被停用的 server 端口。"""
+        return [port for port in self.ports if port not in self._disabled]
+
+    def port_for(self, device_id):
+        """返回设备所在分片的端口，未分配的设备返回主 server 端口。"""
+        if not self.enabled or not is_network_serial(device_id):
+            return self.base_port
+        with self._lock:
+            return self._assignments.get(device_id, self.base_port)
+
+    def assign(self, device_id, port=None):
+        """把网络设备固定到分片并返回端口。
+
+        port 为空时沿用已有分配，否则选择设备数最少的分片（用于 adb connect 之前）；
+        指定 port 时固定到该分片（例如扫描时发现设备已连接在该 server 上）。
+        """
+        if not self.enabled or not is_network_serial(device_id):
+            return self.base_port
+        with self._lock:
+            if port is None:
+                port = self._assignments.get(device_id)
+                if port is None:
+                    load = {candidate: 0 for candidate in self.ports}
+                    for assigned in self._assignments.values():
+                        if assigned in load:
+                            load[assigned] += 1
+                    port = min(self.active_ports, key=lambda candidate: (load[candidate], candidate))
+            elif port not in self.ports or port in self._disabled:
+                return self._assignments.get(device_id, self.base_port)
+            self._assignments[device_id] = port
+            return port
+
+    def release(self, device_id):
+        with self._lock:
+            self._assignments.pop(device_id, None)
+
+    def accepts(self, device_id, port):
+        """分片只承载网络设备，分片 server 上出现的 USB 设备一律不使用。"""
+        return port == self.base_port or is_network_serial(device_id)
+
+    def server_args(self, device_id=None, port=None):
+        """返回路由到设备所在分片的 adb 全局参数，主 server 返回空列表。"""
+        port = port or self.port_for(device_id)
+        return [] if port == self.base_port else ["-P", str(port)]
+
+    def environment(self, device_id):
+        """返回子进程（如 scrcpy）需要追加的环境变量。"""
+        return self.server_environment(self.port_for(device_id))
+
+    def server_environment(self, port):
+        """返回访问指定 server 的子进程需要追加的环境变量，主 server 返回空字典。"""
+        if not port or port == self.base_port:
+            return {}
+        return {ADB_SERVER_PORT_ENV: str(port), **SHARD_SERVER_ENV}
+
+    def ensure_server(self, port, timeout=10):
+        """确保指定端口的 adb server 已启动，返回是否成功。主 server 按常规方式由 adb 自动拉起。"""
+        if port == self.base_port:
+            return True
+        with self._lock:
+            if port in self._started:
+                return True
+            if port in self._disabled:
+                return False
+        kwargs = {}
+        if platform.system() == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        env = {**os.environ, **SHARD_SERVER_ENV}
+        try:
+            result = subprocess.run(
+                [self.adb_path, "-P", str(port), "start-server"],
+                capture_output=True, text=True, check=False, timeout=timeout, env=env, **kwargs
+            )
+            if result.returncode == 0:
+                devices = subprocess.run(
+                    [self.adb_path, "-P", str(port), "devices"],
+                    capture_output=True, text=True, check=False, timeout=timeout, env=env, **kwargs
+                )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            console_log(f"启动端口 {port} 上的 adb server 失败: {e}", "ERROR")
+            return False
+        if result.returncode != 0:
+            console_log(f"启动端口 {port} 上的 adb server 失败: {result.stderr.strip()}", "ERROR")
+            return False
+        usb_serials = [
+            line.split()[0] for line in devices.stdout.splitlines()[1:]
+            if line.strip() and not line.startswith("*") and not is_network_serial(line.split()[0])
+        ]
+        if usb_serials:
+            # adb 版本不支持 ADB_USB=0，该分片会与主 server 争抢 USB 设备，停用
+            console_log(
+                f"端口 {port} 上的 adb server 仍占用了 USB 设备 ({', '.join(usb_serials)})，"
+                f"当前 adb 版本不支持 ADB_USB=0，已停用该分片", "ERROR"
+            )
+            self._kill_server(port, timeout)
+            with self._lock:
+                self._disabled.add(port)
+                for device_id in [key for key, value in self._assignments.items() if value == port]:
+                    del self._assignments[device_id]
+            return False
+        with self._lock:
+            self._started.add(port)
+        console_log(f"adb server 分片已启动: 端口 {port}")
+        return True
+
+    def _kill_server(self, port, timeout=5):
+        kwargs = {}
+        if platform.system() == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        try:
+            subprocess.run(
+                [self.adb_path, "-P", str(port), "kill-server"],
+                capture_output=True, check=False, timeout=timeout, **kwargs
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+    def stop_servers(self, timeout=5):
+        """结束主 server 以外的分片 server。"""
+        for port in self.ports[1:]:
+            self._kill_server(port, timeout)
+        with self._lock:
+            self._started = {self.base_port}
+
+    def get_stats(self):
+        """返回 {端口: 已分配的网络设备数}。"""
+        with self._lock:
+            stats = {port: 0 for port in self.ports}
+            for port in self._assignments.values():
+                if port in stats:
+                    stats[port] += 1
+            return stats
+
+
+def benchmark_throughput(adb_path, device_ids, shard_counts=(1, 2, 4), rounds=20, command="echo ok"):
+    """测量不同分片数下的 adb shell 总吞吐量。
+
+    device_ids 需为网络设备（ip:port）。每轮测试先把设备从所有分片断开，
+    再按分片数重新连接，然后对每台设备并发执行 rounds 次 command。
+
+    Returns:
+        list: [(分片数, 每秒完成的命令数)]
+    """
+    kwargs = {}
+    if platform.system() == 'Windows':
+        kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+
+    def adb(*args, timeout=30):
+        return subprocess.run([adb_path, *args], capture_output=True, text=True, check=False,
+                              timeout=timeout, **kwargs)
+
+    results = []
+    max_port = DEFAULT_ADB_PORT + max(shard_counts)
+    for shard_count in shard_counts:
+        for port in range(DEFAULT_ADB_PORT, max_port):
+            adb("-P", str(port), "disconnect")
+        shards = AdbShardManager(adb_path, shard_count)
+        for port in shards.ports:
+            shards.ensure_server(port)
+        for device_id in device_ids:
+            adb(*shards.server_args(port=shards.assign(device_id)), "connect", device_id)
+
+        def worker(device_id):
+            for _ in range(rounds):
+                adb(*shards.server_args(device_id), "-s", device_id, "shell", command)
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(device_ids) or 1) as pool:
+            list(pool.map(worker, device_ids))
+        elapsed = time.perf_counter() - start_time
+        throughput = len(device_ids) * rounds / elapsed if elapsed else 0.0
+        results.append((shard_count, throughput))
+        console_log(f"分片数 {shard_count}: {throughput:.1f} 条命令/秒 (耗时 {elapsed:.1f} 秒)")
+        shards.stop_servers()
+    return results
+
+
+if __name__ == "__main__":
+    # 用法: python adb_shards.py <ip:port> [<ip:port> ...]
+    benchmark_throughput(os.environ.get("ADB", "adb"), sys.argv[1:])
@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import importlib
+import os
+import platform
+import re
+import shlex
+import subprocess
+import threading
+import time
+import weakref
+
+from adb_client import parse_device_lines
+from adb_shards import AdbShardManager
+from device_props import parse_getprop
+from device_registry import make_device_entry
+from utils import console_log
+
+"""
+ScrcpyController 的 asyncio 版本。
+
+所有操作都是协程，基于 asyncio 子进程执行 adb：
+1. 每个调用可设置超时，超时或被取消时会结束对应的 adb 进程
+2. 每台设备和整个主机各有一个并发上限，避免几十台设备同时操作时压垮 adb server
+3. 多设备批量操作（状态、截图、安装）可以直接 asyncio.gather
+4. 设备条目、型号与属性解析与 ScrcpyController 共用同一套函数，adb server 分片路由
+   可与同步控制器共享（传入 controller.shards）
+
+Qt 界面通过 AsyncBridge 提交协程：安装了 qasync 时与 Qt 共用事件循环，
+否则在后台线程运行独立的事件循环。
+"""
+
+_QASYNC_SENTINEL = object()
+_QASYNC_CACHE = _QASYNC_SENTINEL
+
+
+def _get_qasync():
+    """按需加载 qasync，未安装时 AsyncBridge 改用后台事件循环线程。"""
+    global _QASYNC_CACHE
+    if _QASYNC_CACHE is not _QASYNC_SENTINEL:
+        return _QASYNC_CACHE
+    try:
+        _QASYNC_CACHE = importlib.import_module("qasync")
+    except Exception:
+        _QASYNC_CACHE = None
+    return _QASYNC_CACHE
+
+
+class AsyncScrcpyController:
+    """以协程方式提供与 ScrcpyController 相同的 adb 操作。"""
+
+    def __init__(self, adb_path="adb", scrcpy_path="scrcpy", per_device_limit=2, host_limit=16,
+                 default_timeout=30.0, shards=None):
+        """shards 为 AdbShardManager，传入同步控制器的 shards 时两者按同一分片路由。"""
+        self.system = platform.system()
+        self.adb_path = adb_path or "adb"
+        self.scrcpy_path = scrcpy_path or "scrcpy"
+        self.shards = shards or AdbShardManager(self.adb_path, 1)
+        self.per_device_limit = per_device_limit
+        self.host_limit = host_limit
+        self.default_timeout = default_timeout
+        # asyncio.Semaphore 绑定到首次使用它的事件循环，按运行中的事件循环分别创建，
+        # 同一实例可在多次 asyncio.run 或不同线程的事件循环中使用
+        self._loop_semaphores = weakref.WeakKeyDictionary()
+
+    def _adb_command(self, *args, device_id=None, port=None):
+        cmd = [self.adb_path, *self.shards.server_args(device_id, port)]
+        if device_id:
+            cmd.extend(["-s", device_id])
+        cmd.extend(str(arg) for arg in args)
+        return cmd
+
+    def _semaphores(self, device_id):
+        loop = asyncio.get_running_loop()
+        semaphores = self._loop_semaphores.get(loop)
+        if semaphores is None:
+            semaphores = self._loop_semaphores[loop] = {"host": asyncio.Semaphore(self.host_limit), "devices": {}}
+        devices = semaphores["devices"]
+        key = device_id or ""
+        if key not in devices:
+            devices[key] = asyncio.Semaphore(self.per_device_limit)
+        return semaphores["host"], devices[key]
+
+    async def _run_adb(self, *args, device_id=None, timeout=None, text=True, stdout_path=None, port=None):
+        """执行 adb 命令并返回 subprocess.CompletedProcess。
+
+        超时抛出 subprocess.TimeoutExpired；协程被取消时结束 adb 进程后继续抛出 CancelledError。
+        stdout_path 不为空时标准输出直接写入该文件；port 为空时按设备所在分片路由。
+        """
+        cmd = self._adb_command(*args, device_id=device_id, port=port)
+        timeout = self.default_timeout if timeout is None else timeout
+        host_semaphore, device_semaphore = self._semaphores(device_id)
+
+        kwargs = {}
+        if self.system == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        extra_env = self.shards.server_environment(port or self.shards.port_for(device_id))
+        if extra_env:
+            kwargs['env'] = {**os.environ, **extra_env}
+
+        # 先占设备名额再占主机名额，避免单台慢设备的排队请求占满主机名额
+        async with device_semaphore:
+            async with host_semaphore:
+                stdout_file = open(stdout_path, "wb") if stdout_path else None
+                try:
+                    process = await asyncio.create_subprocess_exec(
+                        *cmd,
+                        stdout=stdout_file if stdout_file else asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        **kwargs
+                    )
+                    try:
+                        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+                    except asyncio.TimeoutError:
+                        await self._kill(process)
+                        raise subprocess.TimeoutExpired(cmd, timeout)
+                    except asyncio.CancelledError:
+                        await self._kill(process)
+                        raise
+                finally:
+                    if stdout_file:
+                        stdout_file.close()
+
+        stdout = stdout or b""
+        stderr = stderr or b""
+        if text:
+            stdout = stdout.decode("utf-8", errors="ignore")
+            stderr = stderr.decode("utf-8", errors="ignore")
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+    @staticmethod
+    async def _kill(process):
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    async def get_device_statuses(self, timeout=10):
+        """返回与 ScrcpyController.get_device_statuses 相同结构的设备条目列表。
+
+        每个 adb server 分片上并发执行 adb devices -l，缺少型号的在线设备并发读取属性补全。
+        """
+        ports = self.shards.active_ports
+        results = await asyncio.gather(
+            *(self._run_adb("devices", "-l", port=port, timeout=timeout) for port in ports),
+            return_exceptions=True,
+        )
+        rows = []
+        seen = set()
+        for port, result in zip(ports, results):
+            if isinstance(result, Exception) or result.returncode != 0:
+                console_log(f"获取设备状态失败: {result if isinstance(result, Exception) else result.stderr}", "ERROR")
+                continue
+            for device_id, status, attrs in parse_device_lines(result.stdout):
+                if device_id in seen or not self.shards.accepts(device_id, port):
+                    continue
+                seen.add(device_id)
+                self.shards.assign(device_id, port)
+                rows.append((device_id, status, attrs))
+
+        models = await asyncio.gather(*(
+            self._get_device_model(device_id) if status == "device" and not attrs.get("model") else self._no_model()
+            for device_id, status, attrs in rows
+        ))
+        return [
+            make_device_entry(device_id, status, attrs, model)
+            for (device_id, status, attrs), model in zip(rows, models)
+        ]
+
+    @staticmethod
+    async def _no_model():
+        return ""
+
+    async def get_devices(self, timeout=10):
+        """返回 [(设备ID, 型号)]，只包含在线设备。"""
+        return [
+            (entry["device_id"], entry["model"])
+            for entry in await self.get_device_statuses(timeout)
+            if entry["status"] == "device"
+        ]
+
+    async def get_device_props(self, device_id, timeout=5):
+        """执行一次 getprop 并解析为属性字典，失败时返回空字典。"""
+        try:
+            result = await self._run_adb("shell", "getprop", device_id=device_id, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {}
+        return parse_getprop(result.stdout) if result.returncode == 0 else {}
+
+    async def _get_device_model(self, device_id, timeout=2):
+        return (await self.get_device_props(device_id, timeout)).get("ro.product.model") or "未知设备"
+
+    async def get_device_brand(self, device_id):
+        return (await self.get_device_props(device_id)).get("ro.product.brand") or "未知品牌"
+
+    async def get_device_full_info(self, device_id):
+        """读取一次属性快照，返回品牌、型号、Android 版本。"""
+        props = await self.get_device_props(device_id)
+        return {
+            "brand": props.get("ro.product.brand") or "未知品牌",
+            "model": props.get("ro.product.model") or "未知型号",
+            "android": props.get("ro.build.version.release") or "未知版本",
+            "id": device_id,
+        }
+
+    async def get_screen_size(self, device_id, timeout=3):
+        result = await self._run_adb("shell", "wm", "size", device_id=device_id, timeout=timeout)
+        match = re.search(r'Physical size: (\d+)x(\d+)', result.stdout)
+        if result.returncode == 0 and match:
+            return int(match.group(1)), int(match.group(2))
+        return None
+
+    async def get_screen_orientation(self, device_id, timeout=3):
+        result = await self._run_adb(
+            "shell", "dumpsys", "input", "|", "grep", "SurfaceOrientation", device_id=device_id, timeout=timeout
+        )
+        match = re.search(r'SurfaceOrientation: (\d)', result.stdout or "")
+        if match:
+            return "landscape" if match.group(1) in ("1", "3") else "portrait"
+        size = await self.get_screen_size(device_id)
+        if size:
+            return "landscape" if size[0] > size[1] else "portrait"
+        return "portrait"
+
+    async def execute_adb_command(self, command, device_id=None, timeout=None):
+        """执行任意 adb 命令，返回 (成功标志, 输出信息)。"""
+        cmd_parts = shlex.split(command) if isinstance(command, str) else list(command)
+        try:
+            result = await self._run_adb(*cmd_parts, device_id=device_id, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False, "命令执行超时"
+        if result.returncode != 0:
+            return False, f"命令失败(代码:{result.returncode}): {result.stderr or result.stdout}"
+        return True, result.stdout
+
+    async def capture_screenshot(self, device_id=None, save_path=None, timeout=15):
+        """截图并保存为 PNG，返回 (成功标志, 截图路径或错误信息)。"""
+        if not save_path:
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            suffix = f"_{device_id.replace(':', '_')}" if device_id else ""
+            save_path = os.path.join(os.path.expanduser("~"), f"scrcpy_screenshot_{timestamp}{suffix}.png")
+        save_dir = os.path.dirname(save_path)
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+        try:
+            result = await self._run_adb(
+                "exec-out", "screencap", "-p", device_id=device_id, timeout=timeout, stdout_path=save_path
+            )
+        except subprocess.TimeoutExpired:
+            return False, "截图超时"
+        if result.returncode != 0:
+            return False, result.stderr.strip() or f"截图失败(代码:{result.returncode})"
+        return True, save_path
+
+    async def install_apk(self, device_id, apk_path, timeout=300):
+        """安装 APK，返回 (成功标志, 输出信息)。"""
+        if not os.path.isfile(apk_path):
+            return False, f"APK 文件不存在: {apk_path}"
+        return await self.execute_adb_command(["install", "-r", apk_path], device_id, timeout=timeout)
+
+    async def send_touch_event(self, device_id, x, y, action="tap", timeout=8, duration=None):
+        if action == "tap":
+            args = ["input", "tap", int(x), int(y)]
+        elif action == "swipe":
+            x1, y1, x2, y2 = x
+            args = ["input", "swipe", int(x1), int(y1), int(x2), int(y2), int(duration or 500)]
+        elif action == "long":
+            args = ["input", "swipe", int(x), int(y), int(x), int(y), int(duration or 1000)]
+        else:
+            return False
+        try:
+            result = await self._run_adb("shell", *args, device_id=device_id, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            console_log("触摸命令执行超时", "WARN")
+            return False
+        return result.returncode == 0
+
+    async def send_key_event(self, device_id, key_code, timeout=3):
+        try:
+            result = await self._run_adb("shell", "input", "keyevent", key_code, device_id=device_id, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        return result.returncode == 0
+
+    async def send_text_input(self, device_id, text, timeout=3):
+        try:
+            result = await self._run_adb(
+                "shell", "input", "text", shlex.quote(text), device_id=device_id, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return False
+        return result.returncode == 0
+
+    async def for_devices(self, device_ids, operation, *args, **kwargs):
+        """对多台设备并发执行同一操作，返回 {设备ID: 结果或异常}。
+
+        例如: await controller.for_devices(ids, controller.capture_screenshot)
+        """
+        results = await asyncio.gather(
+            *(operation(device_id, *args, **kwargs) for device_id in device_ids),
+            return_exceptions=True,
+        )
+        return dict(zip(device_ids, results))
+
+
+class AsyncBridge:
+    """让 Qt 界面提交并等待协程。
+
+    安装了 qasync 且已调用 install_qt_loop 时，协程在 Qt 主线程的事件循环中执行，
+    回调也在主线程触发；否则在后台线程的独立事件循环中执行，回调在该线程触发，
+    界面代码需通过 Qt 信号切换回主线程。
+    """
+
+    def __init__(self):
+        self.loop = None
+        self._thread = None
+        self._uses_qt_loop = False
+
+    def install_qt_loop(self, app):
+        """尝试把 qasync 事件循环安装为当前 asyncio 循环，成功返回 True。"""
+        qasync = _get_qasync()
+        if qasync is None:
+            return False
+        self.loop = qasync.QEventLoop(app)
+        asyncio.set_event_loop(self.loop)
+        self._uses_qt_loop = True
+        return True
+
+    def _ensure_loop(self):
+        if self.loop is not None:
+            return self.loop
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="async-bridge", daemon=True)
+        self._thread.start()
+        return self.loop
+
+    def submit(self, coro, callback=None):
+        """提交协程并返回 Future（qasync 下为 asyncio.Future），callback(future) 在完成时调用。"""
+        loop = self._ensure_loop()
+        if self._uses_qt_loop:
+            future = asyncio.ensure_future(coro, loop=loop)
+        else:
+            future = asyncio.run_coroutine_threadsafe(coro, loop)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def stop(self):
+        if self.loop is not None and not self._uses_qt_loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            if self._thread:
+                self._thread.join(timeout=1)
+            self.loop = None
+            self._thread = None
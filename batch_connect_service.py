@@ -3,17 +3,31 @@
 
 from functools import partial
 
-from PyQt5.QtCore import QProcess, QTimer
+from PyQt5.QtCore import QProcess
 from PyQt5.QtWidgets import QMessageBox
 
+from budget_allocator import allocate_budget, device_weight
+from launch_pipeline import LaunchPipeline
+from usb_scheduler import DEFAULT_STREAM_MBPS
+from utils import console_log
+
 
 class BatchConnectService:
-    """负责批量连接设备与延迟控制栏兼容逻辑。"""
+    """负责批量连接设备，窗口出现后执行控制栏兼容逻辑。"""
 
     def __init__(self, owner):
         self.owner = owner
+        self.pipeline = LaunchPipeline(log=self.owner.log)
+
+    def observe_output(self, device_id, text):
+        """转发 scrcpy 输出给启动流水线，用于判断设备是否就绪。"""
+        self.pipeline.observe_output(device_id, text)
 
     def connect_all_devices(self):
+        if self.pipeline.running:
+            self.owner.log("批量连接仍在进行中，请稍候")
+            return
+
         devices = self.owner.device_service.list_devices()
         if not devices:
             if hasattr(self.owner, 'show_warning_message'):
@@ -38,8 +52,13 @@ class BatchConnectService:
                     QMessageBox.Yes,
                 )
             if reply == QMessageBox.Yes:
-                self.owner.stop_all_scrcpy()
+                # 等旧进程全部退出后再启动，避免同一设备上新旧 scrcpy 同时运行
+                self.owner.stop_all_scrcpy(on_finished=lambda: self._connect_devices(devices))
+                return
+
+        self._connect_devices(devices)
 
+    def _connect_devices(self, devices):
         pending_devices = []
         already_running = []
         for device_id, model in devices:
@@ -59,55 +78,122 @@ class BatchConnectService:
         if not connect_only_new and already_running:
             pending_devices = devices
 
-        count = 0
+        # 按 USB 总线交错启动，避免连续几路投屏压在同一条总线上
+        pending_devices = self.owner.controller.usb_scheduler.spread(pending_devices, key=lambda item: item[0])
+
         positions = self.owner.get_multi_device_window_positions(len(pending_devices))
+        wall = self.owner.process_manager.wall
+        allocation = {} if wall.enabled else self._allocate_budget(pending_devices)
+        if wall.enabled:
+            self.owner.log(
+                f"墙面模式: 以缩略图画质连接（尺寸 {wall.thumbnail['max_size']}，帧率 {wall.thumbnail['max_fps']}，"
+                f"码率 {wall.thumbnail['bit_rate']:g}M），选中设备后切换为完整画质"
+            )
+        jobs = []
         for index, (device_id, model) in enumerate(pending_devices):
             if device_id in self.owner.device_processes and self.owner.device_processes[device_id].state() == QProcess.Running:
                 self.owner.log(f"设备 {model} ({device_id}) 已经在运行")
                 continue
 
-            window_x, window_y = positions[index] if index < len(positions) else (100 + count * 50, 100 + count * 50)
-
-            cmd = self.owner._build_single_device_command(
+            window_x, window_y = positions[index] if index < len(positions) else (100 + index * 50, 100 + index * 50)
+            label = f"{model} ({device_id})"
+            jobs.append((
                 device_id,
-                f"Scrcpy - {model} ({device_id})",
-                window_x=window_x,
-                window_y=window_y,
-            )
-            if not cmd:
-                continue
+                label,
+                partial(self._launch_one, device_id, model, window_x, window_y, allocation.get(device_id)),
+            ))
 
-            try:
-                window_title = f"Scrcpy - {model} ({device_id})"
-                self.owner._launch_device_process(
-                    device_id,
-                    cmd,
-                    f"已启动设备 {model} ({device_id}) 的 scrcpy 进程",
-                )
-                count += 1
-                self._schedule_control_bar_retry(device_id, window_title)
-            except Exception as e:
-                self.owner.log(f"启动设备 {model} ({device_id}) 失败: {str(e)}")
-                if device_id in self.owner.device_processes:
-                    del self.owner.device_processes[device_id]
+        if not jobs:
+            if already_running:
+                self.owner.log("所有可检测设备均已在投屏中")
+            return
 
+        # 限制同时启动的进程数，前一台就绪（或超时）后再启动下一台
+        self.pipeline.max_concurrent = max(1, int(getattr(self.owner, "launch_concurrency", 2)))
+        self.pipeline.ready_timeout = float(getattr(self.owner, "launch_ready_timeout", 8.0))
+        self.owner.log(f"开始批量连接 {len(jobs)} 台设备，同时启动上限 {self.pipeline.max_concurrent} 台")
+        self.pipeline.start(jobs, on_finished=self._on_batch_finished)
+
+    def _allocate_budget(self, pending_devices):
+        """预算模式下按权重为本批设备分配码率/尺寸/帧率，未开启时返回空字典。"""
+        budget_action = getattr(self.owner, "launch_budget_action", None)
+        if not pending_devices or budget_action is None or not budget_action.isChecked():
+            return {}
+
+        def read_int(widget):
+            text = widget.text().strip()
+            return int(text) if text.isdigit() else None
+
+        base_quality = {
+            "bit_rate": read_int(self.owner.bitrate_input) or DEFAULT_STREAM_MBPS,
+            "max_size": read_int(self.owner.maxsize_input),
+            "max_fps": read_int(self.owner.maxfps_input),
+        }
+        controller = self.owner.controller
+        focused_id = self.owner.device_combo.currentData()
+        main_id = getattr(controller, "sync_control_main_device", None)
+        slave_ids = set(getattr(controller, "sync_control_slave_devices", None) or [])
+        devices = [
+            {
+                "device_id": device_id,
+                "weight": device_weight(device_id, focused_id, main_id, slave_ids),
+                "usb_bus": controller.device_registry.usb_bus_of(device_id),
+            }
+            for device_id, _model in pending_devices
+        ]
+        scheduler = controller.usb_scheduler
+        allocation = allocate_budget(
+            devices,
+            self.owner.budget_total_mbps,
+            self.owner.budget_pixel_rate_mpx,
+            base_quality,
+            bus_budget_mbps=scheduler.bus_budget_mbps - scheduler.transfer_mbps,
+        )
+        self.owner.log(
+            f"按预算分配画质: 总码率 {self.owner.budget_total_mbps:g}M，"
+            f"总像素速率 {self.owner.budget_pixel_rate_mpx:g} 百万像素/秒，共 {len(allocation)} 台"
+        )
+        for device_id, quality in allocation.items():
+            console_log(
+                f"[{device_id}] 码率 {quality['bit_rate']:g}M，尺寸 {quality['max_size']}，帧率 {quality['max_fps']}",
+                "DEBUG",
+            )
+        return allocation
+
+    def _launch_one(self, device_id, model, window_x, window_y, quality=None):
+        """启动单台设备，返回 QProcess，失败返回 None。"""
+        window_title = f"Scrcpy - {model} ({device_id})"
+        cmd = self.owner._build_single_device_command(
+            device_id,
+            window_title,
+            window_x=window_x,
+            window_y=window_y,
+            quality=quality,
+        )
+        if not cmd:
+            return None
+        wall = self.owner.process_manager.wall
+        if wall.enabled:
+            # 完整画质命令留待该设备获得焦点时使用
+            cmd = wall.register(device_id, cmd)
+
+        try:
+            process = self.owner._launch_device_process(
+                device_id,
+                cmd,
+                f"已启动设备 {model} ({device_id}) 的 scrcpy 进程",
+                window_hooks=[lambda dev, _handles, title=window_title: self.owner.create_control_bar(dev, title)],
+            )
+        except Exception as e:
+            self.owner.log(f"启动设备 {model} ({device_id}) 失败: {str(e)}")
+            if device_id in self.owner.device_processes:
+                del self.owner.device_processes[device_id]
+            return None
+        return process
+
+    def _on_batch_finished(self, results, total_seconds):
+        count = sum(1 for item in results.values() if item["status"] in ("ready", "timeout"))
         if count > 0:
             self.owner.log(f"成功连接 {count} 个设备")
-        elif already_running:
-            self.owner.log("所有可检测设备均已在投屏中")
-
-    def _schedule_control_bar_retry(self, device_id, window_title):
-        delay_times = [2000, 3500, 5000, 7000, 10000]
-
-        def attempt_create_control_bar(d_id, w_title, attempt_index=0):
-            if attempt_index >= len(delay_times):
-                self.owner.log(f"⚠️ 设备 {d_id} 控制栏创建尝试已达最大次数")
-                return
-
-            success = self.owner.create_control_bar(d_id, w_title)
-            if not success and attempt_index + 1 < len(delay_times):
-                next_delay = delay_times[attempt_index + 1] - delay_times[attempt_index]
-                self.owner.log(f"设备 {d_id}: 将在 {next_delay/1000} 秒后再次尝试创建控制栏")
-                QTimer.singleShot(next_delay, partial(attempt_create_control_bar, d_id, w_title, attempt_index + 1))
-
-        QTimer.singleShot(delay_times[0], partial(attempt_create_control_bar, device_id, window_title, 0))
\ No newline at end of file
+        for device_id, item in results.items():
+            console_log(f"[{device_id}] 启动结果: {item['status']}, 就绪耗时 {item['seconds']:.2f} 秒", "DEBUG")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import math
+
+"""
+批量投屏的总预算分配。
+
+批量连接时每台设备默认使用同一组界面参数，设备多时总码率与总像素吞吐会压垮主机。
+预算模式给定总码率（Mbps）与总像素速率（百万像素/秒），按权重分给本批设备：
+1. 权重：当前选中的设备、群控主控设备更高，群控从设备更低
+2. 码率按权重注水分配，不超过界面设置的码率；同一 USB 总线的合计码率不超过总线预算，
+   被总线限制后多出的码率再分给其他设备
+3. 像素速率份额换算为 max_size 与 max_fps：优先保持帧率，尺寸低于下限时再降帧率
+结果为每台设备的 {bit_rate, max_size, max_fps}，交给 build_scrcpy_command 生成各自的命令。
+"""
+
+# 竖屏手机常见的短边/长边比例（1080x2400），max_size 限制的是长边
+ASPECT_RATIO = 0.45
+
+FOCUSED_WEIGHT = 3.0
+MAIN_DEVICE_WEIGHT = 2.0
+SLAVE_DEVICE_WEIGHT = 0.75
+
+
+def device_weight(device_id, focused_id=None, main_id=None, slave_ids=()):
+    """按是否选中、群控角色计算设备权重。"""
+    weight = 1.0
+    if device_id == focused_id:
+        weight *= FOCUSED_WEIGHT
+    if device_id == main_id:
+        weight *= MAIN_DEVICE_WEIGHT
+    elif device_id in slave_ids:
+        weight *= SLAVE_DEVICE_WEIGHT
+    return weight
+
+
+def water_fill(total, weights, caps):
+    """按权重分配 total，单项不超过 caps 中的上限，达到上限后多出的部分分给其余项。"""
+    allocation = {}
+    active = {key: weight for key, weight in weights.items() if weight > 0}
+    remaining = float(total)
+    while active and remaining > 1e-9:
+        weight_sum = sum(active.values())
+        capped = {
+            key for key, weight in active.items()
+            if caps.get(key) is not None and allocation.get(key, 0.0) + remaining * weight / weight_sum >= caps[key]
+        }
+        if not capped:
+            for key, weight in active.items():
+                allocation[key] = allocation.get(key, 0.0) + remaining * weight / weight_sum
+            break
+        for key in capped:
+            remaining -= caps[key] - allocation.get(key, 0.0)
+            allocation[key] = caps[key]
+            del active[key]
+    for key in weights:
+        allocation.setdefault(key, 0.0)
+    return allocation
+
+
+def allocate_bit_rates(devices, total_mbps, max_mbps=None, bus_budget_mbps=None):
+    """分配码率。
+
+    Args:
+        devices (list): [{"device_id", "weight", "usb_bus"}]，网络设备 usb_bus 为 None
+        total_mbps (float): 本批设备的总码率预算
+        max_mbps (float): 单台设备上限（界面设置的码率），None 表示不限
+        bus_budget_mbps (float): 单条 USB 总线的码率上限，None 表示不限
+
+    Returns:
+        dict: {device_id: Mbps}
+    """
+    weights = {item["device_id"]: item["weight"] for item in devices}
+    buses = {item["device_id"]: item.get("usb_bus") for item in devices}
+    caps = {device_id: max_mbps for device_id in weights}
+    fixed = {}
+    while True:
+        free = {device_id: weight for device_id, weight in weights.items() if device_id not in fixed}
+        allocation = dict(fixed)
+        allocation.update(water_fill(total_mbps - sum(fixed.values()), free, caps))
+        if bus_budget_mbps is None:
+            return allocation
+        loads = {}
+        for device_id, mbps in allocation.items():
+            if buses[device_id] is not None and device_id not in fixed:
+                loads[buses[device_id]] = loads.get(buses[device_id], 0.0) + mbps
+        over = [bus for bus, load in loads.items() if load > bus_budget_mbps + 1e-9]
+        if not over:
+            return allocation
+        # 超出总线预算的设备在总线内重新分配并固定，其余设备分享剩余预算
+        for bus in over:
+            members = {device_id: free[device_id] for device_id in free if buses[device_id] == bus}
+            used = sum(mbps for device_id, mbps in fixed.items() if buses[device_id] == bus)
+            fixed.update(water_fill(bus_budget_mbps - used, members, caps))
+
+
+def pixel_share_to_quality(pixel_rate, max_size=None, max_fps=None, min_max_size=720, min_fps=15):
+    """把像素速率（像素/秒）换算为 (max_size, max_fps)，不超过界面设置的上限。"""
+    size_cap = max_size or 1920
+    fps = max_fps or 60
+    size = math.sqrt(pixel_rate / (fps * ASPECT_RATIO)) if pixel_rate > 0 else 0
+    if size < min_max_size:
+        size = min_max_size
+        fps = max(min_fps, int(pixel_rate / (size * size * ASPECT_RATIO)))
+    size = min(size_cap, int(size) // 8 * 8)
+    return size, fps
+
+
+def allocate_budget(devices, total_mbps, pixel_rate_mpx, base_quality, bus_budget_mbps=None):
+    """为本批设备分配码率、尺寸与帧率。
+
+    Args:
+        devices (list): [{"device_id", "weight", "usb_bus"}]
+        total_mbps (float): 总码率预算（Mbps）
+        pixel_rate_mpx (float): 总像素速率预算（百万像素/秒）
+        base_quality (dict): 界面参数 {"bit_rate", "max_size", "max_fps"}，作为每台设备的上限
+        bus_budget_mbps (float): 单条 USB 总线的码率上限
+
+    Returns:
+        dict: {device_id: {"bit_rate": Mbps, "max_size": int, "max_fps": int}}
+    """
+    if not devices:
+        return {}
+    bit_rates = allocate_bit_rates(devices, total_mbps, base_quality.get("bit_rate"), bus_budget_mbps)
+    weight_sum = sum(item["weight"] for item in devices) or 1.0
+    result = {}
+    for item in devices:
+        device_id = item["device_id"]
+        pixel_rate = pixel_rate_mpx * 1000000 * item["weight"] / weight_sum
+        max_size, max_fps = pixel_share_to_quality(pixel_rate, base_quality.get("max_size"), base_quality.get("max_fps"))
+        result[device_id] = {
+            "bit_rate": max(1.0, round(bit_rates[device_id], 1)),
+            "max_size": max_size,
+            "max_fps": max_fps,
+        }
+    return result
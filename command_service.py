@@ -64,8 +64,8 @@ class ScrcpyCommandService:
         },
     }
 
-    def build_command_from_ui(self, ui, scrcpy_path, device_id, *, window_title, window_x=100, window_y=100):
-        """从 UI 收集参数并构造 scrcpy 命令。"""
+    def build_command_from_ui(self, ui, scrcpy_path, device_id, *, window_title, window_x=100, window_y=100, quality=None):
+        """从 UI 收集参数并构造 scrcpy 命令，quality 给出时覆盖码率/最大尺寸/帧率。"""
         bit_rate, error = self._parse_optional_int(ui.bitrate_input.text(), "比特率")
         if error:
             return None, error, False
@@ -101,6 +101,11 @@ class ScrcpyCommandService:
         if codec == "默认":
             codec = None
 
+        if quality:
+            bit_rate = quality.get("bit_rate", bit_rate)
+            max_size = quality.get("max_size", max_size)
+            max_fps = quality.get("max_fps", max_fps)
+
         command = build_scrcpy_command(
             scrcpy_path,
             device_id,
@@ -124,6 +129,7 @@ class ScrcpyCommandService:
             no_audio=True,
             window_x=window_x,
             window_y=window_y,
+            print_fps=bool(getattr(getattr(ui, "print_fps_action", None), "isChecked", lambda: False)()),
         )
         return command, None, False
 
@@ -27,6 +27,23 @@ class ConfigService:
         ui.device_profiles = config.get("device_profiles", {})
         ui.pending_selected_device = config.get("selected_device") or config.get("device_id")
         ui.last_connected_device = config.get("last_connected_device")
+        try:
+            ui.launch_concurrency = max(1, int(config.get("launch_concurrency", 2) or 2))
+            ui.launch_ready_timeout = max(1.0, float(config.get("launch_ready_timeout", 8.0) or 8.0))
+        except (TypeError, ValueError):
+            ui.launch_concurrency, ui.launch_ready_timeout = 2, 8.0
+        try:
+            ui.host_cpu_budget = max(0.0, float(config.get("host_cpu_budget", 90.0)))
+            ui.host_mem_budget = max(0.0, float(config.get("host_mem_budget", 90.0)))
+        except (TypeError, ValueError):
+            ui.host_cpu_budget, ui.host_mem_budget = 90.0, 90.0
+        try:
+            ui.budget_total_mbps = max(1.0, float(config.get("budget_total_mbps", 160.0)))
+            ui.budget_pixel_rate_mpx = max(1.0, float(config.get("budget_pixel_rate_mpx", 600.0)))
+        except (TypeError, ValueError):
+            ui.budget_total_mbps, ui.budget_pixel_rate_mpx = 160.0, 600.0
+        if hasattr(ui, "launch_budget_action"):
+            ui.launch_budget_action.setChecked(bool(config.get("launch_budget", False)))
 
         bit_rate = config.get("bit_rate")
         if bit_rate:
@@ -89,6 +106,14 @@ class ConfigService:
             ui.screenshot_date_archive_action.setChecked(bool(config.get("screenshot_date_archive", False)))
         if hasattr(ui, "connect_only_new_action"):
             ui.connect_only_new_action.setChecked(bool(config.get("connect_only_new", True)))
+        if hasattr(ui, "supervise_sessions_action"):
+            ui.supervise_sessions_action.setChecked(bool(config.get("supervise_sessions", False)))
+        if hasattr(ui, "print_fps_action"):
+            ui.print_fps_action.setChecked(bool(config.get("print_fps", False)))
+        if hasattr(ui, "adaptive_quality_action"):
+            ui.adaptive_quality_action.setChecked(bool(config.get("adaptive_quality", False)))
+        if hasattr(ui, "wall_mode_action"):
+            ui.wall_mode_action.setChecked(bool(config.get("wall_mode", False)))
         if hasattr(ui, "window_layout_action_group"):
             layout_mode = config.get("window_layout_mode", "网格排布")
             for action in ui.window_layout_action_group.actions():
@@ -99,6 +124,8 @@ class ConfigService:
             ui.open_record_dir_action.setChecked(bool(config.get("open_record_dir_on_finish", False)))
         if hasattr(ui, "open_record_file_action"):
             ui.open_record_file_action.setChecked(bool(config.get("open_record_file_on_finish", False)))
+        if hasattr(ui, "scrcpy_input_backend_action"):
+            ui.scrcpy_input_backend_action.setChecked(config.get("input_backend", "adb") == "scrcpy")
 
     def load_runtime_paths(self):
         """单独加载运行时依赖路径配置。"""
@@ -109,6 +136,14 @@ class ConfigService:
             "scrcpy_server_path": str(config.get("scrcpy_server_path", "") or "").strip(),
         }
 
+    def load_adb_shard_count(self):
+        """单独加载 adb server 分片数，需在创建控制器前读取。"""
+        config = load_settings(self.config_path, default={})
+        try:
+            return max(1, int(config.get("adb_shards", 1) or 1))
+        except (TypeError, ValueError):
+            return 1
+
     def save_from(self, ui):
         """从 UI 控件收集配置并保存。"""
         runtime_paths = getattr(ui, "runtime_path_overrides", {}) or {}
@@ -120,9 +155,22 @@ class ConfigService:
             "quick_screenshot_enabled": bool(getattr(getattr(ui, "quick_screenshot_mode_action", None), "isChecked", lambda: False)()),
             "screenshot_date_archive": bool(getattr(getattr(ui, "screenshot_date_archive_action", None), "isChecked", lambda: False)()),
             "connect_only_new": bool(getattr(getattr(ui, "connect_only_new_action", None), "isChecked", lambda: True)()),
+            "supervise_sessions": bool(getattr(getattr(ui, "supervise_sessions_action", None), "isChecked", lambda: False)()),
+            "print_fps": bool(getattr(getattr(ui, "print_fps_action", None), "isChecked", lambda: False)()),
+            "adaptive_quality": bool(getattr(getattr(ui, "adaptive_quality_action", None), "isChecked", lambda: False)()),
+            "wall_mode": bool(getattr(getattr(ui, "wall_mode_action", None), "isChecked", lambda: False)()),
             "window_layout_mode": getattr(ui, "get_window_layout_mode", lambda: "网格排布")(),
             "open_record_dir_on_finish": bool(getattr(getattr(ui, "open_record_dir_action", None), "isChecked", lambda: False)()),
             "open_record_file_on_finish": bool(getattr(getattr(ui, "open_record_file_action", None), "isChecked", lambda: False)()),
+            "input_backend": getattr(getattr(ui, "controller", None), "input_backend", "adb"),
+            "adb_shards": getattr(ui, "adb_shard_count", 1),
+            "launch_concurrency": getattr(ui, "launch_concurrency", 2),
+            "launch_ready_timeout": getattr(ui, "launch_ready_timeout", 8.0),
+            "host_cpu_budget": getattr(ui, "host_cpu_budget", 90.0),
+            "host_mem_budget": getattr(ui, "host_mem_budget", 90.0),
+            "budget_total_mbps": getattr(ui, "budget_total_mbps", 160.0),
+            "budget_pixel_rate_mpx": getattr(ui, "budget_pixel_rate_mpx", 600.0),
+            "launch_budget": bool(getattr(getattr(ui, "launch_budget_action", None), "isChecked", lambda: False)()),
             "selected_device": ui.device_combo.currentData() if ui.device_combo.count() else ui.pending_selected_device,
             "device_id": ui.device_combo.currentData() if ui.device_combo.count() else ui.pending_selected_device,
             "last_connected_device": getattr(ui, "last_connected_device", None),
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import importlib
+
+"""
+群控坐标映射引擎。
+
+为每台从设备预先计算一个 3x3 仿射矩阵（裁剪区域 -> 归一化 -> 旋转 -> 缩放 -> 显示偏移），
+一次把 M 个点映射到 N 台设备：安装了 numpy 时为一次批量矩阵运算，否则逐点计算。
+
+坐标约定：
+1. 输入/输出均为设备当前显示方向下的像素坐标（与 input tap 一致）
+2. 旋转差 k = (从设备旋转 - 主设备旋转) mod 4，每 90 度在归一化空间中
+   执行 (u, v) -> (v, 1 - u)
+"""
+
+_NUMPY_SENTINEL = object()
+_NUMPY_CACHE = _NUMPY_SENTINEL
+
+
+def _get_numpy():
+    """按需加载 numpy，未安装时回退到纯 Python 计算。"""
+    global _NUMPY_CACHE
+    if _NUMPY_CACHE is not _NUMPY_SENTINEL:
+        return _NUMPY_CACHE
+    try:
+        _NUMPY_CACHE = importlib.import_module("numpy")
+    except Exception:
+        _NUMPY_CACHE = None
+    return _NUMPY_CACHE
+
+
+def display_size(size, rotation):
+    """把 wm size 返回的物理尺寸换算为当前显示方向下的 (宽, 高)。"""
+    width, height = size
+    if rotation in (1, 3):
+        return height, width
+    return width, height
+
+
+def _matmul(a, b):
+    return tuple(
+        tuple(sum(a[i][k] * b[k][j] for k in range(3)) for j in range(3))
+        for i in range(3)
+    )
+
+
+# 归一化空间中的旋转矩阵，索引为旋转差 k
+_ROTATIONS = (
+    ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)),
+    ((0.0, 1.0, 0.0), (-1.0, 0.0, 1.0), (0.0, 0.0, 1.0)),
+    ((-1.0, 0.0, 1.0), (0.0, -1.0, 1.0), (0.0, 0.0, 1.0)),
+    ((0.0, -1.0, 1.0), (1.0, 0.0, 0.0), (0.0, 0.0, 1.0)),
+)
+
+
+def build_transform(src_rect, dst_rect, rotation_delta=0):
+    """构建从源区域到目标区域的仿射矩阵。
+
+    Args:
+        src_rect (tuple): 主设备上的源区域 (x, y, 宽, 高)，通常为 (0, 0, 显示宽, 显示高)，
+                          镜像使用 --crop 时传入裁剪区域
+        dst_rect (tuple): 从设备上的目标区域 (x, y, 宽, 高)，x/y 即显示偏移
+        rotation_delta (int): 旋转差 k（0-3）
+
+    Returns:
+        tuple: 3x3 矩阵（行优先）
+    """
+    sx, sy, sw, sh = src_rect
+    dx, dy, dw, dh = dst_rect
+    normalize = ((1.0 / sw, 0.0, -sx / sw), (0.0, 1.0 / sh, -sy / sh), (0.0, 0.0, 1.0))
+    scale = ((float(dw), 0.0, float(dx)), (0.0, float(dh), float(dy)), (0.0, 0.0, 1.0))
+    return _matmul(scale, _matmul(_ROTATIONS[rotation_delta % 4], normalize))
+
+
+class CoordinateMapper:
+    """保存每台从设备的变换矩阵与边界，并批量映射坐标。"""
+
+    def __init__(self):
+        self.device_ids = []
+        self._matrices = []
+        self._bounds = []
+        self._stacked = None
+
+    def add_device(self, device_id, matrix, bounds):
+        """登记一台设备，bounds 为映射后坐标的上限 (宽, 高)。"""
+        self.device_ids.append(device_id)
+        self._matrices.append(matrix)
+        self._bounds.append(bounds)
+        self._stacked = None
+
+    @classmethod
+    def from_geometry(cls, main_geometry, slave_geometries, src_rect=None, dst_rects=None):
+        """根据几何缓存条目（size/rotation）构建映射器。
+
+        Args:
+            main_geometry (dict): 主设备几何信息
+            slave_geometries (dict): {设备ID: 几何信息}
+            src_rect (tuple): 主设备源区域，默认整个显示区域
+            dst_rects (dict): {设备ID: (x, y, 宽, 高)}，默认整个显示区域
+        """
+        # 旋转未知时按自然方向处理：wm size 是自然方向的物理尺寸，不能据此推断旋转
+        main_rotation = main_geometry.get("rotation") or 0
+        main_width, main_height = display_size(main_geometry["size"], main_rotation)
+        src_rect = src_rect or (0, 0, main_width, main_height)
+
+        mapper = cls()
+        for device_id, geometry in slave_geometries.items():
+            rotation = geometry.get("rotation") or 0
+            width, height = display_size(geometry["size"], rotation)
+            dst_rect = (dst_rects or {}).get(device_id) or (0, 0, width, height)
+            mapper.add_device(
+                device_id,
+                build_transform(src_rect, dst_rect, rotation - main_rotation),
+                (width, height),
+            )
+        return mapper
+
+    def map_points(self, points):
+        """把主设备上的一组点映射到所有已登记设备。
+
+        Args:
+            points (list): [(x, y), ...]
+
+        Returns:
+            dict: {设备ID: [(x, y), ...]}，坐标为整数并限制在 [1, 边长-1] 内
+        """
+        if not self.device_ids or not points:
+            return {device_id: [] for device_id in self.device_ids}
+
+        np = _get_numpy()
+        if np is not None:
+            return self._map_points_numpy(np, points)
+
+        mapped = {}
+        for device_id, matrix, (width, height) in zip(self.device_ids, self._matrices, self._bounds):
+            device_points = []
+            for x, y in points:
+                tx = matrix[0][0] * x + matrix[0][1] * y + matrix[0][2]
+                ty = matrix[1][0] * x + matrix[1][1] * y + matrix[1][2]
+                device_points.append((
+                    max(1, min(int(tx), width - 1)),
+                    max(1, min(int(ty), height - 1)),
+                ))
+            mapped[device_id] = device_points
+        return mapped
+
+    def _map_points_numpy(self, np, points):
+        if self._stacked is None:
+            matrices = np.asarray(self._matrices, dtype=np.float64)[:, :2, :]
+            upper = np.asarray(self._bounds, dtype=np.float64)[:, None, :] - 1
+            self._stacked = (matrices, upper)
+        matrices, upper = self._stacked
+
+        homogeneous = np.ones((len(points), 3), dtype=np.float64)
+        homogeneous[:, :2] = np.asarray(points, dtype=np.float64)
+        # (N, 2, 3) x (M, 3) -> (N, M, 2)
+        result = np.einsum("nij,mj->nmi", matrices, homogeneous)
+        result = np.clip(np.trunc(result), 1, upper).astype(int)
+        return {
+            device_id: [tuple(point) for point in result[index].tolist()]
+            for index, device_id in enumerate(self.device_ids)
+        }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from utils import console_log
+
+"""
+后台设备发现与界面卡顿测量。
+
+DeviceDiscoveryWorker 在独立线程中执行设备扫描，界面只负责提交刷新请求：
+扫描进行中收到的请求合并为一次后续扫描，批量启动 20 台设备也只会多扫描一次。
+扫描结果通过 on_result 回调推送，回调在工作线程中执行，GUI 侧需通过 Qt 信号切回主线程。
+
+EventLoopStallMonitor 由界面定时器周期调用 tick()，以定时器的延迟估算事件循环被阻塞的时长。
+"""
+
+
+class DeviceDiscoveryWorker:
+    """合并刷新请求的后台设备扫描线程。"""
+
+    def __init__(self, scan_func, on_result):
+        """
+        Args:
+            scan_func (callable): scan_func(max_age) 返回设备条目列表，max_age 为 0 时强制重新扫描
+            on_result (callable): on_result(result)，result 含 devices/show_message/elapsed/merged
+        """
+        self.scan_func = scan_func
+        self.on_result = on_result
+        self.scan_count = 0
+        self.request_count = 0
+        self.merged_count = 0
+        self.last_elapsed = 0.0
+        self._pending = None
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """启动扫描线程，重复调用无副作用。"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="device-discovery", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def request(self, show_message=False, force=False):
+        """提交一次刷新请求，尚未执行的请求会与之合并。
+
+        Args:
+            show_message (bool): 结果是否需要在界面提示
+            force (bool): 是否忽略注册表中的近期结果，强制执行 adb devices
+        """
+        with self._lock:
+            self.request_count += 1
+            if self._pending is None:
+                self._pending = {"show_message": show_message, "force": force, "requests": 1}
+            else:
+                self._pending["show_message"] = self._pending["show_message"] or show_message
+                self._pending["force"] = self._pending["force"] or force
+                self._pending["requests"] += 1
+                self.merged_count += 1
+        self._wake_event.set()
+
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._wake_event.clear()
+            return pending
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait()
+            if self._stop_event.is_set():
+                break
+            pending = self._take_pending()
+            if pending is None:
+                continue
+
+            start_time = time.perf_counter()
+            try:
+                devices = self.scan_func(0 if pending["force"] else None)
+            except Exception as e:
+                console_log(f"后台设备扫描出错: {e}", "ERROR")
+                devices = None
+            elapsed = time.perf_counter() - start_time
+            self.scan_count += 1
+            self.last_elapsed = elapsed
+            if pending["requests"] > 1:
+                console_log(f"设备刷新: 合并 {pending['requests']} 次请求, 耗时 {elapsed * 1000:.0f} ms", "DEBUG")
+
+            if devices is None or self._stop_event.is_set():
+                continue
+            try:
+                self.on_result({
+                    "devices": devices,
+                    "show_message": pending["show_message"],
+                    "elapsed": elapsed,
+                    "merged": pending["requests"],
+                })
+            except Exception as e:
+                console_log(f"推送设备扫描结果时出错: {e}", "ERROR")
+
+    def get_stats(self):
+        return {
+            "requests": self.request_count,
+            "scans": self.scan_count,
+            "merged": self.merged_count,
+            "last_ms": self.last_elapsed * 1000,
+        }
+
+
+class EventLoopStallMonitor:
+    """根据定时器触发延迟测量事件循环的卡顿。"""
+
+    def __init__(self, interval=0.05, warn_threshold=0.25, warn_interval=5.0):
+        """
+        Args:
+            interval (float): 定时器周期（秒），需与界面定时器一致
+            warn_threshold (float): 单次卡顿超过该秒数时输出警告
+            warn_interval (float): 两次警告之间的最短间隔（秒）
+        """
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.warn_interval = warn_interval
+        self.max_stall = 0.0
+        self.last_stall = 0.0
+        self.stall_count = 0
+        self.ticks = 0
+        self._last_tick = None
+        self._last_warn = 0.0
+
+    def tick(self):
+        now = time.monotonic()
+        if self._last_tick is not None:
+            stall = max(0.0, now - self._last_tick - self.interval)
+            self.last_stall = stall
+            self.max_stall = max(self.max_stall, stall)
+            if stall >= self.warn_threshold:
+                self.stall_count += 1
+                if now - self._last_warn >= self.warn_interval:
+                    self._last_warn = now
+                    console_log(f"界面事件循环阻塞 {stall * 1000:.0f} ms", "WARN")
+        self._last_tick = now
+        self.ticks += 1
+
+    def reset(self):
+        self.max_stall = 0.0
+        self.last_stall = 0.0
+        self.stall_count = 0
+        self._last_tick = None
+
+    def get_stats(self):
+        return {
+            "max_ms": self.max_stall * 1000,
+            "last_ms": self.last_stall * 1000,
+            "stalls": self.stall_count,
+            "threshold_ms": self.warn_threshold * 1000,
+        }
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import threading
+import time
+
+from utils import console_log
+
+"""
+设备属性快照缓存。
+
+每台设备只执行一次 `cat boot_id; getprop`，解析为属性字典后缓存，
+型号、品牌、Android 版本等查询都从快照读取，不再为每个属性单独启动 adb。
+
+快照以 (transport_id, boot_id) 为键：设备重新连接后 adb 会分配新的 transport_id，
+查询时与设备注册表中的 transport_id 不一致即视为失效并重新获取。
+拿不到 transport_id 时无法确认仍是同一次连接，按未命中处理：只读取 boot_id，
+与快照一致则沿用快照，不一致说明设备已重启，丢弃快照并重新获取。
+"""
+
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+
+_PROP_LINE_RE = re.compile(r'^\[([^\]]+)\]:\s*\[(.*)\]$')
+
+
+def parse_getprop(output):
+    """把 getprop 输出解析为 {属性名: 值}，多行属性值只保留首行。"""
+    props = {}
+    for line in output.splitlines():
+        match = _PROP_LINE_RE.match(line.strip())
+        if match:
+            props[match.group(1)] = match.group(2)
+    return props
+
+
+class DevicePropsCache:
+    """按设备缓存 getprop 快照，并统计命中/未命中次数。"""
+
+    def __init__(self, controller, timeout=5):
+        self.controller = controller
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._device_locks = {}
+        self._lock = threading.Lock()
+
+    def _current_transport_id(self, device_id):
+        registry = getattr(self.controller, "device_registry", None)
+        record = registry.get(device_id) if registry is not None else None
+        return (record or {}).get("transport_id")
+
+    def _is_valid(self, entry, transport_id):
+        return entry is not None and transport_id is not None and entry["key"][0] == transport_id
+
+    def peek(self, device_id, transport_id=None):
+        """只读取缓存：快照有效时返回属性字典（计为命中），否则返回 None，不会执行 adb。"""
+        transport_id = transport_id or self._current_transport_id(device_id)
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if self._is_valid(entry, transport_id):
+                self.hits += 1
+                return entry["props"]
+        return None
+
+    def get(self, device_id, transport_id=None, timeout=None):
+        """返回设备属性字典，获取失败时返回空字典。
+
+        Args:
+            device_id (str): 设备ID
+            transport_id (str): 当前连接的 transport_id，为空时从设备注册表读取
+            timeout (float): 本次获取的超时秒数，默认使用构造时的 timeout
+        """
+        if not device_id:
+            return {}
+        transport_id = transport_id or self._current_transport_id(device_id)
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if self._is_valid(entry, transport_id):
+                self.hits += 1
+                return entry["props"]
+            device_lock = self._device_locks.setdefault(device_id, threading.Lock())
+
+        # 同一设备的并发查询只执行一次 getprop
+        with device_lock:
+            with self._lock:
+                entry = self._entries.get(device_id)
+                if self._is_valid(entry, transport_id):
+                    self.hits += 1
+                    return entry["props"]
+                self.misses += 1
+
+            if entry is not None and transport_id is None and entry["key"][1]:
+                if self.fetch_boot_id(device_id, timeout) == entry["key"][1]:
+                    return entry["props"]
+
+            boot_id, props = self.fetch(device_id, timeout)
+            if entry is not None and entry["key"][1] != boot_id:
+                # boot_id 不一致：设备已重启或无法确认，旧快照不再可信
+                self.invalidate(device_id)
+                if boot_id and entry["key"][1]:
+                    console_log(f"设备 {device_id} 已重启，属性缓存已刷新", "DEBUG")
+            if not props:
+                return {}
+            with self._lock:
+                self._entries[device_id] = {
+                    "key": (transport_id, boot_id),
+                    "props": props,
+                    "fetched_at": time.time(),
+                }
+            return props
+
+    def get_prop(self, device_id, name, default=""):
+        return self.get(device_id).get(name) or default
+
+    def fetch(self, device_id, timeout=None):
+        """直接读取 boot_id 与全部属性，返回 (boot_id, 属性字典)。"""
+        try:
+            result = self.controller._run_shell(
+                "cat", BOOT_ID_PATH, ";", "getprop", device_id=device_id, timeout=timeout or self.timeout
+            )
+        except Exception as e:
+            console_log(f"读取设备属性失败: {e}", "WARN")
+            return "", {}
+        output = result.stdout or ""
+        first_line = output.split("\n", 1)[0].strip()
+        boot_id = "" if first_line.startswith("[") else first_line
+        return boot_id, parse_getprop(output)
+
+    def fetch_boot_id(self, device_id, timeout=None):
+        """只读取 boot_id，失败时返回空字符串。"""
+        try:
+            result = self.controller._run_shell("cat", BOOT_ID_PATH, device_id=device_id,
+                                                timeout=timeout or self.timeout)
+        except Exception as e:
+            console_log(f"读取设备 boot_id 失败: {e}", "WARN")
+            return ""
+        return (result.stdout or "").strip()
+
+    def invalidate(self, device_id=None):
+        """使单台设备或全部设备的属性快照失效。"""
+        with self._lock:
+            if device_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(device_id, None)
+
+    def get_stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "devices": len(self._entries),
+            }
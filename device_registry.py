@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from usb_scheduler import parse_usb_location
+from utils import console_log
+
+"""
+进程内共享的设备注册表。
+
+所有服务（主界面、批量连接、应用管理器、群控、环境自检）都从这里读取设备快照：
+1. track-devices 监听在线时由监听器推送快照，不再执行 adb devices
+2. 监听离线时按需扫描，并发的相同扫描合并为一次 adb 调用，短时间内的重复请求直接复用结果
+3. 按状态、连接方式与 USB 总线维护索引，设备变化时通知监听者
+"""
+
+# 构建条目时的占位型号，增量快照中出现时保留之前已解析出的型号
+PLACEHOLDER_MODELS = ("未知设备", "离线设备", "未授权设备")
+
+
+def make_device_entry(device_id, status, attrs, model=""):
+    """把一行 `adb devices -l` 记录转换为统一的设备条目（同步与异步控制器共用）。
+
+    Args:
+        device_id (str): 设备ID
+        status (str): adb 报告的设备状态
+        attrs (dict): `devices -l` 附带的属性，如 model/product/usb/transport_id
+        model (str): 已解析出的型号，为空时使用 attrs 中的型号或按状态给出占位型号
+    """
+    attrs = attrs or {}
+    model = model or attrs.get("model", "")
+    transport = "wifi" if ":" in device_id else "usb"
+    usb_bus, usb_path = (None, None) if transport == "wifi" else parse_usb_location(attrs.get("usb"))
+    if status == "offline":
+        model = model or "离线设备"
+    elif status == "unauthorized":
+        model = model or "未授权设备"
+    return {
+        "device_id": device_id,
+        "status": status,
+        "model": model or "未知设备",
+        "transport": transport,
+        "transport_id": attrs.get("transport_id"),
+        "usb_bus": usb_bus,
+        "usb_path": usb_path,
+    }
+
+
+class DeviceRecord:
+    """单台设备的紧凑记录。"""
+
+    __slots__ = ("device_id", "status", "model", "transport", "transport_id", "usb_bus", "usb_path", "updated_at")
+
+    def __init__(self, device_id, status, model, transport, transport_id, usb_bus, usb_path, updated_at):
+        self.device_id = device_id
+        self.status = status
+        self.model = model
+        self.transport = transport
+        self.transport_id = transport_id
+        self.usb_bus = usb_bus
+        self.usb_path = usb_path
+        self.updated_at = updated_at
+
+    def as_entry(self):
+        return {
+            "device_id": self.device_id,
+            "status": self.status,
+            "model": self.model,
+            "transport": self.transport,
+            "transport_id": self.transport_id,
+            "usb_bus": self.usb_bus,
+            "usb_path": self.usb_path,
+        }
+
+
+class DeviceRegistry:
+    """设备记录、索引与扫描合并。"""
+
+    def __init__(self, scan_func=None, max_age=0.5):
+        self.max_age = max_age
+        self.live = False
+        self.scan_count = 0
+        self.coalesced_count = 0
+        self.last_scan_at = None
+        self.last_scan_cost = 0.0
+        self.last_source = None
+        self._scan_func = scan_func
+        self._records = {}
+        self._by_status = {}
+        self._by_transport = {}
+        self._by_bus = {}
+        self._listeners = []
+        # 异步解析出的型号在设备记录写入前到达时暂存于此
+        self._late_models = {}
+        self._inflight = None
+        self._lock = threading.Lock()
+
+    def bind_scanner(self, scan_func):
+        """设置扫描函数（返回设备条目列表），控制器重建时重新绑定。"""
+        self._scan_func = scan_func
+
+    def add_listener(self, callback):
+        """注册变化回调 callback(delta)，delta 含 added/removed/changed/source。"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def set_live(self, live):
+        """标记监听器是否在线，在线时查询直接返回快照。"""
+        self.live = bool(live)
+
+    def refresh(self, max_age=None):
+        """返回设备条目列表，必要时执行一次扫描。
+
+        监听在线或上次扫描未超过 max_age 秒时直接返回快照；
+        已有扫描进行中时等待其结果，不再重复调用 adb。
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            fresh = self.last_scan_at is not None and time.monotonic() - self.last_scan_at <= max_age
+            if self.live or fresh or self._scan_func is None:
+                return self._snapshot_locked()
+            inflight = self._inflight
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight = threading.Event()
+            else:
+                self.coalesced_count += 1
+
+        if not leader:
+            inflight.wait(30)
+            return self.snapshot()
+
+        try:
+            start_time = time.perf_counter()
+            entries = self._scan_func()
+            cost = time.perf_counter() - start_time
+            self.apply_snapshot(entries, source="poll", cost=cost)
+            console_log(f"设备扫描完成: {len(entries)} 台，耗时 {cost * 1000:.0f} ms", "DEBUG")
+        except Exception as e:
+            console_log(f"设备扫描出错: {e}", "ERROR")
+        finally:
+            with self._lock:
+                self._inflight = None
+            inflight.set()
+        return self.snapshot()
+
+    def apply_snapshot(self, entries, source="poll", cost=None):
+        """用一份完整的设备条目列表替换当前记录，返回变化增量。"""
+        now = time.monotonic()
+        with self._lock:
+            previous = self._records
+            records = {}
+            for entry in entries:
+                device_id = entry["device_id"]
+                status = entry.get("status", "device")
+                model = entry.get("model") or "未知设备"
+                old = previous.get(device_id)
+                if model in PLACEHOLDER_MODELS and status == "device" and device_id in self._late_models:
+                    model = self._late_models.pop(device_id)
+                elif (old is not None and old.status == status and model in PLACEHOLDER_MODELS
+                        and old.model not in PLACEHOLDER_MODELS):
+                    model = old.model
+                transport = entry.get("transport") or ("wifi" if ":" in device_id else "usb")
+                records[device_id] = DeviceRecord(
+                    device_id, status, model, transport, entry.get("transport_id"),
+                    entry.get("usb_bus"), entry.get("usb_path"), now,
+                )
+
+            added = [device_id for device_id in records if device_id not in previous]
+            removed = [device_id for device_id in previous if device_id not in records]
+            changed = [
+                device_id for device_id, record in records.items()
+                if device_id in previous and (previous[device_id].status, previous[device_id].model)
+                != (record.status, record.model)
+            ]
+
+            self._records = records
+            # 只保留仍在本次快照中、且尚未拿到型号的设备，已断开设备的暂存型号随之丢弃
+            self._late_models = {
+                device_id: model for device_id, model in self._late_models.items()
+                if device_id in records and records[device_id].model in PLACEHOLDER_MODELS
+            }
+            self._by_status = {}
+            self._by_transport = {}
+            self._by_bus = {}
+            for device_id, record in records.items():
+                self._by_status.setdefault(record.status, set()).add(device_id)
+                self._by_transport.setdefault(record.transport, set()).add(device_id)
+                if record.usb_bus is not None:
+                    self._by_bus.setdefault(record.usb_bus, set()).add(device_id)
+            self.last_source = source
+            if source == "poll":
+                self.scan_count += 1
+                self.last_scan_at = now
+                self.last_scan_cost = cost or 0.0
+            listeners = list(self._listeners)
+
+        delta = {"added": added, "removed": removed, "changed": changed, "source": source}
+        if added or removed or changed:
+            for callback in listeners:
+                try:
+                    callback(delta)
+                except Exception as e:
+                    console_log(f"设备变化回调出错: {e}", "ERROR")
+        return delta
+
+    def update_model(self, device_id, model):
+        """写入异步解析出的型号，型号变化时以 source="model" 通知监听者。"""
+        with self._lock:
+            record = self._records.get(device_id)
+            if record is None:
+                self._late_models[device_id] = model
+                return False
+            if record.model == model:
+                return False
+            record.model = model
+            record.updated_at = time.monotonic()
+            listeners = list(self._listeners)
+
+        delta = {"added": [], "removed": [], "changed": [device_id], "source": "model"}
+        for callback in listeners:
+            try:
+                callback(delta)
+            except Exception as e:
+                console_log(f"设备变化回调出错: {e}", "ERROR")
+        return True
+
+    def _snapshot_locked(self):
+        return [record.as_entry() for record in self._records.values()]
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot_locked()
+
+    def get(self, device_id):
+        with self._lock:
+            record = self._records.get(device_id)
+            return record.as_entry() if record else None
+
+    def entries(self, status=None, transport=None, usb_bus=None):
+        """按状态、连接方式和/或 USB 总线过滤设备条目，保持扫描顺序。"""
+        with self._lock:
+            ids = None
+            for index, value in ((self._by_status, status), (self._by_transport, transport),
+                                 (self._by_bus, usb_bus)):
+                if value is not None:
+                    matched = index.get(value, set())
+                    ids = matched if ids is None else ids & matched
+            return [
+                record.as_entry() for device_id, record in self._records.items()
+                if ids is None or device_id in ids
+            ]
+
+    def usb_bus_of(self, device_id):
+        """返回设备所在的 USB 总线，网络设备或未知设备返回 None。"""
+        with self._lock:
+            record = self._records.get(device_id)
+            return record.usb_bus if record else None
+
+    def usb_topology(self):
+        """返回 {总线: [设备ID, ...]}。"""
+        with self._lock:
+            return {bus: sorted(ids) for bus, ids in self._by_bus.items()}
+
+    def scan_info(self):
+        """返回扫描统计：次数、合并次数、上次耗时（毫秒）与距今秒数。"""
+        with self._lock:
+            return {
+                "live": self.live,
+                "source": self.last_source,
+                "scans": self.scan_count,
+                "coalesced": self.coalesced_count,
+                "cost_ms": self.last_scan_cost * 1000,
+                "age": (time.monotonic() - self.last_scan_at) if self.last_scan_at is not None else None,
+            }
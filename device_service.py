@@ -1,23 +1,88 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import weakref
+
 
 class DeviceService:
     """负责设备发现与设备列表控件同步。"""
 
     def __init__(self, controller):
         self.controller = controller
+        # 每个下拉框上次同步的行状态：快照哈希、行顺序、行文本与 device_id -> 行号索引
+        self._combo_states = weakref.WeakKeyDictionary()
+        # 启用 adb server 分片时，各分片监听器推送的设备条目 {端口: 条目列表}
+        self._shard_entries = {}
+
+    @property
+    def registry(self):
+        return getattr(self.controller, "device_registry", None)
+
+    @property
+    def tracked_devices(self):
+        """监听在线时返回注册表快照，否则返回 None。"""
+        registry = self.registry
+        if registry is not None and registry.live:
+            return registry.snapshot()
+        return None
+
+    def apply_device_delta(self, delta):
+        """把 track-devices 推送的设备增量写入共享注册表。
+
+        监听在线时后续列表查询直接读取注册表快照；
+        监听断开时注册表回退到按需扫描 adb devices。
+        启用分片时每个分片各有一个监听器，全部在线后才合并写入注册表。
+        """
+        registry = self.registry
+        port = delta.get("port")
+        if not delta.get("live"):
+            self._shard_entries.pop(port, None)
+            if registry is not None:
+                registry.set_live(False)
+            return []
+
+        build_entry = getattr(self.controller, "build_device_entry", None)
+        shards = getattr(self.controller, "shards", None)
+        entries = []
+        for device_id, status, attrs in delta.get("devices", []):
+            # 分片 server 只承载网络设备，USB 设备以主 server 的记录为准
+            if shards is not None and port is not None and not shards.accepts(device_id, port):
+                continue
+            if build_entry:
+                entry = build_entry(device_id, status, attrs)
+            else:
+                entry = {
+                    "device_id": device_id,
+                    "status": status,
+                    "model": attrs.get("model") or "未知设备",
+                    "transport": "wifi" if ":" in device_id else "usb",
+                }
+            entries.append(entry)
+        self._shard_entries[port] = entries
+        if registry is None:
+            return entries
+        if shards is not None and shards.enabled:
+            if any(shard_port not in self._shard_entries for shard_port in shards.active_ports):
+                return entries
+            entries = [entry for shard_port in shards.active_ports for entry in self._shard_entries[shard_port]]
+        # 注册表会为缺少型号的条目保留之前解析出的型号
+        registry.apply_snapshot(entries, source="track")
+        registry.set_live(True)
+        return registry.snapshot()
 
     def list_devices(self):
         """获取设备列表。"""
         return self.controller.get_devices()
 
-    def list_device_entries(self, active_device_ids=None, last_connected_device_id=None):
-        """获取带状态与展示文本的设备条目。"""
+    def list_device_entries(self, active_device_ids=None, last_connected_device_id=None, raw_devices=None):
+        """获取带状态与展示文本的设备条目。
+
+        raw_devices 为后台扫描得到的设备条目，传入时不再查询控制器。
+        """
         active_device_ids = set(active_device_ids or [])
-        if hasattr(self.controller, "get_device_statuses"):
+        if raw_devices is None and hasattr(self.controller, "get_device_statuses"):
             raw_devices = self.controller.get_device_statuses()
-        else:
+        elif raw_devices is None:
             raw_devices = [
                 {
                     "device_id": device_id,
@@ -57,38 +122,99 @@ class DeviceService:
                 "model": model,
                 "transport": transport,
                 "display_text": display_text,
+                "active": device_id in active_device_ids,
+                "last_connected": device_id == last_connected_device_id,
             })
         return entries
 
     def sync_device_widgets(self, primary_combo, secondary_combo=None, preferred_device_id=None,
-                            active_device_ids=None, last_connected_device_id=None):
-        """同步一个或两个设备下拉框，并恢复优先设备选择。"""
+                            active_device_ids=None, last_connected_device_id=None, raw_devices=None,
+                            row_styler=None):
+        """同步一个或两个设备下拉框，并恢复优先设备选择。
+
+        按 device_id 对比上次同步的行，只插入、删除或更新变化的行；
+        快照未变化时不做任何控件操作。row_styler(combo, row, item) 只对新增或文本变化的行调用。
+        """
         devices = self.list_device_entries(
             active_device_ids=active_device_ids,
             last_connected_device_id=last_connected_device_id,
+            raw_devices=raw_devices,
         )
+        snapshot_hash = hash(tuple((item["device_id"], item["display_text"]) for item in devices))
 
-        primary_combo.clear()
+        changed = self._diff_combo(primary_combo, devices, snapshot_hash, row_styler)
         if secondary_combo is not None:
-            secondary_combo.clear()
-
-        for item in devices:
-            primary_combo.addItem(item["display_text"], item["device_id"])
-            if secondary_combo is not None:
-                secondary_combo.addItem(item["display_text"], item["device_id"])
+            changed = self._diff_combo(secondary_combo, devices, snapshot_hash, row_styler) or changed
+        if not changed:
+            return devices, primary_combo.currentData()
 
         selected_id = self._restore_selection(primary_combo, secondary_combo, preferred_device_id)
         return devices, selected_id
 
+    def _diff_combo(self, combo, devices, snapshot_hash, row_styler=None):
+        """把下拉框的行更新为 devices 的顺序，返回是否有改动。"""
+        state = self._combo_states.get(combo)
+        if state is not None and combo.count() == len(state["ids"]):
+            if state["hash"] == snapshot_hash:
+                return False
+            ids, texts = list(state["ids"]), list(state["texts"])
+        else:
+            # 首次同步或控件被外部清空/修改过，按控件当前内容重建
+            ids = [combo.itemData(row) for row in range(combo.count())]
+            texts = [combo.itemText(row) for row in range(combo.count())]
+
+        wanted = {item["device_id"] for item in devices}
+        for row in range(len(ids) - 1, -1, -1):
+            if ids[row] not in wanted:
+                combo.removeItem(row)
+                del ids[row]
+                del texts[row]
+
+        for row, item in enumerate(devices):
+            device_id = item["device_id"]
+            text = item["display_text"]
+            if row < len(ids) and ids[row] == device_id:
+                if texts[row] != text:
+                    combo.setItemText(row, text)
+                    texts[row] = text
+                    if row_styler:
+                        row_styler(combo, row, item)
+                continue
+            if device_id in ids:
+                # 顺序变化（很少发生），把原有行移到当前位置
+                old_row = ids.index(device_id)
+                combo.removeItem(old_row)
+                del ids[old_row]
+                del texts[old_row]
+            combo.insertItem(row, text, device_id)
+            ids.insert(row, device_id)
+            texts.insert(row, text)
+            if row_styler:
+                row_styler(combo, row, item)
+
+        self._combo_states[combo] = {
+            "hash": snapshot_hash,
+            "ids": ids,
+            "texts": texts,
+            "rows": {device_id: row for row, device_id in enumerate(ids)},
+        }
+        return True
+
+    def _find_row(self, combo, device_id):
+        state = self._combo_states.get(combo)
+        if state is not None and combo.count() == len(state["ids"]):
+            return state["rows"].get(device_id, -1)
+        return combo.findData(device_id)
+
     def _restore_selection(self, primary_combo, secondary_combo=None, preferred_device_id=None):
         """根据优先设备恢复选中项。"""
         if preferred_device_id:
-            for index in range(primary_combo.count()):
-                if primary_combo.itemData(index) == preferred_device_id:
-                    primary_combo.setCurrentIndex(index)
-                    if secondary_combo is not None:
-                        secondary_combo.setCurrentIndex(index)
-                    return preferred_device_id
+            row = self._find_row(primary_combo, preferred_device_id)
+            if row >= 0:
+                primary_combo.setCurrentIndex(row)
+                if secondary_combo is not None:
+                    secondary_combo.setCurrentIndex(row)
+                return preferred_device_id
 
         if primary_combo.count() > 0:
             primary_combo.setCurrentIndex(0)
@@ -96,4 +222,4 @@ class DeviceService:
                 secondary_combo.setCurrentIndex(0)
             return primary_combo.currentData()
 
-        return None
\ No newline at end of file
+        return None
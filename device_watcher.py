@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+
+from adb_client import AdbClient, AdbProtocolError, DEFAULT_ADB_HOST, DEFAULT_ADB_PORT
+from utils import console_log
+
+
+class DeviceTrackWatcher:
+    """基于 host:track-devices-l 长连接的设备变化监听器。
+
+    后台线程持有一条到 adb server 的连接，每当设备插拔或状态变化时
+    计算增量并通过 on_delta 回调推送。回调在监听线程中执行，
+    GUI 侧需要自行切换回主线程（例如通过 Qt 信号）。
+    """
+
+    def __init__(self, on_delta, host=DEFAULT_ADB_HOST, port=DEFAULT_ADB_PORT,
+                 reconnect_delays=(0.5, 1.0, 2.0, 5.0)):
+        self.on_delta = on_delta
+        self.client = AdbClient(host=host, port=port)
+        self.reconnect_delays = tuple(reconnect_delays) or (1.0,)
+        self.is_live = False
+        self._devices = {}
+        self._socket = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动监听线程，重复调用无副作用。"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="adb-track-devices", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """停止监听并关闭长连接。"""
+        self._stop_event.set()
+        self._close_socket()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _close_socket(self):
+        with self._lock:
+            sock, self._socket = self._socket, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _run(self):
+        attempt = 0
+        while not self._stop_event.is_set():
+            try:
+                sock = self.client.open_connection()
+                with self._lock:
+                    self._socket = sock
+                for devices in self.client.track_devices(sock):
+                    if self._stop_event.is_set():
+                        break
+                    attempt = 0
+                    self._publish(devices)
+            except (AdbProtocolError, OSError) as e:
+                if not self._stop_event.is_set() and attempt == 0:
+                    console_log(f"设备监听连接中断，将回退到轮询: {e}", "WARN")
+            finally:
+                self._close_socket()
+
+            if self._stop_event.is_set():
+                break
+            self._set_offline()
+            delay = self.reconnect_delays[min(attempt, len(self.reconnect_delays) - 1)]
+            attempt += 1
+            self._stop_event.wait(delay)
+
+        self._set_offline()
+
+    def _publish(self, devices):
+        """与上一份快照对比，推送增量。"""
+        current = {device_id: (status, attrs) for device_id, status, attrs in devices}
+        previous = self._devices
+        added = [device_id for device_id in current if device_id not in previous]
+        removed = [device_id for device_id in previous if device_id not in current]
+        changed = [
+            device_id for device_id in current
+            if device_id in previous and previous[device_id] != current[device_id]
+        ]
+        first_snapshot = not self.is_live
+        self._devices = current
+        self.is_live = True
+
+        if not (added or removed or changed or first_snapshot):
+            return
+        self._emit({
+            "port": self.client.port,
+            "live": True,
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+            "devices": devices,
+        })
+
+    def _set_offline(self):
+        if not self.is_live:
+            return
+        self.is_live = False
+        self._devices = {}
+        self._emit({"port": self.client.port, "live": False, "added": [], "removed": [], "changed": [], "devices": []})
+
+    def _emit(self, delta):
+        try:
+            self.on_delta(delta)
+        except Exception as e:
+            console_log(f"推送设备变化时出错: {e}", "ERROR")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from utils import console_log
+
+"""
+群控会话内的设备几何信息缓存。
+
+缓存每台设备的屏幕尺寸、密度与旋转方向，群控同步事件直接读取缓存，
+不再为每次点击重复执行 wm size / dumpsys input。
+后台探测线程定期检查旋转方向，方向变化时使对应条目失效，下次使用时重新获取。
+"""
+
+
+class GeometryCache:
+    """按设备缓存 {size, density, rotation, orientation}。"""
+
+    def __init__(self, controller, probe_interval=2.0):
+        self.controller = controller
+        self.probe_interval = probe_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._probe_thread = None
+
+    @property
+    def active(self):
+        """探测线程运行中才认为缓存可信。"""
+        return self._probe_thread is not None and self._probe_thread.is_alive()
+
+    def get(self, device_id, max_age=None):
+        """返回缓存条目，不存在或超过 max_age 秒时现场获取并写入缓存；获取尺寸失败返回 None。"""
+        with self._lock:
+            entry = self._entries.get(device_id)
+        if entry is not None and (max_age is None or time.time() - entry["fetched_at"] <= max_age):
+            return entry
+        entry = self.fetch(device_id)
+        if entry is not None:
+            with self._lock:
+                self._entries[device_id] = entry
+        return entry
+
+    def fetch(self, device_id):
+        """直接从设备读取几何信息（不经过缓存）。"""
+        size = self.controller.get_screen_size(device_id)
+        if not size:
+            return None
+        rotation = self.controller.get_screen_rotation(device_id)
+        if rotation is None:
+            orientation = "landscape" if size[0] > size[1] else "portrait"
+        else:
+            orientation = "landscape" if rotation in (1, 3) else "portrait"
+        return {
+            "size": size,
+            "density": self.controller.get_screen_density(device_id),
+            "rotation": rotation,
+            "orientation": orientation,
+            "fetched_at": time.time(),
+        }
+
+    def invalidate(self, device_id=None):
+        """使单台设备或全部设备的缓存失效。"""
+        with self._lock:
+            if device_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(device_id, None)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._entries)
+
+    def start(self, device_ids):
+        """预热指定设备并启动旋转探测，返回成功缓存的设备数。"""
+        self.stop()
+        self.invalidate()
+        for device_id in device_ids:
+            self.get(device_id)
+        self._stop_event.clear()
+        self._probe_thread = threading.Thread(target=self._probe_loop, name="geometry-probe", daemon=True)
+        self._probe_thread.start()
+        return len(self._entries)
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        thread, self._probe_thread = self._probe_thread, None
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _probe_loop(self):
+        while not self._stop_event.wait(self.probe_interval):
+            for device_id, entry in self.snapshot().items():
+                if self._stop_event.is_set():
+                    break
+                try:
+                    rotation = self.controller.get_screen_rotation(device_id)
+                except Exception as e:
+                    console_log(f"探测设备 {device_id} 旋转方向失败: {e}", "WARN")
+                    continue
+                if rotation is not None and rotation != entry["rotation"]:
+                    console_log(f"设备 {device_id} 旋转方向变化 {entry['rotation']} -> {rotation}，几何缓存已失效")
+                    self.invalidate(device_id)
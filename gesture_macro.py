@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import platform
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from coordinate_mapper import CoordinateMapper
+from utils import console_log
+
+"""
+手势宏录制与并行回放。
+
+录制：在主设备上运行 `getevent -lt`，把单指触摸归类为 tap / long / swipe，
+把物理按键记录为 key，事件以相对开始时间（毫秒）保存在紧凑的 JSON 宏文件中。
+回放：按目标设备预先计算全部坐标（一次批量映射），每台设备一个线程按时间轴准时下发，
+并统计每台设备实际下发时间相对计划时间的漂移。
+"""
+
+MACRO_VERSION = 1
+
+# 位移小于该像素数视为点击/长按
+TAP_SLOP_PX = 20
+# 超过该时长的静止触摸视为长按（毫秒）
+LONG_PRESS_MS = 400
+
+# getevent 按键名到 Android KeyEvent 键码
+KEY_NAME_TO_KEYCODE = {
+    "KEY_HOME": 3,
+    "KEY_HOMEPAGE": 3,
+    "KEY_BACK": 4,
+    "KEY_VOLUMEUP": 24,
+    "KEY_VOLUMEDOWN": 25,
+    "KEY_POWER": 26,
+    "KEY_MENU": 82,
+    "KEY_APPSELECT": 187,
+}
+
+_EVENT_LINE = re.compile(r"\[\s*([\d.]+)\]\s+(\S+):\s+(\S+)\s+(\S+)\s+(\S+)")
+_DEVICE_LINE = re.compile(r"add device \d+:\s+(\S+)")
+_AXIS_LINE = re.compile(r"(ABS_MT_POSITION_[XY])\s*:.*?max (\d+)")
+
+
+def parse_axis_ranges(text):
+    """解析 `getevent -lp` 输出，返回 {输入设备节点: (x 最大值, y 最大值)}。"""
+    ranges = {}
+    current = None
+    for line in (text or "").splitlines():
+        device_match = _DEVICE_LINE.search(line)
+        if device_match:
+            current = device_match.group(1)
+            continue
+        axis_match = _AXIS_LINE.search(line)
+        if axis_match and current:
+            x_max, y_max = ranges.get(current, (None, None))
+            if axis_match.group(1).endswith("X"):
+                x_max = int(axis_match.group(2))
+            else:
+                y_max = int(axis_match.group(2))
+            ranges[current] = (x_max, y_max)
+    return ranges
+
+
+def save_macro(macro, path):
+    """以紧凑 JSON 保存宏。"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(macro, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_macro(path):
+    """读取宏文件，版本不兼容时抛出 ValueError。"""
+    with open(path, "r", encoding="utf-8") as f:
+        macro = json.load(f)
+    if macro.get("version") != MACRO_VERSION:
+        raise ValueError(f"不支持的宏版本: {macro.get('version')}")
+    return macro
+
+
+class GestureMacroRecorder:
+    """在主设备上录制触摸与按键事件。"""
+
+    def __init__(self, controller, device_id):
+        self.controller = controller
+        self.device_id = device_id
+        self.events = []
+        self.geometry = None
+        self.process = None
+        self._axis_ranges = {}
+        self._reader = None
+        self._start_ts = None
+        self._touch = None
+        self._slot = 0
+        self._pending = {}
+
+    def start(self):
+        """开始录制，返回 (成功, 消息)。"""
+        self.geometry = self.controller.geometry_cache.fetch(self.device_id)
+        if not self.geometry:
+            return False, "无法获取设备屏幕尺寸"
+
+        result = self.controller._run_adb("shell", "getevent", "-lp", device_id=self.device_id, timeout=5)
+        self._axis_ranges = parse_axis_ranges(result.stdout)
+
+        kwargs = {}
+        if platform.system() == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        try:
+            self.process = subprocess.Popen(
+                self.controller._adb_command("shell", "getevent", "-lt", device_id=self.device_id),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="ignore",
+                **kwargs
+            )
+        except OSError as e:
+            return False, f"启动 getevent 失败: {e}"
+
+        self.events = []
+        self._start_ts = None
+        self._touch = None
+        self._reader = threading.Thread(target=self._read_events, name="macro-recorder", daemon=True)
+        self._reader.start()
+        console_log(f"开始录制设备 {self.device_id} 的手势")
+        return True, "录制已开始"
+
+    def stop(self):
+        """停止录制并返回宏字典。"""
+        process, self.process = self.process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self._reader:
+            self._reader.join(timeout=2)
+        # 触摸在抬起时才写入、按键在按下时写入，两者交错时需按开始时间重新排序
+        self.events.sort(key=lambda event: event["t"])
+        console_log(f"录制结束，共 {len(self.events)} 个事件")
+        return {
+            "version": MACRO_VERSION,
+            "source": {
+                "device_id": self.device_id,
+                "size": list(self.geometry["size"]),
+                "rotation": self.geometry["rotation"] or 0,
+            },
+            "events": list(self.events),
+        }
+
+    def _read_events(self):
+        for line in iter(self.process.stdout.readline, ""):
+            self.feed_line(line)
+
+    def feed_line(self, line):
+        """解析一行 `getevent -lt` 输出。"""
+        match = _EVENT_LINE.search(line)
+        if match:
+            self._handle_event(float(match.group(1)), match.group(2), match.group(3), match.group(4), match.group(5))
+
+    def _offset_ms(self, timestamp):
+        return round((timestamp - self._start_ts) * 1000)
+
+    def _to_display(self, node, raw_x, raw_y):
+        """把触摸屏原始坐标换算为当前显示方向下的像素坐标。"""
+        natural_width, natural_height = self.geometry["size"]
+        x_max, y_max = self._axis_ranges.get(node, (None, None))
+        x = raw_x * natural_width / (x_max + 1) if x_max else raw_x
+        y = raw_y * natural_height / (y_max + 1) if y_max else raw_y
+        rotation = self.geometry["rotation"] or 0
+        if rotation == 1:
+            return y, natural_width - x
+        if rotation == 2:
+            return natural_width - x, natural_height - y
+        if rotation == 3:
+            return natural_height - y, x
+        return x, y
+
+    def _handle_event(self, timestamp, node, ev_type, code, value):
+        # 时间轴从第一个输入事件开始，无论它是触摸还是按键
+        if self._start_ts is None and ev_type in ("EV_KEY", "EV_ABS"):
+            self._start_ts = timestamp
+        if ev_type == "EV_KEY":
+            keycode = KEY_NAME_TO_KEYCODE.get(code)
+            if keycode is not None and value == "DOWN":
+                self.events.append({"t": self._offset_ms(timestamp), "type": "key", "keycode": keycode})
+            return
+
+        if ev_type == "EV_ABS":
+            if code == "ABS_MT_SLOT":
+                self._slot = int(value, 16)
+                return
+            # 只跟踪第一根手指
+            if self._slot != 0:
+                return
+            if code == "ABS_MT_TRACKING_ID":
+                self._pending["lift" if value == "ffffffff" else "down"] = True
+            elif code == "ABS_MT_POSITION_X":
+                self._pending["x"] = int(value, 16)
+            elif code == "ABS_MT_POSITION_Y":
+                self._pending["y"] = int(value, 16)
+            return
+
+        if ev_type == "EV_SYN" and code == "SYN_REPORT":
+            pending, self._pending = self._pending, {}
+            if pending.get("down") and self._touch is None:
+                self._touch = {"start": timestamp, "node": node, "raw": [None, None], "points": []}
+            if self._touch is None:
+                return
+            if "x" in pending:
+                self._touch["raw"][0] = pending["x"]
+            if "y" in pending:
+                self._touch["raw"][1] = pending["y"]
+            if None not in self._touch["raw"]:
+                self._touch["points"].append(self._to_display(node, *self._touch["raw"]))
+            if pending.get("lift"):
+                self._finish_touch(timestamp)
+
+    def _finish_touch(self, timestamp):
+        touch, self._touch = self._touch, None
+        if not touch["points"]:
+            return
+        duration = round((timestamp - touch["start"]) * 1000)
+        start = touch["points"][0]
+        end = touch["points"][-1]
+        moved = max(abs(px - start[0]) + abs(py - start[1]) for px, py in touch["points"])
+        event = {"t": self._offset_ms(touch["start"]), "duration": duration}
+        if moved < TAP_SLOP_PX:
+            event["type"] = "long" if duration >= LONG_PRESS_MS else "tap"
+            event["points"] = [[round(start[0]), round(start[1])]]
+        else:
+            event["type"] = "swipe"
+            event["points"] = [[round(start[0]), round(start[1])], [round(end[0]), round(end[1])]]
+        self.events.append(event)
+
+
+def replay_macro(controller, macro, device_ids, speed=1.0, max_workers=None, lead_time=0.3):
+    """在多台设备上按时间轴并行回放宏。
+
+    Args:
+        controller: ScrcpyController 实例
+        macro (dict): load_macro / GestureMacroRecorder.stop 返回的宏
+        device_ids (list): 目标设备ID列表
+        speed (float): 回放倍速
+        max_workers (int): 最大并发设备数，默认全部设备同时回放
+        lead_time (float): 预计算完成后到第一个事件的准备时间（秒）
+
+    Returns:
+        dict: {设备ID: {events, failed, avg_drift_ms, max_drift_ms}}，drift 为实际下发相对计划时间的延迟
+    """
+    events = macro.get("events") or []
+    if not events or not device_ids:
+        return {}
+
+    source = macro["source"]
+    source_geometry = {
+        "size": tuple(source["size"]),
+        "rotation": source.get("rotation", 0),
+        "orientation": "landscape" if source.get("rotation", 0) in (1, 3) else "portrait",
+    }
+
+    workers = max(1, min(max_workers or len(device_ids), len(device_ids)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="macro-geometry") as executor:
+        geometries = dict(zip(device_ids, executor.map(controller.geometry_cache.fetch, device_ids)))
+    report = {
+        device_id: {"events": len(events), "failed": len(events), "avg_drift_ms": 0.0, "max_drift_ms": 0.0, "error": "无法获取屏幕尺寸"}
+        for device_id, geometry in geometries.items() if not geometry
+    }
+    available = {device_id: geometry for device_id, geometry in geometries.items() if geometry}
+
+    # 所有事件的坐标一次性映射到所有设备
+    points = [tuple(point) for event in events for point in event.get("points", [])]
+    mapped = CoordinateMapper.from_geometry(source_geometry, available).map_points(points)
+    plans = {}
+    for device_id, device_points in mapped.items():
+        plan = []
+        index = 0
+        for event in events:
+            count = len(event.get("points", []))
+            plan.append((event, device_points[index:index + count]))
+            index += count
+        plans[device_id] = plan
+
+    start_at = time.perf_counter() + lead_time
+
+    def run_device(device_id):
+        drifts = []
+        failed = 0
+        for event, device_points in plans[device_id]:
+            scheduled = start_at + event["t"] / 1000 / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            drifts.append((time.perf_counter() - scheduled) * 1000)
+            duration = int(event.get("duration", 0) / speed) or None
+            if event["type"] == "key":
+                ok = controller.send_key_event(device_id, event["keycode"])
+            elif event["type"] == "swipe":
+                (x1, y1), (x2, y2) = device_points
+                ok = controller.send_touch_event(device_id, (x1, y1, x2, y2), None, "swipe", duration=duration)
+            else:
+                x, y = device_points[0]
+                ok = controller.send_touch_event(device_id, x, y, event["type"], duration=duration)
+            failed += 0 if ok else 1
+        return {
+            "events": len(drifts),
+            "failed": failed,
+            "avg_drift_ms": sum(drifts) / len(drifts) if drifts else 0.0,
+            "max_drift_ms": max(drifts) if drifts else 0.0,
+        }
+
+    console_log(f"开始在 {len(plans)} 台设备上回放 {len(events)} 个宏事件")
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(plans) or 1)), thread_name_prefix="macro-replay") as executor:
+        futures = {device_id: executor.submit(run_device, device_id) for device_id in plans}
+        for device_id, future in futures.items():
+            try:
+                report[device_id] = future.result()
+            except Exception as e:
+                report[device_id] = {"events": len(events), "failed": len(events), "avg_drift_ms": 0.0, "max_drift_ms": 0.0, "error": str(e)}
+                console_log(f"设备 {device_id} 回放宏出错: {e}", "ERROR")
+
+    for device_id, item in report.items():
+        console_log(
+            f"设备 {device_id} 回放完成: {item['events'] - item['failed']}/{len(events)} 成功，"
+            f"平均漂移 {item['avg_drift_ms']:.1f} ms，最大漂移 {item['max_drift_ms']:.1f} ms"
+        )
+    return report
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import time
+
+from PyQt5.QtCore import QProcess, QTimer
+
+from utils import console_log
+
+"""
+限速分批启动 scrcpy。
+
+批量连接时所有设备同时推送 scrcpy-server、启动编码器并打开窗口，会造成 CPU 与 USB 峰值，
+部分设备因此启动超时。LaunchPipeline 限制同时处于启动阶段的进程数：
+1. 进程输出中出现设备信息（Device:/Renderer:/Texture:）视为就绪
+2. 超过就绪超时仍无输出时同样放行，避免单台设备卡住整批
+3. 进程在就绪前退出，或无法启动/崩溃（errorOccurred）记为失败
+前一个名额释放后才启动下一台，最后汇总每台设备的就绪耗时与整批耗时。
+"""
+
+READY_PATTERN = re.compile(r'Device:|Renderer:|Texture:')
+
+
+class LaunchPipeline:
+    """按并发上限与就绪门控依次启动设备进程（在 Qt 主线程中使用）。"""
+
+    def __init__(self, log=None, max_concurrent=2, ready_timeout=8.0):
+        """
+        Args:
+            log (callable): 日志输出函数，默认输出到控制台
+            max_concurrent (int): 同时处于启动阶段的进程数
+            ready_timeout (float): 单台设备等待就绪的最长秒数
+        """
+        self.log = log or console_log
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.ready_timeout = ready_timeout
+        self.results = {}
+        self._queue = []
+        self._starting = {}
+        self._on_finished = None
+        self._batch_started_at = None
+
+    @property
+    def running(self):
+        return bool(self._queue or self._starting)
+
+    def start(self, jobs, on_finished=None):
+        """开始一批启动任务。
+
+        Args:
+            jobs (list): [(device_id, label, launch)]，launch() 启动进程并返回 QProcess，失败返回 None
+            on_finished (callable): on_finished(results, total_seconds)，整批完成后调用
+        """
+        self._queue = list(jobs)
+        self._starting = {}
+        self.results = {}
+        self._on_finished = on_finished
+        self._batch_started_at = time.monotonic()
+        self._pump()
+
+    def cancel(self):
+        """放弃尚未启动的任务，已启动的进程不受影响。"""
+        self._queue = []
+        for device_id, state in list(self._starting.items()):
+            state["timer"].stop()
+            self._settle(device_id, "cancelled", pump=False)
+        self._finish_if_done()
+
+    def observe_output(self, device_id, text):
+        """由进程输出处理函数调用，输出中出现设备信息时放行该设备。"""
+        if device_id in self._starting and READY_PATTERN.search(text or ""):
+            self._settle(device_id, "ready")
+
+    def _pump(self):
+        while self._queue and len(self._starting) < self.max_concurrent:
+            device_id, label, launch = self._queue.pop(0)
+            started_at = time.monotonic()
+            try:
+                process = launch()
+            except Exception as e:
+                self.log(f"启动设备 {label} 失败: {e}")
+                process = None
+            if process is None:
+                self.results[device_id] = {"label": label, "status": "failed", "seconds": 0.0}
+                continue
+
+            timer = QTimer()
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda dev=device_id: self._settle(dev, "timeout"))
+            timer.start(int(self.ready_timeout * 1000))
+            self._starting[device_id] = {
+                "label": label,
+                "started_at": started_at,
+                "timer": timer,
+                "process": process,
+            }
+            process.finished.connect(lambda _code, _status, dev=device_id: self._settle(dev, "exited"))
+            # 启动失败时 QProcess 只发出 errorOccurred、不会发出 finished，需要立即释放名额
+            process.errorOccurred.connect(
+                lambda error, dev=device_id: self._settle(dev, "failed")
+                if error in (QProcess.FailedToStart, QProcess.Crashed) else None
+            )
+            if process.state() == QProcess.NotRunning:
+                self._settle(device_id, "exited", pump=False)
+        self._finish_if_done()
+
+    def _settle(self, device_id, status, pump=True):
+        state = self._starting.pop(device_id, None)
+        if state is None:
+            return
+        state["timer"].stop()
+        seconds = time.monotonic() - state["started_at"]
+        self.results[device_id] = {"label": state["label"], "status": status, "seconds": seconds}
+        if status == "ready":
+            self.log(f"设备 {state['label']} 已就绪，耗时 {seconds:.1f} 秒")
+        elif status == "timeout":
+            self.log(f"设备 {state['label']} {seconds:.1f} 秒内未报告就绪，继续启动下一台")
+        elif status == "exited":
+            self.log(f"设备 {state['label']} 在就绪前退出")
+        elif status == "failed":
+            self.log(f"设备 {state['label']} 启动失败: {state['process'].errorString()}")
+        if pump:
+            self._pump()
+
+    def _finish_if_done(self):
+        if self.running or self._batch_started_at is None:
+            return
+        total = time.monotonic() - self._batch_started_at
+        self._batch_started_at = None
+        ready = [item for item in self.results.values() if item["status"] == "ready"]
+        summary = f"批量启动完成: {len(ready)}/{len(self.results)} 台就绪，总耗时 {total:.1f} 秒"
+        if ready:
+            summary += f"，平均就绪 {sum(item['seconds'] for item in ready) / len(ready):.1f} 秒"
+        self.log(summary)
+        callback, self._on_finished = self._on_finished, None
+        if callback:
+            callback(dict(self.results), total)
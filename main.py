@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 
 import html
+import math
+import time
 import sys
 import os
 import subprocess
@@ -12,15 +14,20 @@ from PyQt5.QtWidgets import (
     QComboBox, QPushButton, QLineEdit, QFileDialog, QMessageBox, QTextEdit,
     QAction, QCheckBox, QGroupBox, QGridLayout, QDialog
 )
-from PyQt5.QtCore import Qt, QProcess, QTimer
+from PyQt5.QtCore import Qt, QProcess, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QPalette, QColor
 
+from batch_connect_service import BatchConnectService
 from command_service import ScrcpyCommandService
 from config_service import ConfigService
+from device_discovery import DeviceDiscoveryWorker, EventLoopStallMonitor
 from device_service import DeviceService
+from device_watcher import DeviceTrackWatcher
 from process_manager import ProcessManager
+from process_telemetry import ProcessTelemetry
 from screenshot_service import ScreenshotService
 from scrcpy_controller import ScrcpyController
+from stream_stats import StreamStatsParser, sparkline
 from runtime_helpers import (
     check_command_available,
     find_adb_path as resolve_adb_path,
@@ -28,6 +35,7 @@ from runtime_helpers import (
 )
 from ui_support_service import UISupportService
 from utils import console_log, decode_process_output, open_path
+from window_readiness import WindowReadinessTracker
 from wifi_service import WifiConnectionService
 
 APP_VERSION = "v1.0.1"
@@ -47,11 +55,19 @@ def get_app_base_dir():
     return os.path.dirname(os.path.abspath(__file__))
 
 class ScrcpyUI(QMainWindow):
+    # track-devices 监听线程推送的设备增量，经信号切回主线程处理
+    device_delta_received = pyqtSignal(object)
+    # 后台设备扫描结果，经信号切回主线程更新列表
+    device_scan_finished = pyqtSignal(object)
+    # 后台解析出设备型号后刷新列表
+    device_models_resolved = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.config_path = os.path.join(get_app_base_dir(), "scrcpy_config.json")
         self.config_service = ConfigService(self.config_path)
         self.runtime_path_overrides = self.config_service.load_runtime_paths()
+        self.adb_shard_count = self.config_service.load_adb_shard_count()
         self.adb_resolution = {}
         self.scrcpy_resolution = {}
         self.process = QProcess()
@@ -74,6 +90,15 @@ class ScrcpyUI(QMainWindow):
         self._suspend_ui_reactions = False
         self.screenshot_dir = ""
         self.record_outputs = {}
+        # 批量连接时同时启动的设备数与单台设备等待就绪的秒数
+        self.launch_concurrency = 2
+        self.launch_ready_timeout = 8.0
+        # 主机 CPU/内存占用（%）达到预算时拒绝启动新的投屏，0 表示不限制
+        self.host_cpu_budget = 90.0
+        self.host_mem_budget = 90.0
+        # 批量连接预算模式：本批设备共享的总码率（Mbps）与总像素速率（百万像素/秒）
+        self.budget_total_mbps = 160.0
+        self.budget_pixel_rate_mpx = 600.0
 
         self.process_manager = ProcessManager(self)
         self.device_processes = self.process_manager.device_processes
@@ -93,12 +118,53 @@ class ScrcpyUI(QMainWindow):
         self.log_entries = []
         
         # 创建控制器
-        self.controller = ScrcpyController(adb_path=self.adb_path, scrcpy_path=self.scrcpy_path)
+        self.controller = ScrcpyController(
+            adb_path=self.adb_path, scrcpy_path=self.scrcpy_path, adb_shards=self.adb_shard_count
+        )
         self.device_service = DeviceService(self.controller)
         self.command_service = ScrcpyCommandService()
         self.wifi_service = WifiConnectionService(self, self.adb_path, self.process_manager)
         self.screenshot_service = ScreenshotService(self, self.controller)
+        self.batch_connect_service = BatchConnectService(self)
+        self.window_tracker = WindowReadinessTracker(
+            self._enumerate_visible_windows if os.name == "nt" else None, log=self.log
+        )
         self.event_monitor = None  # 事件监控器
+        self.device_watcher = DeviceTrackWatcher(self.device_delta_received.emit)
+        # 其余 adb server 分片各自一个监听器
+        self.shard_watchers = [
+            DeviceTrackWatcher(self.device_delta_received.emit, port=port)
+            for port in self.controller.shards.ports[1:]
+        ]
+        self.device_delta_received.connect(self._handle_device_delta)
+        self.discovery_worker = DeviceDiscoveryWorker(
+            lambda max_age: self.controller.get_device_statuses(max_age),
+            self.device_scan_finished.emit,
+        )
+        self.device_scan_finished.connect(self._apply_device_scan)
+        self.device_models_resolved.connect(lambda: self.check_devices(False))
+        self.controller.device_registry.add_listener(self._on_registry_change)
+        self.stall_monitor = EventLoopStallMonitor()
+        self.stall_timer = QTimer()
+        self.stall_timer.timeout.connect(self.stall_monitor.tick)
+        self.stall_timer.start(int(self.stall_monitor.interval * 1000))
+        # 所有投屏进程共用一个资源采样定时器
+        self.telemetry = ProcessTelemetry()
+        self._resource_panel = None
+        self.stream_stats = StreamStatsParser()
+        self._stream_stats_panel = None
+        self.stream_stats_timer = QTimer()
+        self.stream_stats_timer.timeout.connect(self._refresh_stream_stats_panel)
+        self.quality_timer = QTimer()
+        self.quality_timer.timeout.connect(self._tick_adaptive_quality)
+        # 墙面模式下轮询前台窗口，点击哪台设备的窗口就把它切换为完整画质
+        self.wall_focus_timer = QTimer()
+        self.wall_focus_timer.timeout.connect(self._poll_wall_focus)
+        self._wall_foreground_pid = None
+        self.telemetry_timer = QTimer()
+        self.telemetry_timer.timeout.connect(self._sample_process_telemetry)
+        if self.telemetry.available:
+            self.telemetry_timer.start(1000)
         
         # 计算界面缩放，先设置主题再应用尺寸缩放
         self.ui_scale = self.compute_ui_scale_v2()
@@ -110,6 +176,9 @@ class ScrcpyUI(QMainWindow):
         # 创建设备检查定时器
         self.device_timer = QTimer()
         self.device_timer.timeout.connect(self.check_devices)
+        # 设备监听断开期间的兜底轮询，不受自动刷新复选框影响
+        self.watcher_fallback_timer = QTimer()
+        self.watcher_fallback_timer.timeout.connect(self.check_devices)
 
         self.load_config()
         self.default_device_profile = self.config_service.collect_device_profile(self)
@@ -134,8 +203,14 @@ class ScrcpyUI(QMainWindow):
         else:
             self.log(f"使用scrcpy路径: {self.scrcpy_path}")
         
-        # 初始加载设备列表
+        # 初始加载设备列表（同时确保 adb server 已启动），随后切换为事件驱动监听
+        self.discovery_worker.start()
         self.check_devices()
+        self.device_watcher.start()
+        for watcher in self.shard_watchers:
+            watcher.start()
+        # 监听建立（收到首个快照）之前先按定时轮询兜底
+        self._update_watcher_fallback()
 
         self._log_runtime_dependency_status(show_dialog=False)
 
@@ -147,8 +222,8 @@ class ScrcpyUI(QMainWindow):
         """清理已结束的临时进程引用。"""
         self.process_manager.cleanup_tracked_process(process)
 
-    def _build_single_device_command(self, device_id, window_title, window_x=100, window_y=100):
-        """委托命令服务基于当前界面状态构建 scrcpy 命令。"""
+    def _build_single_device_command(self, device_id, window_title, window_x=100, window_y=100, quality=None):
+        """委托命令服务基于当前界面状态构建 scrcpy 命令，quality 为预算分配的画质参数。"""
         command, error, needs_warning = self.command_service.build_command_from_ui(
             self,
             self.scrcpy_path,
@@ -156,6 +231,7 @@ class ScrcpyUI(QMainWindow):
             window_title=window_title,
             window_x=window_x,
             window_y=window_y,
+            quality=quality,
         )
         if error:
             if needs_warning:
@@ -165,17 +241,48 @@ class ScrcpyUI(QMainWindow):
             return None
         return command
 
-    def _launch_device_process(self, device_id, command, success_message=None):
-        """启动并跟踪单个设备的 scrcpy 进程。"""
+    def _launch_device_process(self, device_id, command, success_message=None, window_hooks=()):
+        """启动并跟踪单个设备的 scrcpy 进程。
+
+        window_hooks 中的 hook(device_id, handles) 会在窗口出现后与置顶设置一起执行一次。
+        主机资源超出预算时不启动，返回 None。
+        """
+        allowed, reason = self.telemetry.check_budget(self.host_cpu_budget, self.host_mem_budget)
+        if not allowed:
+            self.log(f"{reason}，暂不启动设备 {device_id} 的投屏")
+            return None
         self.record_outputs[device_id] = self._extract_record_output_path(command)
+        self.stream_stats.reset(device_id)
         self.device_window_titles[device_id] = self._extract_window_title(command)
         process = self.process_manager.launch_device_process(device_id, command, success_message)
         self.last_connected_device = device_id
         self.pending_selected_device = device_id
         QTimer.singleShot(0, lambda: self.check_devices(False))
-        QTimer.singleShot(1200, lambda dev=device_id: self._apply_running_window_topmost_for_device(dev, log_result=False))
+        hooks = [self._apply_window_topmost_hook]
+        self.window_tracker.track(device_id, process, self.device_window_titles[device_id], hooks + list(window_hooks))
         return process
 
+    def _apply_window_topmost_hook(self, device_id, handles):
+        """窗口就绪回调：应用置顶状态，返回 False 时由 window_tracker 稍后重试。"""
+        if os.name != "nt":
+            return True
+        return self._apply_running_window_topmost_for_device(device_id, log_result=False, handles=handles)
+
+    def get_multi_device_window_positions(self, count):
+        """按网格计算批量连接时各设备窗口的左上角坐标。"""
+        screen = QApplication.primaryScreen()
+        avail = screen.availableGeometry() if screen else None
+        if not avail or count <= 0:
+            return [(100 + index * 50, 100 + index * 50) for index in range(count)]
+        columns = max(1, math.ceil(math.sqrt(count)))
+        rows = max(1, math.ceil(count / columns))
+        cell_w = avail.width() // columns
+        cell_h = avail.height() // rows
+        return [
+            (avail.x() + (index % columns) * cell_w, avail.y() + (index // columns) * cell_h)
+            for index in range(count)
+        ]
+
     def _extract_window_title(self, command):
         """从 scrcpy 启动命令中提取窗口标题。"""
         try:
@@ -187,6 +294,32 @@ class ScrcpyUI(QMainWindow):
             pass
         return ""
 
+    def _enumerate_visible_windows(self):
+        """在 Windows 上一次枚举全部带标题的可见顶层窗口，返回 [(hwnd, pid, title)]。"""
+        if os.name != "nt":
+            return []
+
+        user32 = ctypes.windll.user32
+        windows = []
+        enum_proc = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_void_p, ctypes.c_void_p)
+
+        def callback(hwnd, _lparam):
+            if not user32.IsWindowVisible(hwnd):
+                return True
+            length = user32.GetWindowTextLengthW(hwnd)
+            if length <= 0:
+                return True
+
+            buffer = ctypes.create_unicode_buffer(length + 1)
+            user32.GetWindowTextW(hwnd, buffer, length + 1)
+            window_pid = ctypes.c_ulong()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
+            windows.append((hwnd, int(window_pid.value), buffer.value or ""))
+            return True
+
+        user32.EnumWindows(enum_proc(callback), 0)
+        return windows
+
     def _find_visible_windows_by_pid(self, pid):
         """在 Windows 上根据进程 PID 查找可见顶层窗口句柄。"""
         if os.name != "nt" or not pid:
@@ -260,8 +393,8 @@ class ScrcpyUI(QMainWindow):
         except Exception:
             return False
 
-    def _apply_running_window_topmost_for_device(self, device_id, *, enabled=None, log_result=True):
-        """把当前 UI 的置顶状态应用到指定运行中的 scrcpy 窗口。"""
+    def _apply_running_window_topmost_for_device(self, device_id, *, enabled=None, log_result=True, handles=None):
+        """把当前 UI 的置顶状态应用到指定运行中的 scrcpy 窗口，handles 为已知窗口句柄时不再重新枚举。"""
         if os.name != "nt":
             return False
 
@@ -274,7 +407,7 @@ class ScrcpyUI(QMainWindow):
             return False
 
         target_state = self.always_top_cb.isChecked() if enabled is None else bool(enabled)
-        handles = self._find_visible_windows_by_pid(pid)
+        handles = handles or self._find_visible_windows_by_pid(pid)
         if not handles:
             handles = self._find_visible_windows_by_title(self.device_window_titles.get(device_id, ""))
         applied_count = 0
@@ -520,6 +653,67 @@ class ScrcpyUI(QMainWindow):
         ok, scrcpy_version_output = self._run_cli_capture([self.scrcpy_path, "--version"])
         sections.append(("scrcpy --version", scrcpy_version_output))
 
+        channel_names = {"native": "原生协议", "cli": "命令行", "session": "常驻 shell 会话", "control": "scrcpy 控制通道"}
+        call_stats = self.controller.get_adb_call_stats()
+        sections.append(("ADB 调用统计", "\n".join(
+            f"{channel_names.get(channel, channel)}: {stats['count']} 次, 平均 {stats['avg_ms']:.1f} ms"
+            for channel, stats in call_stats.items()
+        )))
+
+        discovery_stats = self.discovery_worker.get_stats()
+        stall_stats = self.stall_monitor.get_stats()
+        window_stats = self.window_tracker.get_stats()
+        termination = self.process_manager.last_termination
+        termination_line = "最近一次停止进程: 无"
+        if termination:
+            termination_line = (
+                f"最近一次停止进程: {termination['total']} 个, 耗时 {termination['elapsed_ms']:.0f} ms, "
+                f"强制结束 {termination['killed']} 个, 未退出 {len(termination['stuck'])} 个"
+            )
+        sections.append(("界面响应", "\n".join([
+            f"刷新请求: {discovery_stats['requests']} 次, 实际扫描: {discovery_stats['scans']} 次, "
+            f"合并: {discovery_stats['merged']} 次, 上次扫描耗时 {discovery_stats['last_ms']:.1f} ms",
+            f"事件循环最长阻塞: {stall_stats['max_ms']:.0f} ms, 最近一次: {stall_stats['last_ms']:.0f} ms, "
+            f"超过 {stall_stats['threshold_ms']:.0f} ms 的次数: {stall_stats['stalls']}",
+            f"窗口就绪: {window_stats['devices']} 台, 平均 {window_stats['avg_s']:.2f} 秒, "
+            f"最长 {window_stats['max_s']:.2f} 秒, 等待中 {window_stats['pending']} 台, 窗口枚举 {window_stats['polls']} 次",
+            termination_line,
+        ])))
+
+        supervisor = self.process_manager.supervisor
+        state_names = {
+            "running": "运行中", "waiting": "等待重连", "restarting": "重连中",
+            "suppressed": "已暂停（崩溃循环）", "stopped": "已停止", "unsupervised": "录屏中（不守护）",
+        }
+        session_lines = [f"守护模式: {'开启' if supervisor.enabled else '关闭'}"]
+        for device_id, info in sorted(supervisor.get_stats().items()):
+            session_lines.append(
+                f"{device_id}: {state_names.get(info['state'], info['state'])}, "
+                f"重启 {info['restarts']} 次, 累计运行 {info['uptime']:.0f} 秒"
+            )
+        sections.append(("投屏会话", "\n".join(session_lines)))
+
+        scan_info = self.controller.device_registry.scan_info()
+        scan_lines = [
+            f"监听状态: {'实时推送' if scan_info['live'] else '按需扫描'}",
+            f"扫描次数: {scan_info['scans']} 次, 合并的重复请求: {scan_info['coalesced']} 次",
+        ]
+        if scan_info["age"] is not None:
+            scan_lines.append(f"上次扫描: {scan_info['age']:.1f} 秒前, 耗时 {scan_info['cost_ms']:.1f} ms")
+        props_stats = self.controller.device_props.get_stats()
+        scan_lines.append(
+            f"属性缓存: {props_stats['devices']} 台, 命中 {props_stats['hits']} 次, "
+            f"未命中 {props_stats['misses']} 次 (命中率 {props_stats['hit_rate'] * 100:.0f}%)"
+        )
+        usb_stats = self.controller.usb_scheduler.get_stats()
+        for bus, device_ids in sorted(self.controller.device_registry.usb_topology().items()):
+            bus_stats = usb_stats.get(bus, {})
+            scan_lines.append(
+                f"USB 总线 {bus}: {len(device_ids)} 台, 投屏 {bus_stats.get('streams', 0)} 路 "
+                f"{bus_stats.get('stream_mbps', 0.0):g}M, 传输 {bus_stats.get('transfers', 0)} 个"
+            )
+        sections.append(("设备注册表", "\n".join(scan_lines)))
+
         statuses = health["device_entries"]
         status_lines = []
         offline_exists = False
@@ -695,40 +889,29 @@ class ScrcpyUI(QMainWindow):
             self.device_status_hint.setStyleSheet("color: #6e6a64;")
             self.device_status_hint.hide()
 
-    def _apply_device_item_styles(self):
-        """根据设备状态为下拉项设置颜色和提示。"""
-        if not hasattr(self, 'device_combo'):
-            return
+    def _style_device_item(self, combo, index, entry):
+        """根据设备状态为单个下拉项设置颜色和提示。"""
+        status = entry.get("status", "device")
+        transport = entry.get("transport", "usb")
 
-        for combo in [self.device_combo]:
-            if combo is None:
-                continue
-            for index in range(combo.count()):
-                device_id = combo.itemData(index)
-                entry = self.device_status_map.get(device_id, {})
-                status = entry.get("status", "device")
-                transport = entry.get("transport", "usb")
-                is_running = device_id in self._get_running_device_ids()
-                is_last = device_id == self.last_connected_device
-
-                if status == "offline":
-                    color = QColor(160, 90, 90)
-                    tip = "设备当前离线，请检查数据线或网络连接"
-                elif status == "unauthorized":
-                    color = QColor(196, 120, 40)
-                    tip = "设备未授权，请在手机上允许 USB 调试授权"
-                elif is_running:
-                    color = QColor(42, 122, 108)
-                    tip = "设备正在投屏中"
-                elif is_last:
-                    color = QColor(186, 145, 46)
-                    tip = "这是上次成功投屏的设备"
-                else:
-                    color = QColor(60, 60, 60) if transport == "usb" else QColor(66, 108, 180)
-                    tip = "设备可用"
-
-                combo.setItemData(index, color, Qt.ForegroundRole)
-                combo.setItemData(index, tip, Qt.ToolTipRole)
+        if status == "offline":
+            color = QColor(160, 90, 90)
+            tip = "设备当前离线，请检查数据线或网络连接"
+        elif status == "unauthorized":
+            color = QColor(196, 120, 40)
+            tip = "设备未授权，请在手机上允许 USB 调试授权"
+        elif entry.get("active"):
+            color = QColor(42, 122, 108)
+            tip = "设备正在投屏中"
+        elif entry.get("last_connected"):
+            color = QColor(186, 145, 46)
+            tip = "这是上次成功投屏的设备"
+        else:
+            color = QColor(60, 60, 60) if transport == "usb" else QColor(66, 108, 180)
+            tip = "设备可用"
+
+        combo.setItemData(index, color, Qt.ForegroundRole)
+        combo.setItemData(index, tip, Qt.ToolTipRole)
 
     def _update_selected_device_status_hint(self):
         """根据当前选中设备刷新状态提示与按钮可用性。"""
@@ -803,6 +986,29 @@ class ScrcpyUI(QMainWindow):
         if self._cleanup_done:
             return
         self._cleanup_done = True
+        if getattr(self, "device_watcher", None):
+            self.device_watcher.stop()
+        for watcher in getattr(self, "shard_watchers", []):
+            watcher.stop()
+        if getattr(self, "watcher_fallback_timer", None):
+            self.watcher_fallback_timer.stop()
+        if getattr(self, "discovery_worker", None):
+            self.discovery_worker.stop()
+        if getattr(self, "stall_timer", None):
+            self.stall_timer.stop()
+        if getattr(self, "telemetry_timer", None):
+            self.telemetry_timer.stop()
+        if getattr(self, "stream_stats_timer", None):
+            self.stream_stats_timer.stop()
+        if getattr(self, "quality_timer", None):
+            self.quality_timer.stop()
+        if getattr(self, "wall_focus_timer", None):
+            self.wall_focus_timer.stop()
+        if getattr(self, "window_tracker", None):
+            self.window_tracker.cancel_all()
+        if getattr(self, "controller", None):
+            self.controller.close_sync_control_bridge()
+            self.controller.close_shell_sessions()
         self.process_manager.cleanup_before_exit(
             main_process=self.process,
             event_monitor=self.event_monitor,
@@ -1270,8 +1476,18 @@ class ScrcpyUI(QMainWindow):
         """按当前配置重新解析 adb/scrcpy 依赖并刷新控制器。"""
         self.adb_path = self.find_adb_path()
         self.scrcpy_path = self.find_scrcpy_path()
-        self.controller = ScrcpyController(adb_path=self.adb_path, scrcpy_path=self.scrcpy_path)
-        self.device_service = DeviceService(self.controller)
+        self.controller.close_sync_control_bridge()
+        self.controller.close_shell_sessions()
+        input_backend = self.controller.input_backend
+        self.controller = ScrcpyController(
+            adb_path=self.adb_path,
+            scrcpy_path=self.scrcpy_path,
+            input_backend=input_backend,
+            device_registry=self.controller.device_registry,
+            adb_shards=self.adb_shard_count,
+        )
+        # 保留设备服务实例，沿用其下拉框行状态与分片监听快照
+        self.device_service.controller = self.controller
         self.wifi_service = WifiConnectionService(self, self.adb_path, self.process_manager)
         self.screenshot_service = ScreenshotService(self, self.controller)
         if save_config:
@@ -1279,6 +1495,13 @@ class ScrcpyUI(QMainWindow):
         if announce:
             self._log_runtime_dependency_status(show_dialog=False)
 
+    def _set_input_backend(self, use_scrcpy):
+        """切换群控输入注入后端。"""
+        self.controller.input_backend = "scrcpy" if use_scrcpy else "adb"
+        if not use_scrcpy:
+            self.controller.control_manager.close_all()
+        self.log(f"群控输入后端: {'scrcpy 控制通道' if use_scrcpy else 'adb input'}")
+
     def _log_runtime_dependency_status(self, *, show_dialog=False):
         """输出当前依赖解析结果。"""
         health = self.collect_environment_health()
@@ -1331,6 +1554,7 @@ class ScrcpyUI(QMainWindow):
         self.device_combo = QComboBox()
         self.device_combo.setMinimumWidth(scaled(220, 160))
         self.device_combo.currentIndexChanged.connect(self._on_device_selection_changed)
+        self.device_combo.activated.connect(self._on_device_combo_activated)
 
         self.device_status_hint = QLabel("当前未选择设备")
         self.device_status_hint.setStyleSheet("color: #6e6a64;")
@@ -1351,6 +1575,10 @@ class ScrcpyUI(QMainWindow):
         self.wifi_btn.clicked.connect(self.connect_wireless)
         self.wifi_btn.setObjectName("wifi_btn")
 
+        self.connect_all_btn = QPushButton("全部连接")
+        self.connect_all_btn.clicked.connect(self.batch_connect_service.connect_all_devices)
+        self.connect_all_btn.setObjectName("connect_all_btn")
+
         self.auto_refresh_cb = QCheckBox("自动刷新")
         self.auto_refresh_cb.setChecked(False)
         self.auto_refresh_cb.stateChanged.connect(self.toggle_auto_refresh)
@@ -1359,6 +1587,7 @@ class ScrcpyUI(QMainWindow):
         compact_layout(connection_layout, margin_value=0, spacing_value=layout_spacing)
         connection_layout.addWidget(self.usb_btn)
         connection_layout.addWidget(self.wifi_btn)
+        connection_layout.addWidget(self.connect_all_btn)
         connection_layout.addStretch(1)
         connection_layout.addWidget(self.auto_refresh_cb)
 
@@ -1673,6 +1902,21 @@ class ScrcpyUI(QMainWindow):
         self.disconnect_wifi_action.triggered.connect(self.disconnect_wireless)
         device_menu.addAction(self.disconnect_wifi_action)
 
+        device_menu.addSeparator()
+        self.launch_budget_action = QAction("批量连接按总预算分配画质", self)
+        self.launch_budget_action.setCheckable(True)
+        device_menu.addAction(self.launch_budget_action)
+
+        self.supervise_sessions_action = QAction("投屏异常退出后自动重连", self)
+        self.supervise_sessions_action.setCheckable(True)
+        self.supervise_sessions_action.toggled.connect(self._set_session_supervision)
+        device_menu.addAction(self.supervise_sessions_action)
+
+        self.wall_mode_action = QAction("墙面模式（缩略图批量连接，选中设备切换完整画质）", self)
+        self.wall_mode_action.setCheckable(True)
+        self.wall_mode_action.toggled.connect(self._set_wall_mode)
+        device_menu.addAction(self.wall_mode_action)
+
         
         # 工具菜单
         tools_menu = menu_bar.addMenu("工具")
@@ -1723,8 +1967,30 @@ class ScrcpyUI(QMainWindow):
         self.open_record_file_action.setCheckable(True)
         tools_menu.addAction(self.open_record_file_action)
 
+        self.scrcpy_input_backend_action = QAction("群控输入使用 scrcpy 控制通道", self)
+        self.scrcpy_input_backend_action.setCheckable(True)
+        self.scrcpy_input_backend_action.toggled.connect(self._set_input_backend)
+        tools_menu.addAction(self.scrcpy_input_backend_action)
+
         
         # 添加应用管理器入口到工具菜单
+        self.print_fps_action = QAction("投屏时输出帧率统计 (--print-fps)", self)
+        self.print_fps_action.setCheckable(True)
+        tools_menu.addAction(self.print_fps_action)
+
+        self.adaptive_quality_action = QAction("根据跳帧与主机负载自动调整画质", self)
+        self.adaptive_quality_action.setCheckable(True)
+        self.adaptive_quality_action.toggled.connect(self._set_adaptive_quality)
+        tools_menu.addAction(self.adaptive_quality_action)
+
+        stream_stats_action = QAction("投屏帧率统计", self)
+        stream_stats_action.triggered.connect(self.show_stream_stats_panel)
+        tools_menu.addAction(stream_stats_action)
+
+        resource_panel_action = QAction("投屏资源占用", self)
+        resource_panel_action.triggered.connect(self.show_resource_panel)
+        tools_menu.addAction(resource_panel_action)
+
         app_manager_action = QAction("应用管理器", self)
         app_manager_action.triggered.connect(self.show_app_manager)
         tools_menu.addAction(app_manager_action)
@@ -1775,11 +2041,20 @@ class ScrcpyUI(QMainWindow):
         return True
             
     def check_devices(self, show_message=False):
-        """检查连接的设备并更新设备列表
+        """请求后台刷新设备列表，结果由 _apply_device_scan 在主线程应用
+        
+        扫描进行中的请求会合并为一次后续扫描。
         
         Args:
-            show_message: 是否显示设备检测消息，默认为False
+            show_message: 是否显示设备检测消息，默认为False；为True时忽略近期缓存强制扫描
         """
+        self.discovery_worker.request(show_message=show_message, force=show_message)
+
+    def _apply_device_scan(self, result):
+        """用后台扫描结果更新设备列表（主线程）。"""
+        if self.is_closing:
+            return []
+        show_message = result.get("show_message", False)
         try:
             previous_device = self.device_combo.currentData() or self.pending_selected_device or self.last_connected_device
             devices, selected_device = self.device_service.sync_device_widgets(
@@ -1787,9 +2062,13 @@ class ScrcpyUI(QMainWindow):
                 preferred_device_id=previous_device,
                 active_device_ids=self._get_running_device_ids(),
                 last_connected_device_id=self.last_connected_device,
+                raw_devices=result.get("devices"),
+                row_styler=self._style_device_item,
             )
             self.device_status_map = {item["device_id"]: item for item in devices}
-            self._apply_device_item_styles()
+            self.process_manager.supervisor.notify_devices(
+                item["device_id"] for item in devices if item.get("status") == "device"
+            )
             
             # 更新连接按钮状态
             available_devices = [item for item in devices if item.get("status") == "device"]
@@ -1820,6 +2099,49 @@ class ScrcpyUI(QMainWindow):
                 self.log(f"检查设备出错: {e}")
             return []
         
+    def _set_session_supervision(self, enabled):
+        """开启或关闭投屏会话守护。"""
+        self.process_manager.supervisor.enabled = bool(enabled)
+
+    def _on_registry_change(self, delta):
+        """设备注册表变化回调（可能在后台线程），型号解析完成时切回主线程刷新列表。"""
+        if delta.get("source") == "model" and not self.is_closing:
+            self.device_models_resolved.emit()
+
+    def _handle_device_delta(self, delta):
+        """处理 track-devices 推送的设备增量（主线程）。"""
+        was_live = self.controller.device_registry.live
+        self.device_service.apply_device_delta(delta)
+        self._update_watcher_fallback()
+
+        if not delta.get("live"):
+            if was_live:
+                self.log("设备监听已断开，回退到定时轮询")
+            return
+        if not was_live:
+            console_log("设备监听已建立，设备变化将实时推送")
+
+        status_map = {device_id: status for device_id, status, _attrs in delta.get("devices", [])}
+        for device_id in delta.get("added", []):
+            if was_live:
+                self.log(f"检测到设备接入: {device_id} [{status_map.get(device_id)}]")
+        for device_id in delta.get("removed", []):
+            self.log(f"设备已断开: {device_id}")
+        for device_id in delta.get("changed", []):
+            console_log(f"设备状态变化: {device_id} -> {status_map.get(device_id)}")
+        self.check_devices(False)
+
+    def _update_watcher_fallback(self):
+        """设备监听不在线时启动兜底轮询定时器，重新在线后停止。"""
+        timer = getattr(self, "watcher_fallback_timer", None)
+        if timer is None:
+            return
+        if self.controller.device_registry.live or self.is_closing:
+            if timer.isActive():
+                timer.stop()
+        elif not timer.isActive():
+            timer.start(3000)  # 与自动刷新间隔一致
+
     def start_scrcpy(self):
         """启动scrcpy进程"""
         device_id = self._ensure_selected_device_available("投屏")
@@ -1856,6 +2178,9 @@ class ScrcpyUI(QMainWindow):
         """创建进程结束处理器"""
         def handler(exit_code, exit_status):
             # 进程结束处理
+            leftover = self.stream_stats.flush(device_id)
+            if leftover.strip():
+                self.log(f"[{device_id}] {leftover.strip()}")
             self.log(f"设备 {device_id} 的 scrcpy 进程已结束 (代码: {exit_code})")
             record_path = self.record_outputs.pop(device_id, None)
             if exit_code == 0 and record_path:
@@ -1884,35 +2209,44 @@ class ScrcpyUI(QMainWindow):
             self.log(f"设备 {device_id} 没有运行中的 scrcpy 进程")
             
     
-    def stop_all_scrcpy(self):
-        """停止所有scrcpy进程"""
+    def stop_all_scrcpy(self, on_finished=None):
+        """停止所有scrcpy进程，不阻塞界面，全部退出后调用 on_finished()"""
         if not self.device_processes:
             self.log("没有运行中的 scrcpy 进程")
+            if on_finished:
+                on_finished()
             return
-        self._terminate_all_processes()
-        self.log("已停止所有scrcpy进程")
 
-    def _terminate_all_processes(self, timeout_ms=2000):
-        """集中终止当前已知的所有QProcess实例"""
-        self.process_manager.stop_all_processes(timeout_ms)
+        def finished(report):
+            self.log(f"已停止所有scrcpy进程，耗时 {report['elapsed_ms']:.0f} ms")
+            if on_finished:
+                on_finished()
 
+        self.log(f"正在停止 {len(self.device_processes)} 个 scrcpy 进程...")
+        self._terminate_all_processes(on_finished=finished)
+
+    def _terminate_all_processes(self, timeout_ms=2000, on_finished=None):
+        """并行终止当前已知的所有QProcess实例，统一在 timeout_ms 后强制结束剩余进程"""
+        extra = None
         if hasattr(self, 'process') and self.process and self.process.state() == QProcess.Running:
-            try:
-                self.process.disconnect()
-                self.process.kill()
-                self.process.waitForFinished(timeout_ms)
-            except Exception as e:
-                console_log(f"终止主进程时出错: {e}", "ERROR")
+            extra = {"主进程": self.process}
+        self.process_manager.stop_all_processes(timeout_ms, on_finished=on_finished, extra=extra)
 
     def handle_process_output(self, process, device_id):
         """处理指定进程的标准输出"""
         data = decode_process_output(process.readAllStandardOutput())
+        self.batch_connect_service.observe_output(device_id, data)
+        self.window_tracker.observe_output(device_id, data)
+        data = self.stream_stats.feed(device_id, data)
         if data.strip():
             self.log(f"[{device_id}] {data.strip()}")
             
     def handle_process_error(self, process, device_id):
         """处理指定进程的标准错误"""
         data = decode_process_output(process.readAllStandardError())
+        self.batch_connect_service.observe_output(device_id, data)
+        self.window_tracker.observe_output(device_id, data)
+        data = self.stream_stats.feed(device_id, data)
         if data.strip():
             cleaned = data.strip()
             if self._looks_like_informational_output(cleaned):
@@ -2031,6 +2365,179 @@ class ScrcpyUI(QMainWindow):
         markers = ["INFO:", "[SERVER] INFO:", "file pushed", "Renderer:", "Texture:", "Device:"]
         return any(marker.lower() in text.lower() for marker in markers)
     
+    def _sample_process_telemetry(self):
+        """采样所有运行中投屏进程的资源占用，并刷新资源面板。"""
+        pids = {
+            device_id: int(process.processId() or 0)
+            for device_id, process in self.device_processes.items()
+            if process and process.state() == QProcess.Running
+        }
+        self.telemetry.sample(pids)
+        if self._resource_panel is not None:
+            self._refresh_resource_panel()
+
+    def show_resource_panel(self):
+        """显示各设备投屏进程的资源占用面板。"""
+        if self._resource_panel is not None:
+            self._resource_panel.raise_()
+            self._resource_panel.activateWindow()
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("投屏资源占用")
+        dialog.setMinimumWidth(560)
+        layout = QVBoxLayout(dialog)
+        self._resource_host_label = QLabel()
+        layout.addWidget(self._resource_host_label)
+        self._resource_text = QTextEdit()
+        self._resource_text.setReadOnly(True)
+        self._resource_text.setFont(QFont("Consolas", 9))
+        layout.addWidget(self._resource_text)
+        dialog.finished.connect(lambda _result: setattr(self, "_resource_panel", None))
+        self._resource_panel = dialog
+        self._refresh_resource_panel()
+        dialog.show()
+
+    def _refresh_resource_panel(self):
+        if not self.telemetry.available:
+            self._resource_host_label.setText("当前系统没有 /proc，无法采样进程资源占用")
+            return
+        cpu, mem = self.telemetry.host_usage()
+        budget = "，".join(
+            text for text in (
+                f"CPU {self.host_cpu_budget:.0f}%" if self.host_cpu_budget else "",
+                f"内存 {self.host_mem_budget:.0f}%" if self.host_mem_budget else "",
+            ) if text
+        ) or "不限制"
+        host_text = "主机: 采样中" if cpu is None else f"主机 CPU {cpu:.0f}%，内存 {mem:.0f}%"
+        self._resource_host_label.setText(f"{host_text}（启动预算: {budget}）")
+
+        lines = [f"{'设备':<24}{'CPU%':>7}{'平均':>7}{'峰值':>7}{'内存MB':>9}{'线程':>6}{'IO KB/s':>10}"]
+        for device_id, info in sorted(self.telemetry.latest().items()):
+            lines.append(
+                f"{device_id:<24}{info['cpu']:>7.1f}{info['cpu_avg']:>7.1f}{info['cpu_peak']:>7.1f}"
+                f"{info['rss_mb']:>9.1f}{info['threads']:>6d}{info['io_rate_kb']:>10.1f}"
+            )
+        if len(lines) == 1:
+            lines.append("没有运行中的投屏进程")
+        self._resource_text.setPlainText("\n".join(lines))
+
+    def _set_wall_mode(self, enabled):
+        """开启或关闭墙面模式，仅影响之后的批量连接。"""
+        self.process_manager.wall.enabled = bool(enabled)
+        if enabled and os.name == "nt":
+            self._wall_foreground_pid = None
+            self.wall_focus_timer.start(300)
+        else:
+            self.wall_focus_timer.stop()
+
+    def _on_device_combo_activated(self, _index):
+        """用户在下拉框中选中设备时，墙面模式下把该设备切换为完整画质。"""
+        device_id = self.device_combo.currentData()
+        if device_id:
+            self.process_manager.wall.focus(device_id)
+
+    def _poll_wall_focus(self):
+        """前台窗口属于墙面中的某台设备时，把它切换为完整画质。"""
+        wall = self.process_manager.wall
+        if not wall.focused and not wall.get_stats()["devices"]:
+            return
+        user32 = ctypes.windll.user32
+        hwnd = user32.GetForegroundWindow()
+        if not hwnd:
+            return
+        window_pid = ctypes.c_ulong()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
+        pid = int(window_pid.value)
+        if pid == self._wall_foreground_pid:
+            return
+        self._wall_foreground_pid = pid
+        # 切换后新建的窗口会抢占前台，稳定前的前台变化不视为用户点击
+        if wall.settling:
+            return
+        for device_id, process in self.device_processes.items():
+            if process.state() == QProcess.Running and int(process.processId()) == pid:
+                wall.focus(device_id)
+                break
+
+    def _set_adaptive_quality(self, enabled):
+        """开启或关闭画质闭环调节，跳帧数据需要同时开启帧率统计。"""
+        self.process_manager.quality.enabled = bool(enabled)
+        if enabled:
+            self.quality_timer.start(2000)
+            if not self.print_fps_action.isChecked():
+                self.log("提示: 开启“投屏时输出帧率统计”后才能按跳帧情况调整，否则仅按主机 CPU 调整")
+        else:
+            self.quality_timer.stop()
+
+    def _tick_adaptive_quality(self):
+        """收集各运行中会话的帧率与主机 CPU，交给画质调节器评估。"""
+        host_cpu, _mem = self.telemetry.host_usage(window=2)
+        now = time.time()
+        stats = self.stream_stats.get_stats()
+        metrics = {}
+        for device_id in self._get_running_device_ids():
+            info = stats.get(device_id)
+            fresh = info is not None and info["updated_at"] and now - info["updated_at"] <= 3
+            metrics[device_id] = {
+                "fps": info["fps"] if fresh else None,
+                "skipped": info["skipped"] if fresh else 0,
+                "host_cpu": host_cpu,
+            }
+        self.process_manager.quality.tick(metrics)
+
+    def show_stream_stats_panel(self):
+        """显示各设备的帧率、跳帧、编码器与分辨率统计面板。"""
+        if self._stream_stats_panel is not None:
+            self._stream_stats_panel.raise_()
+            self._stream_stats_panel.activateWindow()
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("投屏帧率统计")
+        dialog.setMinimumWidth(640)
+        layout = QVBoxLayout(dialog)
+        self._stream_stats_hint = QLabel()
+        layout.addWidget(self._stream_stats_hint)
+        self._stream_stats_text = QTextEdit()
+        self._stream_stats_text.setReadOnly(True)
+        self._stream_stats_text.setFont(QFont("Consolas", 9))
+        layout.addWidget(self._stream_stats_text)
+
+        def closed(_result):
+            self.stream_stats_timer.stop()
+            self._stream_stats_panel = None
+
+        dialog.finished.connect(closed)
+        self._stream_stats_panel = dialog
+        self._refresh_stream_stats_panel()
+        self.stream_stats_timer.start(1000)
+        dialog.show()
+
+    def _refresh_stream_stats_panel(self):
+        if self._stream_stats_panel is None:
+            return
+        if self.print_fps_action.isChecked():
+            self._stream_stats_hint.setText("帧率数据来自 scrcpy --print-fps，每秒更新")
+        else:
+            self._stream_stats_hint.setText("未开启“投屏时输出帧率统计”，新启动的投屏才会输出帧率")
+
+        lines = []
+        running_ids = self._get_running_device_ids()
+        for device_id, info in sorted(self.stream_stats.get_stats().items()):
+            lines.append(f"{device_id}{'' if device_id in running_ids else '（已结束）'}")
+            lines.append(
+                f"  帧率 {info['fps']:.0f} fps, 平均 {info['fps_avg']:.1f}, 最低 {info['fps_min']:.0f}, "
+                f"最近跳帧 {info['skipped']:.0f}, 累计跳帧 {info['skipped_total']}"
+            )
+            lines.append(f"  编码器 {info['encoder'] or '-'}, 分辨率 {info['resolution'] or '-'}")
+            if info["history"]:
+                lines.append(f"  {sparkline(info['history'], width=60)}")
+            for timestamp, message in info["events"][-3:]:
+                lines.append(f"  [{timestamp}] {message}")
+            lines.append("")
+        self._stream_stats_text.setPlainText("\n".join(lines) if lines else "暂无统计数据")
+
     def take_screenshot(self):
         """截取设备屏幕并保存到电脑"""
         self.screenshot_service.take_screenshot()
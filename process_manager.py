@@ -1,9 +1,145 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from PyQt5.QtCore import QProcess
+import time
 
+from PyQt5.QtCore import QProcess, QProcessEnvironment, QTimer
+
+from adaptive_quality import AdaptiveQualityController
+from session_supervisor import SessionSupervisor
+from usb_scheduler import command_bit_rate, replace_bit_rate
 from utils import console_log
+from wall_mode import WallModeController
+
+
+class ProcessTerminator:
+    """并行终止一组 QProcess。
+
+    同时向所有进程发送 terminate，进程退出通过 finished 信号异步收集；
+    到达统一截止时间后对仍未退出的进程 kill，再等待 kill_grace_ms 后结束。
+    整批耗时只取决于截止时间，而不是进程数乘以单个超时。
+    """
+
+    def __init__(self, processes, timeout_ms=2000, on_finished=None, disconnect=False, kill_grace_ms=1000):
+        """
+        Args:
+            processes (dict): {名称: QProcess}
+            timeout_ms (int): 发送 terminate 后等待退出的总时长
+            on_finished (callable): on_finished(report)，report 含 total/terminated/killed/stuck/elapsed_ms
+            disconnect (bool): 终止前是否断开进程原有的信号连接
+            kill_grace_ms (int): kill 之后继续等待退出的时长
+        """
+        self.processes = dict(processes)
+        self.timeout_ms = timeout_ms
+        self.kill_grace_ms = kill_grace_ms
+        self.on_finished = on_finished
+        self.disconnect = disconnect
+        self.report = None
+        self._pending = {}
+        self._killed = set()
+        self._signalled = 0
+        self._escalated = False
+        self._started_at = None
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timeout)
+
+    @property
+    def done(self):
+        return self.report is not None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        for name, process in self.processes.items():
+            try:
+                if not process or process.state() == QProcess.NotRunning:
+                    continue
+                if self.disconnect:
+                    try:
+                        process.disconnect()
+                    except (TypeError, RuntimeError):
+                        pass
+                process.finished.connect(lambda *_args, key=name: self._collect(key))
+                self._pending[name] = process
+                self._signalled += 1
+                process.terminate()
+            except Exception as e:
+                console_log(f"终止进程 {name} 时出错: {e}", "ERROR")
+        if self._pending:
+            self._timer.start(int(self.timeout_ms))
+        else:
+            self._finish()
+        return self
+
+    def wait(self):
+        """阻塞等待整批结束（用于退出阶段事件循环已停止时），截止时间与异步模式相同。"""
+        if self._started_at is None:
+            self.start()
+        self._wait_until(self._started_at + self.timeout_ms / 1000)
+        if self._pending and not self._escalated:
+            self._escalate()
+        self._wait_until(time.monotonic() + self.kill_grace_ms / 1000)
+        if not self.done:
+            self._finish()
+        return self.report
+
+    def _wait_until(self, deadline):
+        while self._pending:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                return
+            # 轮流等待各进程，每次只等一小段，任一进程退出都能及时收集
+            for name, process in list(self._pending.items()):
+                try:
+                    process.waitForFinished(max(1, min(50, remaining_ms)))
+                    if process.state() == QProcess.NotRunning:
+                        self._collect(name)
+                except RuntimeError:
+                    self._collect(name)
+
+    def _collect(self, name):
+        if self._pending.pop(name, None) is not None and not self._pending and not self.done:
+            self._finish()
+
+    def _on_timeout(self):
+        if self._escalated:
+            self._finish()
+        else:
+            self._escalate()
+
+    def _escalate(self):
+        if self.done:
+            return
+        self._escalated = True
+        for name, process in list(self._pending.items()):
+            try:
+                console_log(f"进程 {name} 未在 {self.timeout_ms} ms 内退出，强制结束", "WARN")
+                self._killed.add(name)
+                process.kill()
+            except RuntimeError:
+                self._pending.pop(name, None)
+        if self._pending:
+            self._timer.start(int(self.kill_grace_ms))
+        else:
+            self._finish()
+
+    def _finish(self):
+        if self.done:
+            return
+        self._timer.stop()
+        stuck = list(self._pending)
+        self.report = {
+            "total": self._signalled,
+            "terminated": self._signalled - len(self._killed | set(stuck)),
+            "killed": len(self._killed - set(stuck)),
+            "stuck": stuck,
+            "elapsed_ms": (time.monotonic() - self._started_at) * 1000,
+        }
+        if self.on_finished:
+            try:
+                self.on_finished(self.report)
+            except Exception as e:
+                console_log(f"进程终止回调出错: {e}", "ERROR")
 
 
 class ProcessManager:
@@ -14,6 +150,50 @@ class ProcessManager:
         self.device_processes = {}
         self.control_bars = {}
         self.process_tracking = []
+        self.last_termination = None
+        self._terminators = []
+        # 守护模式：异常退出的会话在设备重新可用后自动重启，默认关闭
+        self.supervisor = SessionSupervisor(self._relaunch, self._device_available, log=self.owner.log)
+        # 画质闭环调节：按帧率统计与主机 CPU 重启会话调整码率/尺寸/帧率，默认关闭
+        self.quality = AdaptiveQualityController(self._relaunch_with_quality, log=self.owner.log)
+        # 墙面模式：焦点设备切换为完整画质，其余设备保持缩略图
+        self.wall = WallModeController(self._swap_for_wall, log=self.owner.log)
+
+    def _relaunch(self, device_id, command):
+        if self.owner._launch_device_process(device_id, command) is None:
+            raise RuntimeError("主机资源超出预算")
+
+    def _relaunch_with_quality(self, device_id, command):
+        """以新画质参数重启会话，重启失败时放弃该会话的调节。"""
+        self.swap_process(device_id, command, on_failed=lambda: self.quality.abort(device_id))
+
+    def _swap_for_wall(self, device_id, command, timeout_ms):
+        self.swap_process(device_id, command, timeout_ms, on_failed=lambda: self.wall.abort(device_id))
+
+    def swap_process(self, device_id, command, timeout_ms=2000, on_failed=None):
+        """用新命令替换设备的 scrcpy 进程：等旧进程退出后立即启动新进程，期间不触发会话守护。
+
+        Args:
+            device_id (str): 设备ID
+            command (list): 新的 scrcpy 命令
+            timeout_ms (int): 等待旧进程退出的时长，超时后强制结束
+            on_failed (callable): 新进程未能启动时调用
+        """
+        process = self.device_processes.get(device_id)
+
+        def finished(_report):
+            if self.owner._launch_device_process(device_id, command) is None and on_failed:
+                on_failed()
+
+        if process is None or process.state() == QProcess.NotRunning:
+            finished(None)
+            return
+        self.supervisor.release(device_id)
+        self.terminate({device_id: process}, timeout_ms, finished)
+
+    def _device_available(self, device_id):
+        record = self.owner.controller.device_registry.get(device_id)
+        return bool(record) and record.get("status") == "device"
 
     def track_process(self, process):
         """跟踪 QProcess 生命周期，避免对象过早释放。"""
@@ -41,14 +221,71 @@ class ProcessManager:
         process.readyReadStandardOutput.connect(lambda proc=process, dev=device_id: self.owner.handle_process_output(proc, dev))
         process.readyReadStandardError.connect(lambda proc=process, dev=device_id: self.owner.handle_process_error(proc, dev))
         process.finished.connect(self.owner.create_process_finished_handler(device_id))
+        # 按 USB 总线预算登记投屏码率，总线拥挤时以降低后的码率启动
+        usb_scheduler = self.owner.controller.usb_scheduler
+        original_command = list(command)
+        requested = command_bit_rate(command)
+        granted = usb_scheduler.reserve_stream(device_id, requested)
+        if granted < requested:
+            command = replace_bit_rate(command, granted)
+            self.owner.log(f"设备 {device_id} 所在 USB 总线带宽不足，投屏码率降为 {granted:g}M")
+        process.finished.connect(lambda _code, _status, dev=device_id: usb_scheduler.release_stream(dev))
+        process.errorOccurred.connect(
+            lambda error, dev=device_id: usb_scheduler.release_stream(dev) if error == QProcess.FailedToStart else None
+        )
+        self.supervisor.watch(device_id, original_command)
+        self.quality.watch(device_id, original_command)
+        self.wall.watch(device_id)
+        process.finished.connect(lambda _code, _status, dev=device_id: self.quality.forget(dev))
+        process.finished.connect(lambda _code, _status, dev=device_id: self.wall.forget(dev))
+        process.finished.connect(lambda code, status, dev=device_id: self.supervisor.on_exit(dev, code, status))
+        process.errorOccurred.connect(
+            lambda error, dev=device_id: self.supervisor.on_exit(dev, -1, QProcess.CrashExit)
+            if error == QProcess.FailedToStart else None
+        )
         self.device_processes[device_id] = process
+        # 设备位于非默认 adb server 分片时，scrcpy 需通过环境变量连接对应的 server
+        extra_env = self.owner.controller.adb_environment(device_id)
+        if extra_env:
+            env = QProcessEnvironment.systemEnvironment()
+            for key, value in extra_env.items():
+                env.insert(key, value)
+            process.setProcessEnvironment(env)
         process.start(command[0], command[1:])
         if success_message:
             self.owner.log(success_message)
         return process
 
+    def terminate(self, processes, timeout_ms=2000, on_finished=None, disconnect=False, wait=False):
+        """并行终止一组进程并记录耗时。
+
+        Args:
+            processes (dict): {名称: QProcess}
+            timeout_ms (int): 整批统一的截止时间，超时后对剩余进程 kill
+            on_finished (callable): on_finished(report)，整批结束后调用
+            disconnect (bool): 是否先断开进程原有的信号连接
+            wait (bool): 是否阻塞等待（仅用于退出阶段），否则立即返回
+
+        Returns:
+            ProcessTerminator
+        """
+        def finished(report):
+            self.last_termination = report
+            if terminator in self._terminators:
+                self._terminators.remove(terminator)
+            if on_finished:
+                on_finished(report)
+
+        terminator = ProcessTerminator(processes, timeout_ms, finished, disconnect=disconnect)
+        self._terminators.append(terminator)
+        if wait:
+            terminator.wait()
+        else:
+            terminator.start()
+        return terminator
+
     def stop_device_process(self, device_id, timeout_ms=2000):
-        """停止单个设备对应的进程。"""
+        """停止单个设备对应的进程，不阻塞界面，进程退出后记录耗时。"""
         if device_id not in self.device_processes:
             return False
 
@@ -58,41 +295,52 @@ class ProcessManager:
             return False
 
         self.owner.log(f"正在停止设备 {device_id} 的 scrcpy 进程...")
-        process.terminate()
-        if not process.waitForFinished(timeout_ms):
-            process.kill()
-        self.device_processes.pop(device_id, None)
-        self.owner.log(f"已停止设备 {device_id} 的 scrcpy 进程")
+        self.supervisor.release(device_id)
+
+        def finished(report):
+            # 正常退出时由进程结束处理器移除，这里只清理未能退出的进程
+            if self.device_processes.get(device_id) is process:
+                self.device_processes.pop(device_id, None)
+            if report["stuck"]:
+                self.owner.log(f"设备 {device_id} 的 scrcpy 进程未能结束")
+            else:
+                self.owner.log(f"已停止设备 {device_id} 的 scrcpy 进程，耗时 {report['elapsed_ms']:.0f} ms")
+
+        self.terminate({device_id: process}, timeout_ms, finished)
         return True
 
-    def stop_all_processes(self, timeout_ms=2000):
-        """集中终止当前已知的所有 QProcess 实例。"""
-        for device_id, process in list(self.device_processes.items()):
-            try:
-                if process and process.state() == QProcess.Running:
-                    console_log(f"正在终止设备 {device_id} 的进程...")
-                    try:
-                        process.disconnect()
-                    except (TypeError, RuntimeError):
-                        pass
-                    process.kill()
-                    process.waitForFinished(timeout_ms)
-                    console_log(f"已终止设备 {device_id} 的进程")
-            except Exception as e:
-                console_log(f"终止设备 {device_id} 进程时出错: {e}", "ERROR")
-        self.device_processes.clear()
+    def stop_all_processes(self, timeout_ms=2000, on_finished=None, wait=False, extra=None):
+        """并行终止当前已知的所有 QProcess 实例。
 
-        for i, proc in enumerate(list(self.process_tracking)):
-            try:
-                if proc and proc.state() == QProcess.Running:
-                    proc.disconnect()
-                    proc.kill()
-                    proc.waitForFinished(timeout_ms)
-                    console_log(f"已终止跟踪进程#{i}")
-            except Exception as e:
-                console_log(f"终止跟踪进程 #{i} 时出错: {e}", "ERROR")
+        所有进程同时收到 terminate，统一在 timeout_ms 后对剩余进程 kill。
+        wait 为 False 时立即返回，结果通过 on_finished(report) 通知。
+        extra 为需要一并终止的其他进程 {名称: QProcess}。
+        """
+        processes = {f"设备 {device_id}": process for device_id, process in self.device_processes.items()}
+        for index, process in enumerate(self.process_tracking):
+            if process not in self.device_processes.values():
+                processes[f"跟踪进程#{index}"] = process
+        processes.update(extra or {})
+        stopping = dict(self.device_processes)
+        for device_id in stopping:
+            self.supervisor.release(device_id)
+        if wait:
+            self.device_processes.clear()
         self.process_tracking.clear()
 
+        def finished(report):
+            for device_id, process in stopping.items():
+                if self.device_processes.get(device_id) is process:
+                    self.device_processes.pop(device_id, None)
+            console_log(
+                f"已终止 {report['total']} 个进程，耗时 {report['elapsed_ms']:.0f} ms"
+                f"（强制结束 {report['killed']} 个，未退出 {len(report['stuck'])} 个）"
+            )
+            if on_finished:
+                on_finished(report)
+
+        return self.terminate(processes, timeout_ms, finished, disconnect=wait, wait=wait)
+
     def cleanup_before_exit(self, main_process=None, event_monitor=None, timeout_ms=2000):
         """在应用退出前统一清理资源。"""
         try:
@@ -115,15 +363,9 @@ class ProcessManager:
                     console_log(f"删除控制栏时出错: {e}", "ERROR")
             self.control_bars.clear()
 
-            self.stop_all_processes(timeout_ms)
-
-            if main_process and main_process.state() == QProcess.Running:
-                try:
-                    main_process.disconnect()
-                    main_process.kill()
-                    main_process.waitForFinished(1000)
-                except Exception as e:
-                    console_log(f"终止主进程时出错: {e}", "ERROR")
+            # 事件循环即将停止，阻塞等待，但所有进程共用同一个截止时间
+            extra = {"主进程": main_process} if main_process else None
+            self.stop_all_processes(timeout_ms, wait=True, extra=extra)
 
             console_log("所有进程已清理完毕")
         except Exception as e:
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+from array import array
+
+"""
+scrcpy 进程资源采样。
+
+一个定时器统一采样所有投屏进程，读取 /proc/<pid>/stat、status 与 io：
+CPU 占用按两次采样间的 utime+stime 差值计算，内存取 VmRSS，线程数取 stat 第 20 列，
+I/O 为 read_bytes + write_bytes 累计值（无权限读取 io 时记为 0）。
+每台设备每项指标保存在定长 array 环形缓冲区中，内存占用固定。
+同时采样主机 /proc/stat 与 /proc/meminfo，供启动新投屏前检查资源预算。
+没有 /proc 的平台（Windows/macOS）采样不可用，预算检查始终放行。
+"""
+
+FIELDS = ("cpu", "rss_mb", "threads", "io_mb")
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class RingBuffer:
+    """基于 array('d') 的定长环形缓冲区。"""
+
+    __slots__ = ("_data", "_start", "_size")
+
+    def __init__(self, capacity):
+        self._data = array("d", bytes(8 * max(1, capacity)))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        capacity = len(self._data)
+        self._data[(self._start + self._size) % capacity] = value
+        if self._size < capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % capacity
+
+    def values(self):
+        capacity = len(self._data)
+        return [self._data[(self._start + index) % capacity] for index in range(self._size)]
+
+    def last(self, default=0.0):
+        if not self._size:
+            return default
+        return self._data[(self._start + self._size - 1) % len(self._data)]
+
+
+def read_proc_sample(pid, proc_root="/proc"):
+    """读取单个进程的 (CPU 累计秒数, RSS MB, 线程数, I/O 累计字节)，进程不存在时返回 None。"""
+    base = os.path.join(proc_root, str(pid))
+    try:
+        with open(os.path.join(base, "stat"), "r") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # 进程名可能包含空格，从最后一个右括号之后开始按列解析
+    fields = stat[stat.rfind(")") + 2:].split()
+    try:
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+        threads = int(fields[17])
+    except (IndexError, ValueError):
+        return None
+
+    rss_mb = 0.0
+    try:
+        with open(os.path.join(base, "status"), "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss_mb = int(line.split()[1]) / 1024
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+
+    io_bytes = 0
+    try:
+        with open(os.path.join(base, "io"), "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("read_bytes", "write_bytes"):
+                    io_bytes += int(value)
+    except (OSError, ValueError):
+        pass
+    return cpu_seconds, rss_mb, threads, io_bytes
+
+
+def read_host_counters(proc_root="/proc"):
+    """返回主机 (CPU 总时间片, CPU 空闲时间片, 内存使用率%)，读取失败返回 None。"""
+    try:
+        with open(os.path.join(proc_root, "stat"), "r") as f:
+            values = [int(value) for value in f.readline().split()[1:]]
+        meminfo = {}
+        with open(os.path.join(proc_root, "meminfo"), "r") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in ("MemTotal", "MemAvailable"):
+                    meminfo[name] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    total_mem = meminfo.get("MemTotal", 0)
+    mem_percent = (1 - meminfo.get("MemAvailable", total_mem) / total_mem) * 100 if total_mem else 0.0
+    return sum(values), idle, mem_percent
+
+
+class ProcessTelemetry:
+    """按设备保存进程资源采样，并提供主机资源预算检查。"""
+
+    def __init__(self, capacity=120, proc_root="/proc"):
+        """
+        Args:
+            capacity (int): 每项指标保留的采样点数
+            proc_root (str): proc 文件系统挂载点
+        """
+        self.capacity = capacity
+        self.proc_root = proc_root
+        self.available = os.path.isdir(os.path.join(proc_root, "self"))
+        self.host_cpu = RingBuffer(capacity)
+        self.host_mem = RingBuffer(capacity)
+        self._series = {}
+        self._previous = {}
+        self._host_previous = None
+
+    def sample(self, pids):
+        """采样一轮。
+
+        Args:
+            pids (dict): {设备ID: 进程 PID}，不在其中的设备会被移除
+        """
+        if not self.available:
+            return
+        now = time.monotonic()
+        for device_id in list(self._series):
+            if device_id not in pids:
+                self._series.pop(device_id, None)
+                self._previous.pop(device_id, None)
+
+        for device_id, pid in pids.items():
+            sample = read_proc_sample(pid, self.proc_root) if pid else None
+            if sample is None:
+                continue
+            cpu_seconds, rss_mb, threads, io_bytes = sample
+            previous = self._previous.get(device_id)
+            self._previous[device_id] = (pid, now, cpu_seconds)
+            if previous is None or previous[0] != pid or now <= previous[1]:
+                continue
+            series = self._series.get(device_id)
+            if series is None:
+                series = self._series[device_id] = {field: RingBuffer(self.capacity) for field in FIELDS}
+            series["cpu"].append(max(0.0, (cpu_seconds - previous[2]) / (now - previous[1]) * 100))
+            series["rss_mb"].append(rss_mb)
+            series["threads"].append(threads)
+            series["io_mb"].append(io_bytes / (1024 * 1024))
+
+        counters = read_host_counters(self.proc_root)
+        if counters is not None:
+            total, idle, mem_percent = counters
+            if self._host_previous is not None and total > self._host_previous[0]:
+                busy = (total - self._host_previous[0]) - (idle - self._host_previous[1])
+                self.host_cpu.append(max(0.0, busy / (total - self._host_previous[0]) * 100))
+            self._host_previous = (total, idle)
+            self.host_mem.append(mem_percent)
+
+    def history(self, device_id, field):
+        series = self._series.get(device_id)
+        return series[field].values() if series else []
+
+    def latest(self):
+        """返回 {设备ID: {cpu, cpu_avg, cpu_peak, rss_mb, threads, io_mb, io_rate_kb}}。"""
+        result = {}
+        for device_id, series in self._series.items():
+            cpu_values = series["cpu"].values()
+            io_values = series["io_mb"].values()
+            result[device_id] = {
+                "cpu": series["cpu"].last(),
+                "cpu_avg": sum(cpu_values) / len(cpu_values) if cpu_values else 0.0,
+                "cpu_peak": max(cpu_values) if cpu_values else 0.0,
+                "rss_mb": series["rss_mb"].last(),
+                "threads": int(series["threads"].last()),
+                "io_mb": series["io_mb"].last(),
+                "io_rate_kb": (io_values[-1] - io_values[-2]) * 1024 if len(io_values) > 1 else 0.0,
+            }
+        return result
+
+    def host_usage(self, window=5):
+        """返回最近 window 次采样的主机平均 (CPU%, 内存%)，无数据时返回 (None, None)。"""
+        cpu_values = self.host_cpu.values()[-window:]
+        mem_values = self.host_mem.values()[-window:]
+        cpu = sum(cpu_values) / len(cpu_values) if cpu_values else None
+        mem = sum(mem_values) / len(mem_values) if mem_values else None
+        return cpu, mem
+
+    def check_budget(self, cpu_limit=None, mem_limit=None):
+        """检查主机资源是否允许再启动一路投屏。
+
+        Returns:
+            tuple: (是否允许, 说明)
+        """
+        cpu, mem = self.host_usage()
+        if cpu_limit and cpu is not None and cpu >= cpu_limit:
+            return False, f"主机 CPU 占用 {cpu:.0f}% 已超过预算 {cpu_limit:.0f}%"
+        if mem_limit and mem is not None and mem >= mem_limit:
+            return False, f"主机内存占用 {mem:.0f}% 已超过预算 {mem_limit:.0f}%"
+        return True, ""
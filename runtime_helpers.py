@@ -277,6 +277,11 @@ def check_command_available(command_path, version_arg):
         return False
 
 
+def format_bit_rate(mbps):
+    """Format a Mbps value for --video-bit-rate; scrcpy only accepts integers, so fractions use K."""
+    return f"{int(mbps)}M" if float(mbps).is_integer() else f"{int(float(mbps) * 1000)}K"
+
+
 def build_scrcpy_command(
     scrcpy_path,
     device_id,
@@ -301,12 +306,13 @@ def build_scrcpy_command(
     no_audio=True,
     window_x=None,
     window_y=None,
+    print_fps=False,
 ):
     """Build a scrcpy command from normalized UI options."""
     cmd = [scrcpy_path, "-s", device_id]
 
     if bit_rate not in (None, ""):
-        cmd.extend(["--video-bit-rate", f"{bit_rate}M"])
+        cmd.extend(["--video-bit-rate", format_bit_rate(bit_rate)])
     if max_size not in (None, ""):
         cmd.extend(["--max-size", str(max_size)])
     if max_fps not in (None, ""):
@@ -347,5 +353,54 @@ def build_scrcpy_command(
         cmd.extend(["--window-x", str(window_x)])
     if window_y is not None:
         cmd.extend(["--window-y", str(window_y)])
+    if print_fps:
+        cmd.append("--print-fps")
+
+    return cmd
+
+
+_OVERRIDABLE_OPTIONS = {
+    "bit_rate": ("--video-bit-rate", format_bit_rate),
+    "max_size": ("--max-size", str),
+    "max_fps": ("--max-fps", str),
+}
+
+
+def scrcpy_option_value(command, flag):
+    """Return the value of a `--flag value` / `--flag=value` option, or None."""
+    for index, arg in enumerate(command):
+        if arg == flag and index + 1 < len(command):
+            return command[index + 1]
+        if arg.startswith(flag + "="):
+            return arg.split("=", 1)[1]
+    return None
 
-    return cmd
\ No newline at end of file
+
+def override_scrcpy_options(command, **options):
+    """Return a copy of a scrcpy command with bit_rate/max_size/max_fps replaced.
+
+    A value of None removes the option; other options are kept in order.
+    """
+    flags = {_OVERRIDABLE_OPTIONS[name][0] for name in options}
+    result = []
+    skip_next = False
+    for arg in command:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in flags:
+            skip_next = True
+            continue
+        if any(arg.startswith(flag + "=") for flag in flags):
+            continue
+        result.append(arg)
+
+    extra = []
+    for name, value in options.items():
+        if value in (None, ""):
+            continue
+        flag, formatter = _OVERRIDABLE_OPTIONS[name]
+        extra.extend([flag, formatter(value)])
+    # Insert after the device selector so the command still starts with `scrcpy -s <serial>`
+    position = 3 if len(result) >= 3 and result[1] == "-s" else 1
+    return result[:position] + extra + result[position:]
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import platform
+import socket
+import struct
+import subprocess
+import threading
+import time
+import uuid
+
+from utils import console_log
+
+"""
+scrcpy 控制消息编码与仅控制通道。
+
+GUI 自行在设备上启动一个 video=false/audio=false 的 scrcpy-server，
+通过 adb forward 连接其控制 socket，把触摸、按键、文本编码为 scrcpy 控制消息直接注入，
+不再为每个事件启动 `input`（每次都要拉起一个 JVM）。
+
+消息格式（大端序）：
+1. INJECT_KEYCODE: u8 type=0, u8 action, u32 keycode, u32 repeat, u32 metastate
+2. INJECT_TEXT:    u8 type=1, u32 length, utf8 文本（最长 300 字节）
+3. INJECT_TOUCH:   u8 type=2, u8 action, u64 pointer_id, i32 x, i32 y,
+                   u16 屏幕宽, u16 屏幕高, u16 压力（定点数）, u32 action_button, u32 buttons
+"""
+
+TYPE_INJECT_KEYCODE = 0
+TYPE_INJECT_TEXT = 1
+TYPE_INJECT_TOUCH_EVENT = 2
+
+ACTION_DOWN = 0
+ACTION_UP = 1
+ACTION_MOVE = 2
+
+# scrcpy 中的通用手指指针 ID（-2）
+POINTER_ID_GENERIC_FINGER = -2
+INJECT_TEXT_MAX_LENGTH = 300
+
+DEVICE_SERVER_PATH = "/data/local/tmp/scrcpy-server-gui.jar"
+
+
+class ScrcpyControlError(Exception):
+    """控制通道不可用或发送失败。"""
+
+
+def encode_inject_keycode(action, keycode, repeat=0, metastate=0):
+    return struct.pack(">BBIII", TYPE_INJECT_KEYCODE, action, keycode, repeat, metastate)
+
+
+def encode_inject_text(text):
+    data = text.encode("utf-8")
+    if len(data) > INJECT_TEXT_MAX_LENGTH:
+        # 按字节截断后去掉被截断的不完整字符
+        data = data[:INJECT_TEXT_MAX_LENGTH].decode("utf-8", errors="ignore").encode("utf-8")
+    return struct.pack(">BI", TYPE_INJECT_TEXT, len(data)) + data
+
+
+def encode_inject_touch(action, x, y, screen_width, screen_height, pressure=1.0,
+                        pointer_id=POINTER_ID_GENERIC_FINGER, action_button=0, buttons=0):
+    # 压力为 [0, 1] 的 u16 定点数，1.0 对应 0xffff
+    pressure_fixed = 0xFFFF if pressure >= 1.0 else max(0, int(pressure * 0x10000))
+    return struct.pack(
+        ">BBqiiHHHII",
+        TYPE_INJECT_TOUCH_EVENT, action, pointer_id, int(x), int(y),
+        int(screen_width), int(screen_height), pressure_fixed, action_button, buttons,
+    )
+
+
+class ScrcpyControlChannel:
+    """单台设备上的仅控制 scrcpy-server 连接。"""
+
+    def __init__(self, adb_path, device_id, server_path, server_version, screen_size, connect_timeout=5.0,
+                 server_args=(), server_env=None):
+        self.adb_path = adb_path
+        self.server_args = list(server_args)
+        self.server_env = dict(server_env or {})
+        self.device_id = device_id
+        self.server_path = server_path
+        self.server_version = server_version
+        self.screen_size = screen_size
+        self.connect_timeout = connect_timeout
+        self.scid = f"{uuid.uuid4().int & 0x7FFFFFFF:08x}"
+        self.local_port = None
+        self.server_process = None
+        self.sock = None
+        self._send_lock = threading.Lock()
+
+    def _process_kwargs(self):
+        kwargs = {}
+        if platform.system() == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        # 分片 server 未运行时 adb 会自动拉起它，需带上禁用 USB 的环境变量
+        if self.server_env:
+            kwargs['env'] = {**os.environ, **self.server_env}
+        return kwargs
+
+    def _adb(self, *args, timeout=10):
+        cmd = [self.adb_path, *self.server_args]
+        if self.device_id:
+            cmd.extend(["-s", self.device_id])
+        cmd.extend(args)
+        return subprocess.run(cmd, capture_output=True, text=True, check=False, timeout=timeout,
+                              **self._process_kwargs())
+
+    def start(self):
+        if not self.server_path or not os.path.isfile(self.server_path):
+            raise ScrcpyControlError("未找到 scrcpy-server 文件")
+        if not self.server_version:
+            raise ScrcpyControlError("无法确定 scrcpy 版本")
+
+        result = self._adb("push", self.server_path, DEVICE_SERVER_PATH, timeout=30)
+        if result.returncode != 0:
+            raise ScrcpyControlError(f"推送 scrcpy-server 失败: {result.stderr.strip()}")
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.local_port = probe.getsockname()[1]
+        result = self._adb("forward", f"tcp:{self.local_port}", f"localabstract:scrcpy_{self.scid}")
+        if result.returncode != 0:
+            raise ScrcpyControlError(f"建立端口转发失败: {result.stderr.strip()}")
+
+        server_cmd = [self.adb_path, *self.server_args]
+        if self.device_id:
+            server_cmd.extend(["-s", self.device_id])
+        server_cmd.extend([
+            "shell", f"CLASSPATH={DEVICE_SERVER_PATH}", "app_process", "/", "com.genymobile.scrcpy.Server",
+            self.server_version, f"scid={self.scid}", "log_level=warn",
+            "video=false", "audio=false", "control=true", "tunnel_forward=true",
+            "send_device_meta=false", "send_dummy_byte=true", "cleanup=false",
+        ])
+        self.server_process = subprocess.Popen(
+            server_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **self._process_kwargs()
+        )
+
+        # 服务端监听就绪前 adb forward 会立即断开连接，需要重试直到收到 dummy byte
+        deadline = time.monotonic() + self.connect_timeout
+        while time.monotonic() < deadline:
+            if self.server_process.poll() is not None:
+                break
+            try:
+                sock = socket.create_connection(("127.0.0.1", self.local_port), timeout=1.0)
+            except OSError:
+                time.sleep(0.1)
+                continue
+            try:
+                if sock.recv(1) == b"\x00":
+                    sock.settimeout(None)
+                    self.sock = sock
+                    threading.Thread(target=self._drain, args=(sock,), daemon=True).start()
+                    console_log(f"设备 {self.device_id} 的 scrcpy 控制通道已建立")
+                    return
+            except OSError:
+                pass
+            sock.close()
+            time.sleep(0.1)
+
+        self.close()
+        raise ScrcpyControlError("连接 scrcpy 控制通道超时")
+
+    @staticmethod
+    def _drain(sock):
+        """丢弃设备端回传的剪贴板等消息，避免接收缓冲区写满。"""
+        try:
+            while sock.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def is_alive(self):
+        return self.sock is not None and self.server_process is not None and self.server_process.poll() is None
+
+    def send(self, *messages):
+        with self._send_lock:
+            if self.sock is None:
+                raise ScrcpyControlError("控制通道已关闭")
+            try:
+                self.sock.sendall(b"".join(messages))
+            except OSError as e:
+                self.close()
+                raise ScrcpyControlError(f"发送控制消息失败: {e}")
+
+    def tap(self, x, y, hold=0.0):
+        width, height = self.screen_size
+        self.send(encode_inject_touch(ACTION_DOWN, x, y, width, height))
+        if hold > 0:
+            time.sleep(hold)
+        self.send(encode_inject_touch(ACTION_UP, x, y, width, height, pressure=0.0))
+
+    def swipe(self, x1, y1, x2, y2, duration=0.5, step_interval=0.016):
+        width, height = self.screen_size
+        steps = max(1, int(duration / step_interval))
+        self.send(encode_inject_touch(ACTION_DOWN, x1, y1, width, height))
+        for step in range(1, steps + 1):
+            time.sleep(duration / steps)
+            x = x1 + (x2 - x1) * step / steps
+            y = y1 + (y2 - y1) * step / steps
+            self.send(encode_inject_touch(ACTION_MOVE, x, y, width, height))
+        self.send(encode_inject_touch(ACTION_UP, x2, y2, width, height, pressure=0.0))
+
+    def key(self, keycode):
+        self.send(
+            encode_inject_keycode(ACTION_DOWN, keycode),
+            encode_inject_keycode(ACTION_UP, keycode),
+        )
+
+    def text(self, text):
+        self.send(encode_inject_text(text))
+
+    def close(self):
+        sock, self.sock = self.sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        process, self.server_process = self.server_process, None
+        if process is not None and process.poll() is None:
+            try:
+                process.terminate()
+                process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                try:
+                    process.kill()
+                except OSError:
+                    pass
+        if self.local_port is not None:
+            try:
+                self._adb("forward", "--remove", f"tcp:{self.local_port}", timeout=3)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            self.local_port = None
+
+
+class ScrcpyControlManager:
+    """按设备管理仅控制通道，断开后下次使用时重建。"""
+
+    # 建立失败后暂停重试的秒数，期间调用方直接回退到 adb input
+    RETRY_INTERVAL = 10.0
+
+    def __init__(self, adb_path="adb", server_args=None, server_env=None):
+        """server_args(device_id) 返回路由到设备所在 adb server 的全局参数（如 -P 端口），
+        server_env(device_id) 返回访问该 server 时需要追加的环境变量。"""
+        self.adb_path = adb_path
+        self.server_args = server_args
+        self.server_env = server_env
+        self._channels = {}
+        self._failed_at = {}
+        self._device_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, device_id, server_path, server_version, screen_size):
+        """返回可用的控制通道，无法建立时抛出 ScrcpyControlError。"""
+        with self._lock:
+            device_lock = self._device_locks.setdefault(device_id, threading.Lock())
+
+        # 按设备加锁，建立通道较慢时不阻塞其他设备
+        with device_lock:
+            channel = self._channels.get(device_id)
+            if channel is not None and channel.is_alive():
+                channel.screen_size = screen_size
+                return channel
+            if channel is not None:
+                channel.close()
+                self._channels.pop(device_id, None)
+            if time.time() - self._failed_at.get(device_id, 0) < self.RETRY_INTERVAL:
+                raise ScrcpyControlError("控制通道最近建立失败，暂时使用 adb input")
+
+            channel = ScrcpyControlChannel(
+                self.adb_path, device_id, server_path, server_version, screen_size,
+                server_args=self.server_args(device_id) if self.server_args else (),
+                server_env=self.server_env(device_id) if self.server_env else None,
+            )
+            try:
+                channel.start()
+            except (ScrcpyControlError, OSError, subprocess.TimeoutExpired) as e:
+                self._failed_at[device_id] = time.time()
+                channel.close()
+                raise ScrcpyControlError(str(e))
+            self._failed_at.pop(device_id, None)
+            with self._lock:
+                self._channels[device_id] = channel
+            return channel
+
+    def close_all(self):
+        with self._lock:
+            channels = list(self._channels.values())
+            self._channels.clear()
+        for channel in channels:
+            channel.close()
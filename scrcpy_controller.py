@@ -9,7 +9,17 @@ import platform
 import threading
 import time
 import random
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
+from adb_client import AdbClient, AdbConnectionError, AdbProtocolError, AdbTransportError, parse_device_lines
+from adb_shards import AdbShardManager
+from coordinate_mapper import CoordinateMapper, display_size
+from device_props import DevicePropsCache
+from device_registry import DeviceRegistry, make_device_entry
+from geometry_cache import GeometryCache
+from scrcpy_control import ScrcpyControlError, ScrcpyControlManager
+from shell_session_pool import ShellSessionError, ShellSessionPool
+from usb_scheduler import UsbBandwidthScheduler
 from utils import console_log
 
 """
@@ -23,15 +33,61 @@ Scrcpy控制器模块，用于与Android设备进行通信和控制。
 """
 
 class ScrcpyController:
-    def __init__(self, adb_path="adb", scrcpy_path="scrcpy"):
+    # 原生协议连接失败后，暂停尝试的秒数（期间直接走 adb CLI）
+    NATIVE_ADB_RETRY_INTERVAL = 5.0
+    # 群控并发下发的最大线程数
+    SYNC_MAX_WORKERS = 16
+    # 发现阶段异步解析缺失型号的线程数与整批截止时间（秒）
+    MODEL_RESOLVE_WORKERS = 8
+    MODEL_RESOLVE_DEADLINE = 6.0
+    # 需要经过 USB 带宽调度的高带宽 adb 子命令
+    TRANSFER_COMMANDS = ("install", "install-multiple", "push", "pull")
+
+    def __init__(self, adb_path="adb", scrcpy_path="scrcpy", use_native_adb=True, use_shell_sessions=True,
+                 input_backend="adb", device_registry=None, adb_shards=1):
         self.process = None
         self.system = platform.system()
         self.adb_path = adb_path or "adb"
         self.scrcpy_path = scrcpy_path or "scrcpy"
+        self.use_native_adb = use_native_adb
+        # 多 adb server 分片，分片数为 1 时所有命令都走默认 server
+        self.shards = AdbShardManager(self.adb_path, adb_shards)
+        self.adb_client = AdbClient(port=self.shards.base_port)
+        self._adb_clients = {self.shards.base_port: self.adb_client}
+        self.use_shell_sessions = use_shell_sessions
+        self.last_sync_report = None
+        self.geometry_cache = GeometryCache(self)
+        # 设备注册表可由调用方传入，以便重建控制器时保留已有快照
+        self.device_registry = device_registry or DeviceRegistry()
+        self.device_registry.bind_scanner(self._scan_device_entries)
+        self.device_props = DevicePropsCache(self)
+        # 按 USB 总线限制投屏码率与并发传输任务
+        self.usb_scheduler = UsbBandwidthScheduler(self.device_registry.usb_bus_of)
+        self._model_pool = None
+        self._model_pending = set()
+        self._model_deadline = 0.0
+        self._model_lock = threading.Lock()
+        self._sync_mapper = None
+        self.shell_pool = ShellSessionPool(self.adb_path, server_args=self.shards.server_args,
+                                           server_env=self.shards.environment)
+        # 输入注入后端："adb" 使用 input 命令，"scrcpy" 使用 scrcpy 控制通道（失败时回退到 adb）
+        self.input_backend = input_backend
+        self.control_manager = ScrcpyControlManager(self.adb_path, server_args=self.shards.server_args,
+                                                    server_env=self.shards.environment)
+        self._scrcpy_version = None
+        # 原生协议失败后的重试时间，按 adb server 端口分别退避
+        self._native_adb_retry_at = {}
+        self._adb_stats_lock = threading.Lock()
+        self.adb_call_stats = {
+            "native": {"count": 0, "seconds": 0.0},
+            "cli": {"count": 0, "seconds": 0.0},
+            "session": {"count": 0, "seconds": 0.0},
+            "control": {"count": 0, "seconds": 0.0},
+        }
 
-    def _adb_command(self, *args, device_id=None):
-        """构建统一的 adb 命令。"""
-        cmd = [self.adb_path]
+    def _adb_command(self, *args, device_id=None, port=None):
+        """构建统一的 adb 命令，port 为空时按设备所在分片路由。"""
+        cmd = [self.adb_path, *self.shards.server_args(device_id, port)]
         if device_id:
             cmd.extend(["-s", device_id])
         cmd.extend(args)
@@ -40,6 +96,180 @@ class ScrcpyController:
     def _scrcpy_command(self, *args):
         """构建统一的 scrcpy 命令。"""
         return [self.scrcpy_path, *args]
+
+    def _run_adb(self, *args, device_id=None, timeout=None, text=True, stdout_file=None, port=None):
+        """执行 adb 命令，优先使用原生 smart-socket 协议，不可用时回退到 adb CLI。
+
+        原生协议覆盖 `devices -l`、`shell` 与 `exec-out`，其余命令始终走 CLI。
+        只有在命令下发前失败（adb server 未启动、服务被拒绝）才会回退，
+        避免同一条输入事件被执行两次；连不上 adb server 时该端口在一段时间内直接走 CLI。
+        单台设备离线或不存在只返回失败结果，不影响同一 server 上的其他设备。
+
+        Args:
+            *args: adb 子命令及参数
+            device_id (str): 设备ID
+            timeout (float): 超时时间（秒），超时抛出 subprocess.TimeoutExpired
+            text (bool): 是否把输出解码为文本
+            stdout_file: 传入文件对象时，标准输出直接写入该文件
+            port (int): 指定 adb server 端口，默认按设备所在分片路由
+
+        Returns:
+            subprocess.CompletedProcess: 与 subprocess.run 一致的结果对象
+        """
+        cmd = self._adb_command(*args, device_id=device_id, port=port)
+        server_port = port or self.shards.port_for(device_id)
+        if self.use_native_adb and time.time() >= self._native_adb_retry_at.get(server_port, 0.0):
+            start_time = time.perf_counter()
+            try:
+                client = self._adb_client_for(server_port)
+                result = self._run_adb_native(client, cmd, args, device_id, timeout, text, stdout_file)
+            except AdbConnectionError as e:
+                self._native_adb_retry_at[server_port] = time.time() + self.NATIVE_ADB_RETRY_INTERVAL
+                console_log(f"端口 {server_port} 上的原生 ADB 协议不可用，回退到 adb 命令行: {e}", "WARN")
+                result = None
+            except AdbTransportError as e:
+                console_log(f"原生 ADB 协议拒绝该命令，本次改用 adb 命令行: {e}", "DEBUG")
+                result = None
+            except AdbProtocolError as e:
+                self._record_adb_call("native", time.perf_counter() - start_time)
+                message = str(e)
+                return subprocess.CompletedProcess(cmd, 1, "" if text else b"", message if text else message.encode("utf-8"))
+            except OSError as e:
+                # 命令已下发后的读超时/断连，与 CLI 超时语义保持一致
+                raise subprocess.TimeoutExpired(cmd, timeout) from e
+            if result is not None:
+                self._record_adb_call("native", time.perf_counter() - start_time)
+                return result
+
+        kwargs = {}
+        if self.system == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        if stdout_file is not None:
+            kwargs['stdout'] = stdout_file
+            kwargs['stderr'] = subprocess.PIPE
+        else:
+            kwargs['capture_output'] = True
+
+        # 分片 server 未运行时 adb CLI 会自动拉起它，需带上禁用 USB 的环境变量
+        extra_env = self.shards.server_environment(server_port)
+        if extra_env:
+            kwargs['env'] = {**os.environ, **extra_env}
+
+        start_time = time.perf_counter()
+        try:
+            return subprocess.run(cmd, text=text, check=False, timeout=timeout, **kwargs)
+        finally:
+            self._record_adb_call("cli", time.perf_counter() - start_time)
+
+    def _adb_client_for(self, port):
+        client = self._adb_clients.get(port)
+        if client is None:
+            client = self._adb_clients.setdefault(port, AdbClient(port=port))
+        return client
+
+    def _run_adb_native(self, client, cmd, args, device_id, timeout, text, stdout_file):
+        """通过 AdbClient 执行受支持的命令，不支持时返回 None。"""
+        if list(args) == ["devices", "-l"]:
+            lines = [
+                " ".join([serial, status, *(f"{key}:{value}" for key, value in attrs.items())])
+                for serial, status, attrs in client.devices_long()
+            ]
+            stdout = "List of devices attached\n" + "\n".join(lines) + "\n"
+            return subprocess.CompletedProcess(cmd, 0, stdout if text else stdout.encode("utf-8"), "" if text else b"")
+
+        if len(args) < 2 or args[0] not in ("shell", "exec-out") or str(args[1]).startswith("-"):
+            return None
+
+        command = " ".join(str(arg) for arg in args[1:])
+        if args[0] == "exec-out":
+            stdout = client.exec_out(device_id, command, output=stdout_file, timeout=timeout)
+            returncode, stderr = 0, b""
+        else:
+            returncode, stdout, stderr = client.shell(device_id, command, timeout=timeout)
+            returncode = 0 if returncode is None else returncode
+            if stdout_file is not None:
+                stdout_file.write(stdout)
+                stdout = None
+
+        if text:
+            stdout = stdout.decode("utf-8", errors="ignore") if stdout is not None else None
+            stderr = stderr.decode("utf-8", errors="ignore")
+        return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+
+    def _run_shell(self, *args, device_id=None, timeout=None):
+        """通过常驻 adb shell 会话执行命令，会话不可用时回退到 _run_adb。
+
+        Returns:
+            subprocess.CompletedProcess: stdout 为合并后的文本输出，stderr 为空
+        """
+        command = " ".join(str(arg) for arg in args)
+        if self.use_shell_sessions:
+            try:
+                exit_code, output, elapsed = self.shell_pool.run(device_id, command, timeout=timeout)
+            except ShellSessionError as e:
+                console_log(f"adb shell 会话不可用，改用单次命令: {e}", "WARN")
+            else:
+                self._record_adb_call("session", elapsed)
+                console_log(f"[{device_id or '默认设备'}] shell 会话命令耗时 {elapsed * 1000:.1f} ms: {command}", "DEBUG")
+                return subprocess.CompletedProcess(
+                    ["shell", *args], exit_code, output.decode("utf-8", errors="ignore"), ""
+                )
+        return self._run_adb("shell", *args, device_id=device_id, timeout=timeout)
+
+    def close_shell_sessions(self):
+        """关闭所有常驻 adb shell 会话、scrcpy 控制通道与型号解析线程池。"""
+        self.shell_pool.close_all()
+        self.control_manager.close_all()
+        with self._model_lock:
+            pool, self._model_pool = self._model_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def get_scrcpy_version(self):
+        """返回 scrcpy 版本号（如 2.4），结果会缓存，无法获取时返回 None。"""
+        if self._scrcpy_version is None:
+            self._scrcpy_version = self.check_dependencies().get("scrcpy_version") or ""
+        if self._scrcpy_version in ("", "未知"):
+            return None
+        return self._scrcpy_version
+
+    def _send_via_control(self, device_id, method, *args):
+        """通过 scrcpy 控制通道注入输入，通道不可用时返回 False 由调用方回退到 adb input。"""
+        try:
+            # 控制消息中的屏幕尺寸需与设备当前显示方向一致，否则服务端会丢弃触摸事件
+            geometry = self.geometry_cache.get(device_id, max_age=None if self.geometry_cache.active else 5.0)
+            if not geometry:
+                raise ScrcpyControlError("无法获取屏幕尺寸")
+            channel = self.control_manager.get(
+                device_id,
+                os.environ.get("SCRCPY_SERVER_PATH"),
+                self.get_scrcpy_version(),
+                display_size(geometry["size"], geometry["rotation"]),
+            )
+            start_time = time.perf_counter()
+            getattr(channel, method)(*args)
+            self._record_adb_call("control", time.perf_counter() - start_time)
+            return True
+        except ScrcpyControlError as e:
+            console_log(f"scrcpy 控制通道不可用，改用 adb input: {e}", "WARN")
+            return False
+
+    def _record_adb_call(self, channel, elapsed):
+        with self._adb_stats_lock:
+            stats = self.adb_call_stats[channel]
+            stats["count"] += 1
+            stats["seconds"] += elapsed
+
+    def get_adb_call_stats(self):
+        """返回原生协议、CLI 与常驻会话各路径的调用次数和平均耗时（毫秒）。"""
+        with self._adb_stats_lock:
+            return {
+                channel: {
+                    "count": stats["count"],
+                    "avg_ms": (stats["seconds"] / stats["count"] * 1000) if stats["count"] else 0.0,
+                }
+                for channel, stats in self.adb_call_stats.items()
+            }
         
     def get_devices(self):
         """
@@ -58,94 +288,104 @@ class ScrcpyController:
             console_log(f"获取设备列表出错: {e}", "ERROR")
             return []
 
-    def get_device_statuses(self):
-        """获取设备列表及状态信息。"""
-        try:
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+    def get_device_statuses(self, max_age=None):
+        """获取设备列表及状态信息。
 
-            result = subprocess.run(
-                self._adb_command("devices", "-l"),
-                capture_output=True,
-                text=True,
-                check=False,
-                **kwargs
-            )
+        结果来自共享的设备注册表：监听在线或 max_age 秒内已扫描过时直接返回快照，
+        并发调用只会执行一次 adb devices。
+        """
+        return self.device_registry.refresh(max_age)
 
-            if result.returncode != 0:
-                console_log(f"获取设备状态失败: {result.stderr}", "ERROR")
-                return []
-
-            devices = []
-            lines = result.stdout.strip().split('\n')
-            for line in lines[1:]:
-                line = line.strip()
-                if not line:
-                    continue
+    def _scan_device_entries(self):
+        """在每个 adb server 分片上执行 adb devices -l 并构建设备条目。"""
+        entries = []
+        seen = set()
+        for port in self.shards.active_ports:
+            try:
+                result = self._run_adb("devices", "-l", port=port)
 
-                parts = line.split()
-                if len(parts) < 2:
+                if result.returncode != 0:
+                    console_log(f"获取设备状态失败: {result.stderr}", "ERROR")
                     continue
 
-                device_id = parts[0].strip()
-                status = parts[1].strip()
-                attrs = parts[2:]
-
-                model = self._extract_attr(attrs, "model")
-                transport = "wifi" if ":" in device_id else "usb"
-
-                if status == "device":
-                    if not model:
-                        model = self._get_device_model(device_id)
-                elif status == "offline":
-                    model = model or "离线设备"
-                elif status == "unauthorized":
-                    model = model or "未授权设备"
-                else:
-                    model = model or "未知设备"
+                # 缺少型号的设备先以占位型号返回，型号在后台解析，慢设备不会拖住整个列表
+                for device_id, status, attrs in parse_device_lines(result.stdout):
+                    if device_id in seen or not self.shards.accepts(device_id, port):
+                        continue
+                    seen.add(device_id)
+                    self.shards.assign(device_id, port)
+                    entries.append(self.build_device_entry(device_id, status, attrs))
+            except Exception as e:
+                console_log(f"获取设备状态出错: {e}", "ERROR")
+        return entries
 
-                devices.append({
-                    "device_id": device_id,
-                    "status": status,
-                    "model": model or "未知设备",
-                    "transport": transport,
-                })
+    def build_device_entry(self, device_id, status, attrs, resolve_model=True):
+        """把一行设备记录转换为统一的设备条目。
 
-            return devices
-        except Exception as e:
-            console_log(f"获取设备状态出错: {e}", "ERROR")
-            return []
+        Args:
+            device_id (str): 设备ID
+            status (str): adb 报告的设备状态
+            attrs (dict): `devices -l` 附带的属性，如 model/product/transport_id
+            resolve_model (bool): 缺少型号时是否解析型号；属性缓存未命中时先返回占位型号，
+                                  后台解析完成后通过设备注册表的 source="model" 变化通知更新
+        """
+        model = (attrs or {}).get("model", "")
+        transport_id = (attrs or {}).get("transport_id")
+        if status == "device" and not model and resolve_model:
+            props = self.device_props.peek(device_id, transport_id)
+            if props is not None:
+                model = props.get("ro.product.model", "")
+            else:
+                self._resolve_model_async(device_id, transport_id)
+        return make_device_entry(device_id, status, attrs, model)
 
-    def _extract_attr(self, attrs, key):
-        prefix = f"{key}:"
-        for item in attrs:
-            if item.startswith(prefix):
-                return item[len(prefix):]
-        return ""
+    def _get_device_model(self, device_id, transport_id=None, timeout=None):
+        return self.device_props.get(device_id, transport_id, timeout).get("ro.product.model") or "未知设备"
 
-    def _get_device_model(self, device_id):
+    def _resolve_model_async(self, device_id, transport_id=None):
+        """在有界线程池中解析型号，同一批请求共享一个截止时间，已在解析中的设备不重复提交。"""
+        now = time.monotonic()
+        with self._model_lock:
+            if device_id in self._model_pending:
+                return
+            if self._model_pool is None:
+                self._model_pool = ThreadPoolExecutor(
+                    max_workers=self.MODEL_RESOLVE_WORKERS, thread_name_prefix="model-resolve"
+                )
+            # 上一批已过截止时间时开启新的一批
+            if now >= self._model_deadline:
+                self._model_deadline = now + self.MODEL_RESOLVE_DEADLINE
+            deadline = self._model_deadline
+            self._model_pending.add(device_id)
+            pool = self._model_pool
         try:
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+            pool.submit(self._resolve_model, device_id, transport_id, deadline)
+        except RuntimeError:
+            with self._model_lock:
+                self._model_pending.discard(device_id)
 
-            model_result = subprocess.run(
-                self._adb_command("shell", "getprop", "ro.product.model", device_id=device_id),
-                capture_output=True,
-                text=True,
-                check=False,
-                timeout=2,
-                **kwargs
-            )
-            if model_result.returncode == 0:
-                model = model_result.stdout.strip()
-                if model:
-                    return model
+    def _resolve_model(self, device_id, transport_id, deadline):
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0.1:
+                console_log(f"设备 {device_id} 型号解析超过截止时间，已跳过", "DEBUG")
+                return
+            model = self._get_device_model(device_id, transport_id, timeout=remaining)
+            if model != "未知设备":
+                self.device_registry.update_model(device_id, model)
         except Exception as e:
-            console_log(f"获取设备型号失败: {e}", "WARN")
-            pass
-        return "未知设备"
+            console_log(f"解析设备 {device_id} 型号失败: {e}", "WARN")
+        finally:
+            with self._model_lock:
+                self._model_pending.discard(device_id)
+
+    def adb_environment(self, device_id):
+        """返回为该设备启动 scrcpy 等子进程时需要追加的环境变量（adb server 分片路由）。"""
+        return self.shards.environment(device_id)
+
+    def get_device_props(self, device_id):
+        """返回设备的 getprop 属性字典（来自属性快照缓存）。"""
+        return self.device_props.get(device_id)
             
     def build_command(self, device_id=None, resolution=None, bit_rate=None, 
                       max_fps=None, record_path=None, fullscreen=False, 
@@ -350,11 +590,18 @@ class ScrcpyController:
             if self.system == 'Windows':
                 kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
                 
+            server_port = self.shards.assign(connection_string)
+            if not self.shards.ensure_server(server_port):
+                # 分片不可用时改连主 server
+                self.shards.release(connection_string)
+                server_port = self.shards.base_port
+            extra_env = self.shards.server_environment(server_port)
             result = subprocess.run(
-                self._adb_command("connect", connection_string),
+                self._adb_command("connect", connection_string, port=server_port),
                 capture_output=True,
                 text=True,
                 check=True,
+                env={**os.environ, **extra_env} if extra_env else None,
                 **kwargs
             )
             
@@ -379,23 +626,31 @@ class ScrcpyController:
             tuple: (成功标志, 信息)
         """
         try:
-            cmd = self._adb_command("disconnect")
-            if ip_address:
-                cmd.append(ip_address)
-            
+            # 未指定设备时断开所有分片上的网络设备
+            ports = [self.shards.port_for(ip_address)] if ip_address else self.shards.active_ports
             kwargs = {}
             if self.system == 'Windows':
                 kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
                 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True,
-                **kwargs
-            )
+            outputs = []
+            for port in ports:
+                cmd = self._adb_command("disconnect", port=port)
+                if ip_address:
+                    cmd.append(ip_address)
+                extra_env = self.shards.server_environment(port)
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    env={**os.environ, **extra_env} if extra_env else None,
+                    **kwargs
+                )
+                outputs.append(result.stdout)
+            if ip_address:
+                self.shards.release(ip_address)
             
-            return True, result.stdout
+            return True, "".join(outputs)
         except Exception as e:
             return False, str(e)
             
@@ -421,16 +676,12 @@ class ScrcpyController:
             if save_dir and not os.path.exists(save_dir):
                 os.makedirs(save_dir)
                 
-            # 构建adb命令
-            cmd = self._adb_command("exec-out", "screencap", "-p", device_id=device_id)
-            
-            # 执行命令并将输出重定向到文件
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                
+            # 执行命令并将输出直接写入文件
             with open(save_path, "wb") as f:
-                subprocess.run(cmd, stdout=f, check=True, **kwargs)
+                with self.usb_scheduler.transfer(device_id):
+                    result = self._run_adb("exec-out", "screencap", "-p", device_id=device_id, text=False, stdout_file=f)
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(result.returncode, result.args, stderr=result.stderr)
                 
             return True, save_path
         except Exception as e:
@@ -456,28 +707,16 @@ class ScrcpyController:
         if not device_id:
             return info
         
-        kwargs = {}
-        if self.system == 'Windows':
-            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-            
         try:
-            # 获取设备型号
-            model_cmd = self._adb_command("shell", "getprop", "ro.product.model", device_id=device_id)
-            model_result = subprocess.run(model_cmd, capture_output=True, text=True, check=True, **kwargs)
-            info["model"] = model_result.stdout.strip()
-            
-            # 获取安卓版本
-            version_cmd = self._adb_command("shell", "getprop", "ro.build.version.release", device_id=device_id)
-            version_result = subprocess.run(version_cmd, capture_output=True, text=True, check=True, **kwargs)
-            info["android_version"] = version_result.stdout.strip()
+            # 型号与安卓版本来自属性快照
+            props = self.device_props.get(device_id)
+            info["model"] = props.get("ro.product.model") or info["model"]
+            info["android_version"] = props.get("ro.build.version.release") or info["android_version"]
             
             # 获取屏幕分辨率
-            res_cmd = self._adb_command("shell", "wm", "size", device_id=device_id)
-            res_result = subprocess.run(res_cmd, capture_output=True, text=True, check=True, **kwargs)
-            res_output = res_result.stdout.strip()
-            res_match = re.search(r'Physical size: (\d+x\d+)', res_output)
-            if res_match:
-                info["resolution"] = res_match.group(1)
+            size = self.get_screen_size(device_id)
+            if size:
+                info["resolution"] = f"{size[0]}x{size[1]}"
                 
             return info
         except Exception as e:
@@ -502,29 +741,12 @@ class ScrcpyController:
             else:
                 cmd_parts = command
 
-            # 构建完整命令
-            full_cmd = [self.adb_path]
-            
-            # 如果指定了设备ID，则添加设备ID参数
-            if device_id:
-                full_cmd.extend(["-s", device_id])
-                
-            # 添加实际命令部分
-            full_cmd.extend(cmd_parts)
-            
-            # Windows特殊处理，隐藏控制台窗口
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                
-            # 执行命令
-            result = subprocess.run(
-                full_cmd,
-                capture_output=True,
-                text=True,
-                check=False,  # 不自动抛出异常
-                **kwargs
-            )
+            # 执行命令（不自动抛出异常），设备ID由 _run_adb 统一追加；传输类命令按 USB 总线排队
+            if device_id and cmd_parts and cmd_parts[0] in self.TRANSFER_COMMANDS:
+                with self.usb_scheduler.transfer(device_id):
+                    result = self._run_adb(*cmd_parts, device_id=device_id)
+            else:
+                result = self._run_adb(*cmd_parts, device_id=device_id)
             
             # 检查返回码，非零表示可能出错
             if result.returncode != 0:
@@ -601,15 +823,7 @@ class ScrcpyController:
             str: 设备品牌名称
         """
         try:
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                
-            cmd = self._adb_command("shell", "getprop", "ro.product.brand", device_id=device_id)
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False, **kwargs)
-            if result.returncode == 0:
-                return result.stdout.strip()
-            return "未知品牌"
+            return self.device_props.get(device_id).get("ro.product.brand") or "未知品牌"
         except Exception as e:
             console_log(f"获取设备品牌失败: {e}", "WARN")
             return "未知品牌"
@@ -634,36 +848,18 @@ class ScrcpyController:
         if not device_id:
             return info
         
-        kwargs = {}
-        if self.system == 'Windows':
-            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-            
         try:
-            # 获取品牌
-            brand_cmd = self._adb_command("shell", "getprop", "ro.product.brand", device_id=device_id)
-            brand_result = subprocess.run(brand_cmd, capture_output=True, text=True, check=False, **kwargs)
-            if brand_result.returncode == 0:
-                info["brand"] = brand_result.stdout.strip()
-                
-            # 获取型号
-            model_cmd = self._adb_command("shell", "getprop", "ro.product.model", device_id=device_id)
-            model_result = subprocess.run(model_cmd, capture_output=True, text=True, check=False, **kwargs)
-            if model_result.returncode == 0:
-                info["model"] = model_result.stdout.strip()
-                
-            # 获取Android版本
-            android_cmd = self._adb_command("shell", "getprop", "ro.build.version.release", device_id=device_id)
-            android_result = subprocess.run(android_cmd, capture_output=True, text=True, check=False, **kwargs)
-            if android_result.returncode == 0:
-                info["android"] = android_result.stdout.strip()
-                
+            props = self.device_props.get(device_id)
+            info["brand"] = props.get("ro.product.brand") or info["brand"]
+            info["model"] = props.get("ro.product.model") or info["model"]
+            info["android"] = props.get("ro.build.version.release") or info["android"]
             return info
         except Exception as e:
             console_log(f"获取设备信息出错: {e}", "ERROR")
             return info
 
     # 添加群控相关方法
-    def send_touch_event(self, device_id, x, y, action="tap"):
+    def send_touch_event(self, device_id, x, y, action="tap", timeout=8, duration=None):
         """
         向设备发送触摸事件
         
@@ -672,13 +868,15 @@ class ScrcpyController:
             x (float/int 或 tuple): x坐标或(x1,y1,x2,y2)坐标元组
             y (float/int): y坐标
             action (str): 触摸类型 (tap, swipe, long等)
+            timeout (float): 命令超时时间（秒）
+            duration (int): swipe/long 的持续时间（毫秒），默认分别为 500 与 1000
             
         Returns:
             bool: 是否成功
         """
         try:
-            # 准备ADB命令
-            cmd = self._adb_command("shell", device_id=device_id)
+            # 准备 input 命令参数
+            cmd = []
             
             if action == "tap":
                 cmd.extend(["input", "tap", str(int(x)), str(int(y))])
@@ -702,45 +900,44 @@ class ScrcpyController:
                     x2, y2 = y[0], y[1]
                 
                 # 增加滑动持续时间，确保设备能识别滑动
-                duration = 500  # 使用500ms，确保滑动能被识别
+                if duration is None:
+                    duration = 500  # 使用500ms，确保滑动能被识别
                 cmd.extend(["input", "swipe", 
                            str(int(x1)), str(int(y1)), 
                            str(int(x2)), str(int(y2)),
-                           str(duration)])
+                           str(int(duration))])
             elif action == "long":
                 # 长按操作
                 # Android中长按通常是使用swipe命令，起点和终点相同，持续时间长
-                duration = 1000  # 长按持续1000ms (1秒)
+                if duration is None:
+                    duration = 1000  # 长按持续1000ms (1秒)
                 cmd.extend(["input", "swipe", 
                            str(int(x)), str(int(y)), 
                            str(int(x)), str(int(y)),
-                           str(duration)])
+                           str(int(duration))])
                 
-            # 使用通用过程执行命令
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                
-            # 增加超时时间
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                **kwargs
-            )
-            
-            # 等待命令完成，增加超时时间
+            if self.input_backend == "scrcpy":
+                if action == "tap":
+                    sent = self._send_via_control(device_id, "tap", int(x), int(y))
+                elif action == "swipe":
+                    sent = self._send_via_control(device_id, "swipe", int(x1), int(y1), int(x2), int(y2), duration / 1000)
+                elif action == "long":
+                    sent = self._send_via_control(device_id, "tap", int(x), int(y), duration / 1000)
+                else:
+                    sent = False
+                if sent:
+                    return True
+
+            # 等待命令完成
             try:
-                stdout, stderr = process.communicate(timeout=8)  # 8秒超时
+                result = self._run_shell(*cmd, device_id=device_id, timeout=timeout)
                 
-                if process.returncode != 0:
-                    console_log(f"触摸命令执行失败: {stderr}", "WARN")
+                if result.returncode != 0:
+                    console_log(f"触摸命令执行失败: {result.stderr or result.stdout}", "WARN")
                     return False
                     
                 return True
             except subprocess.TimeoutExpired:
-                process.kill()
                 console_log("触摸命令执行超时", "WARN")
                 return False
                 
@@ -760,24 +957,15 @@ class ScrcpyController:
             bool: 是否成功
         """
         try:
-            cmd = self._adb_command("shell", "input", "keyevent", str(key_code), device_id=device_id)
-            
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                **kwargs
-            )
-            
+            # 控制消息只接受数字键码，KEYCODE_* 名称仍走 adb input
+            if self.input_backend == "scrcpy" and str(key_code).isdigit():
+                if self._send_via_control(device_id, "key", int(key_code)):
+                    return True
+
             try:
-                process.communicate(timeout=3)
+                self._run_shell("input", "keyevent", str(key_code), device_id=device_id, timeout=3)
                 return True
             except subprocess.TimeoutExpired:
-                process.kill()
                 return False
                 
         except Exception as e:
@@ -796,6 +984,9 @@ class ScrcpyController:
             bool: 是否成功
         """
         try:
+            if self.input_backend == "scrcpy" and self._send_via_control(device_id, "text", text):
+                return True
+
             # 对文本进行转义，确保命令行解析正确
             if self.system == 'Windows':
                 # Windows下需要双引号
@@ -804,24 +995,10 @@ class ScrcpyController:
                 # Linux/macOS下使用单引号
                 escaped_text = f"'{text}'"
                 
-            cmd = self._adb_command("shell", "input", "text", escaped_text, device_id=device_id)
-            
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                **kwargs
-            )
-            
             try:
-                process.communicate(timeout=3)
+                self._run_shell("input", "text", escaped_text, device_id=device_id, timeout=3)
                 return True
             except subprocess.TimeoutExpired:
-                process.kill()
                 return False
                 
         except Exception as e:
@@ -839,19 +1016,7 @@ class ScrcpyController:
             tuple: (宽, 高)，如果获取失败则返回None
         """
         try:
-            cmd = self._adb_command("shell", "wm", "size", device_id=device_id)
-            
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=False,
-                **kwargs
-            )
+            result = self._run_shell("wm", "size", device_id=device_id, timeout=3)
             
             if result.returncode == 0:
                 # 解析结果，如: Physical size: 1080x1920
@@ -867,7 +1032,9 @@ class ScrcpyController:
             console_log(f"获取设备 {device_id} 屏幕尺寸失败: {e}", "ERROR")
             return None
             
-    def sync_touch_from_main_to_slaves(self, main_device_id, slave_device_ids, x, y, action="tap"):
+    def sync_touch_from_main_to_slaves(self, main_device_id, slave_device_ids, x, y, action="tap",
+                                       concurrent=True, max_workers=None, device_timeout=10.0,
+                                       retry_delay=None):
         """
         将主设备的触摸事件同步到从设备
         
@@ -877,9 +1044,13 @@ class ScrcpyController:
             x (float/int): x坐标或坐标元组
             y (float/int): y坐标或动作类型
             action (str): 触摸类型
+            concurrent (bool): 是否并发下发到所有从设备，False 时按顺序逐台执行
+            max_workers (int): 并发模式的最大线程数，默认按设备数量，最多 SYNC_MAX_WORKERS
+            device_timeout (float): 每台设备从开始下发起的截止时间（秒）
+            retry_delay (float): 失败后重试前的等待时间，默认顺序模式 1.0 秒、并发模式 0.2 秒
             
         Returns:
-            bool: 是否全部成功
+            bool: 是否全部成功；每台设备的耗时明细保存在 last_sync_report
         """
         if not slave_device_ids:
             return True
@@ -888,339 +1059,80 @@ class ScrcpyController:
         start_time = time.time()
         console_log(f"开始同步操作 {action} 到 {len(slave_device_ids)} 个设备...")
             
-        # 获取主设备分辨率
-        main_size = self.get_screen_size(main_device_id)
-        if not main_size:
+        # 获取主设备分辨率与方向（群控会话中来自几何缓存）
+        main_geometry = self._get_sync_geometry(main_device_id)
+        if not main_geometry:
             console_log(f"无法获取主设备 {main_device_id} 屏幕尺寸", "WARN")
             return False
-            
-        main_width, main_height = main_size
         
-        # 获取主设备UI属性信息
-        main_device_info = self.get_device_full_info(main_device_id)
-        
-        # 计算点击位置的相对比例
+        # 整理主设备上的手势点
         if action == "tap" or action == "long":
-            # 计算相对于屏幕的百分比位置
-            x_ratio = x / main_width
-            y_ratio = y / main_height
-            
-            # 保存实际坐标用于调试
-            orig_x, orig_y = x, y
-            
-            # 计算屏幕区域（上、中、下，左、中、右）
-            # 将屏幕划分为9个区域，便于不同尺寸设备间的映射
-            x_zone = 0 if x_ratio < 0.33 else (2 if x_ratio > 0.66 else 1)
-            y_zone = 0 if y_ratio < 0.33 else (2 if y_ratio > 0.66 else 1)
-            screen_area = y_zone * 3 + x_zone  # 0-8的值表示9个区域
-            
-            zone_names = ["左上", "中上", "右上", "左中", "中心", "右中", "左下", "中下", "右下"]
-            console_log(f"主设备点击区域: {zone_names[screen_area]}，坐标比例: ({x_ratio:.2f}, {y_ratio:.2f})")
-            
+            points = [(x, y)]
         elif action == "swipe":
             # 处理滑动事件的坐标
-            if isinstance(x, tuple):
-                if len(x) == 4:
-                    # 如果x是包含四个元素的元组，则认为是(x1,y1,x2,y2)
-                    x1, y1, x2, y2 = x
-                    x1_ratio = x1 / main_width
-                    y1_ratio = y1 / main_height
-                    x2_ratio = x2 / main_width
-                    y2_ratio = y2 / main_height
-                else:
-                    # 兼容其他格式
-                    try:
-                        if isinstance(x, tuple) and len(x) == 2:
-                            x1, y1 = x
-                            if isinstance(y, tuple) and len(y) == 2:
-                                x2, y2 = y
-                            else:
-                                # 如果y不是坐标元组，尝试从参数中解析
-                                x2, y2 = y, action
-                                action = "swipe"  # 确保动作类型正确
-                        else:
-                            console_log("不支持的滑动坐标格式", "WARN")
-                            return False
-                        
-                        x1_ratio = x1 / main_width
-                        y1_ratio = y1 / main_height
-                        x2_ratio = x2 / main_width
-                        y2_ratio = y2 / main_height
-                    except Exception as e:
-                        console_log(f"滑动坐标解析错误: {e}", "ERROR")
-                        return False
+            if isinstance(x, tuple) and len(x) == 4:
+                # 如果x是包含四个元素的元组，则认为是(x1,y1,x2,y2)
+                points = [x[:2], x[2:]]
+            elif isinstance(x, tuple) and len(x) == 2 and isinstance(y, tuple) and len(y) == 2:
+                points = [x, y]
             else:
-                # 坐标格式错误
                 console_log("滑动坐标格式错误", "WARN")
                 return False
-                
-            # 获取滑动方向
-            dx = x2_ratio - x1_ratio
-            dy = y2_ratio - y1_ratio
-            
-            # 确定主要滑动方向
-            if abs(dx) > abs(dy):
-                # 水平滑动
-                if dx > 0:
-                    direction = "右"
-                    strength = "强" if dx > 0.3 else "弱"
-                else:
-                    direction = "左"
-                    strength = "强" if dx < -0.3 else "弱"
-            else:
-                # 垂直滑动
-                if dy > 0:
-                    direction = "下"
-                    strength = "强" if dy > 0.3 else "弱"
-                else:
-                    direction = "上"
-                    strength = "强" if dy < -0.3 else "弱"
-                
-            console_log(f"主设备滑动: {strength}{direction}滑，从({x1_ratio:.2f}, {y1_ratio:.2f})到({x2_ratio:.2f}, {y2_ratio:.2f})")
-            
-        # 所有成功执行的设备计数
-        success_count = 0
-        failed_devices = []
-        
-        # 获取主设备屏幕方向
-        main_orientation = self.get_screen_orientation(main_device_id)
-        
-        # 等待一小段时间，确保主设备上的操作完全完成
-        time.sleep(0.5)
-        
-        # 向每个从设备按顺序(而不是并行)发送触摸事件
-        for device_idx, slave_id in enumerate(slave_device_ids):
-            try:
-                # 获取从设备分辨率
-                slave_size = self.get_screen_size(slave_id)
-                if not slave_size:
-                    console_log(f"无法获取从设备 {slave_id} 屏幕尺寸", "WARN")
-                    failed_devices.append(slave_id)
-                    continue
-                    
-                slave_width, slave_height = slave_size
-                
-                # 获取从设备信息和屏幕方向
-                slave_device_info = self.get_device_full_info(slave_id)
-                slave_orientation = self.get_screen_orientation(slave_id)
-                
-                # 检查主设备和从设备方向是否一致
-                orientation_consistent = (main_orientation == slave_orientation)
-                if not orientation_consistent:
-                    console_log(f"设备 {slave_id} 的屏幕方向({slave_orientation})与主设备({main_orientation})不一致", "WARN")
-                
-                # 将比例换算为目标设备上的像素坐标
-                if action == "tap" or action == "long":
-                    # 使用区域映射而非精确坐标转换
-                    # 计算9个区域中心点的位置
-                    zone_centers_x = [slave_width * 0.16, slave_width * 0.5, slave_width * 0.84]
-                    zone_centers_y = [slave_height * 0.16, slave_height * 0.5, slave_height * 0.84]
-                    
-                    # 如果方向一致，使用更准确的映射
-                    if orientation_consistent:
-                        # 方向一致时，使用比例映射方式
-                        target_x = int(x_ratio * slave_width)
-                        target_y = int(y_ratio * slave_height)
-                    else:
-                        # 方向不一致时，使用区域映射
-                        x_pos = 0 if x_ratio < 0.33 else (2 if x_ratio > 0.66 else 1)
-                        y_pos = 0 if y_ratio < 0.33 else (2 if y_ratio > 0.66 else 1)
-                        
-                        # 根据屏幕方向旋转区域坐标
-                        if (main_orientation == "portrait" and slave_orientation == "landscape") or \
-                           (main_orientation == "landscape" and slave_orientation == "portrait"):
-                            # 旋转90度 - 交换x和y
-                            x_pos, y_pos = y_pos, 2 - x_pos
-                            
-                        target_x = int(zone_centers_x[x_pos])
-                        target_y = int(zone_centers_y[y_pos])
-                        
-                    # 确保坐标在屏幕范围内
-                    target_x = max(1, min(target_x, slave_width - 1))
-                    target_y = max(1, min(target_y, slave_height - 1))
-                    
-                    # 添加少量随机偏移，避免完全相同的点击位置
-                    target_x += random.randint(-5, 5)
-                    target_y += random.randint(-5, 5)
-                    
-                    # 确保坐标在屏幕范围内
-                    target_x = max(1, min(target_x, slave_width - 1))
-                    target_y = max(1, min(target_y, slave_height - 1))
-                    
-                    console_log(f"同步{action}事件到设备{slave_id}: ({target_x}, {target_y}) [主设备比例: ({x_ratio:.2f}, {y_ratio:.2f})]")
-                    
-                    # 执行命令
-                    if action == "tap":
-                        result = self.send_touch_event(slave_id, target_x, target_y, "tap")
-                    else:  # long press
-                        result = self.send_touch_event(slave_id, target_x, target_y, "long")
-                        
-                elif action == "swipe":
-                    # 滑动事件的坐标转换
-                    if orientation_consistent:
-                        # 方向一致，直接按比例转换
-                        target_x1 = int(x1_ratio * slave_width)
-                        target_y1 = int(y1_ratio * slave_height)
-                        target_x2 = int(x2_ratio * slave_width)
-                        target_y2 = int(y2_ratio * slave_height)
-                    else:
-                        # 方向不一致，使用方向感知的滑动
-                        # 计算中心点
-                        center_x = slave_width / 2
-                        center_y = slave_height / 2
-                        
-                        # 根据主设备滑动方向确定从设备滑动方向
-                        if direction == "右":
-                            # 主设备向右滑动
-                            if main_orientation == "portrait" and slave_orientation == "landscape":
-                                # 从设备需要向下滑动
-                                target_x1 = center_x
-                                target_y1 = center_y - (slave_height * 0.3)
-                                target_x2 = center_x
-                                target_y2 = center_y + (slave_height * 0.3)
-                            elif main_orientation == "landscape" and slave_orientation == "portrait":
-                                # 从设备需要向右滑动
-                                target_x1 = center_x - (slave_width * 0.3)
-                                target_y1 = center_y
-                                target_x2 = center_x + (slave_width * 0.3)
-                                target_y2 = center_y
-                            else:
-                                # 相同方向
-                                target_x1 = center_x - (slave_width * 0.3)
-                                target_y1 = center_y
-                                target_x2 = center_x + (slave_width * 0.3)
-                                target_y2 = center_y
-                        elif direction == "左":
-                            # 主设备向左滑动
-                            if main_orientation == "portrait" and slave_orientation == "landscape":
-                                # 从设备需要向上滑动
-                                target_x1 = center_x
-                                target_y1 = center_y + (slave_height * 0.3)
-                                target_x2 = center_x
-                                target_y2 = center_y - (slave_height * 0.3)
-                            elif main_orientation == "landscape" and slave_orientation == "portrait":
-                                # 从设备需要向左滑动
-                                target_x1 = center_x + (slave_width * 0.3)
-                                target_y1 = center_y
-                                target_x2 = center_x - (slave_width * 0.3)
-                                target_y2 = center_y
-                            else:
-                                # 相同方向
-                                target_x1 = center_x + (slave_width * 0.3)
-                                target_y1 = center_y
-                                target_x2 = center_x - (slave_width * 0.3)
-                                target_y2 = center_y
-                        elif direction == "上":
-                            # 主设备向上滑动
-                            if main_orientation == "portrait" and slave_orientation == "landscape":
-                                # 从设备需要向左滑动
-                                target_x1 = center_x + (slave_width * 0.3)
-                                target_y1 = center_y
-                                target_x2 = center_x - (slave_width * 0.3)
-                                target_y2 = center_y
-                            elif main_orientation == "landscape" and slave_orientation == "portrait":
-                                # 从设备需要向上滑动
-                                target_x1 = center_x
-                                target_y1 = center_y + (slave_height * 0.3)
-                                target_x2 = center_x
-                                target_y2 = center_y - (slave_height * 0.3)
-                            else:
-                                # 相同方向
-                                target_x1 = center_x
-                                target_y1 = center_y + (slave_height * 0.3)
-                                target_x2 = center_x
-                                target_y2 = center_y - (slave_height * 0.3)
-                        else:  # direction == "下"
-                            # 主设备向下滑动
-                            if main_orientation == "portrait" and slave_orientation == "landscape":
-                                # 从设备需要向右滑动
-                                target_x1 = center_x - (slave_width * 0.3)
-                                target_y1 = center_y
-                                target_x2 = center_x + (slave_width * 0.3)
-                                target_y2 = center_y
-                            elif main_orientation == "landscape" and slave_orientation == "portrait":
-                                # 从设备需要向下滑动
-                                target_x1 = center_x
-                                target_y1 = center_y - (slave_height * 0.3)
-                                target_x2 = center_x
-                                target_y2 = center_y + (slave_height * 0.3)
-                            else:
-                                # 相同方向
-                                target_x1 = center_x
-                                target_y1 = center_y - (slave_height * 0.3)
-                                target_x2 = center_x
-                                target_y2 = center_y + (slave_height * 0.3)
-                    
-                    # 调整为整数坐标
-                    target_x1 = int(target_x1)
-                    target_y1 = int(target_y1)
-                    target_x2 = int(target_x2)
-                    target_y2 = int(target_y2)
-                    
-                    # 确保坐标在屏幕范围内
-                    target_x1 = max(1, min(target_x1, slave_width - 1))
-                    target_y1 = max(1, min(target_y1, slave_height - 1))
-                    target_x2 = max(1, min(target_x2, slave_width - 1))
-                    target_y2 = max(1, min(target_y2, slave_height - 1))
-                    
-                    # 添加小随机偏移
-                    offset_x = random.randint(-10, 10)
-                    offset_y = random.randint(-10, 10)
-                    
-                    target_x1 += offset_x
-                    target_y1 += offset_y
-                    target_x2 += offset_x
-                    target_y2 += offset_y
-                    
-                    # 确保坐标在屏幕范围内
-                    target_x1 = max(1, min(target_x1, slave_width - 1))
-                    target_y1 = max(1, min(target_y1, slave_height - 1))
-                    target_x2 = max(1, min(target_x2, slave_width - 1))
-                    target_y2 = max(1, min(target_y2, slave_height - 1))
-                    
-                    console_log(f"同步滑动到设备{slave_id}: ({target_x1}, {target_y1}) -> ({target_x2}, {target_y2})")
-                    
-                    # 执行滑动命令
-                    result = self.send_touch_event(
-                        slave_id, 
-                        (target_x1, target_y1, target_x2, target_y2), 
-                        None,
-                        "swipe"
-                    )
-                else:
-                    console_log(f"未知的操作类型: {action}", "WARN")
-                    result = False
-                    
-                if result:
-                    success_count += 1
-                else:
-                    # 命令失败，记录失败设备
-                    failed_devices.append(slave_id)
-                    # 尝试智能重试
-                    console_log(f"设备{slave_id}命令失败，尝试重试...", "WARN")
-                    # 等待一小段时间后重试
-                    time.sleep(1.0)
-                    if action == "tap":
-                        # 尝试点击屏幕附近位置
-                        retry_x = target_x + random.randint(-15, 15)
-                        retry_y = target_y + random.randint(-15, 15)
-                        result = self.send_touch_event(slave_id, retry_x, retry_y, "tap")
-                        if result:
-                            console_log(f"设备{slave_id}重试成功: ({retry_x}, {retry_y})")
-                            success_count += 1
-                            failed_devices.remove(slave_id)
-            except Exception as e:
-                failed_devices.append(slave_id)
-                console_log(f"同步操作到设备 {slave_id} 出错: {e}", "ERROR")
-            
-            # 每个设备操作后等待一小段时间，避免并发命令可能的问题
-            if device_idx < len(slave_device_ids) - 1:
-                time.sleep(0.5)
+        else:
+            console_log(f"未知的操作类型: {action}", "WARN")
+            return False
+
+        main_width, main_height = display_size(main_geometry["size"], main_geometry["rotation"])
+        ratios = ", ".join(f"({px / main_width:.2f}, {py / main_height:.2f})" for px, py in points)
+        console_log(f"主设备{action}坐标比例: {ratios}")
+
+        workers = max(1, min(max_workers or len(slave_device_ids), self.SYNC_MAX_WORKERS))
+        events = self._build_sync_events(main_geometry, slave_device_ids, points, action, workers)
+
+        if concurrent:
+            results = self._fan_out_sync(
+                slave_device_ids, events,
+                workers=workers,
+                device_timeout=device_timeout,
+                retry_delay=0.2 if retry_delay is None else retry_delay,
+            )
+        else:
+            # 等待一小段时间，确保主设备上的操作完全完成
+            time.sleep(0.5)
+
+            # 向每个从设备按顺序发送触摸事件
+            results = {}
+            dispatch_start = time.perf_counter()
+            for device_idx, slave_id in enumerate(slave_device_ids):
+                results[slave_id] = self._sync_to_slave(
+                    slave_id, events.get(slave_id),
+                    dispatch_start=dispatch_start,
+                    deadline=time.perf_counter() + device_timeout,
+                    retry_delay=1.0 if retry_delay is None else retry_delay,
+                )
+                # 每个设备操作后等待一小段时间，避免并发命令可能的问题
+                if device_idx < len(slave_device_ids) - 1:
+                    time.sleep(0.5)
                 
         # 计算总耗时
         elapsed_time = time.time() - start_time
+        failed_devices = [device_id for device_id, result in results.items() if not result["success"]]
+        success_count = len(results) - len(failed_devices)
+        latencies = [result["latency_ms"] for result in results.values() if result["success"]]
+        spread_ms = (max(latencies) - min(latencies)) if latencies else 0.0
+        self.last_sync_report = {
+            "action": action,
+            "mode": "concurrent" if concurrent else "sequential",
+            "elapsed_ms": elapsed_time * 1000,
+            "spread_ms": spread_ms,
+            "devices": results,
+        }
         
         # 完整的结果报告
+        if latencies:
+            console_log(
+                f"各设备下发耗时: 最快 {min(latencies):.0f} ms，最慢 {max(latencies):.0f} ms，离散 {spread_ms:.0f} ms"
+            )
         if failed_devices:
             console_log(f"同步操作完成，耗时 {elapsed_time:.2f}秒，成功率: {success_count}/{len(slave_device_ids)}", "WARN")
             console_log(f"失败设备: {', '.join(failed_devices)}", "WARN")
@@ -1228,7 +1140,173 @@ class ScrcpyController:
         else:
             console_log(f"同步操作完成，耗时 {elapsed_time:.2f}秒，全部成功")
             return True
+
+    def _build_sync_events(self, main_geometry, slave_device_ids, points, action, workers):
+        """一次性把主设备手势点映射到所有从设备。
+
+        Returns:
+            dict: {设备ID: (x, y, action)}，可直接传给 send_touch_event；
+                  swipe 时 x 为 (x1, y1, x2, y2)、y 为 None；获取尺寸失败的设备为 None
+        """
+        if self.geometry_cache.active:
+            geometries = {slave_id: self.geometry_cache.get(slave_id) for slave_id in slave_device_ids}
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sync-geometry") as executor:
+                geometries = dict(zip(slave_device_ids, executor.map(self.geometry_cache.fetch, slave_device_ids)))
+
+        events = {}
+        available = {}
+        for slave_id, geometry in geometries.items():
+            if not geometry:
+                console_log(f"无法获取从设备 {slave_id} 屏幕尺寸", "WARN")
+                events[slave_id] = None
+                continue
+            if geometry["orientation"] != main_geometry["orientation"]:
+                console_log(f"设备 {slave_id} 的屏幕方向({geometry['orientation']})与主设备({main_geometry['orientation']})不一致", "WARN")
+            available[slave_id] = geometry
+
+        mapped = self._get_sync_mapper(main_geometry, available).map_points(points)
+
+        # 添加少量随机偏移，避免完全相同的点击位置；滑动整体平移
+        jitter = 5 if action in ("tap", "long") else 10
+        for slave_id, device_points in mapped.items():
+            width, height = display_size(available[slave_id]["size"], available[slave_id]["rotation"])
+            offset_x = random.randint(-jitter, jitter)
+            offset_y = random.randint(-jitter, jitter)
+            device_points = [
+                (max(1, min(px + offset_x, width - 1)), max(1, min(py + offset_y, height - 1)))
+                for px, py in device_points
+            ]
+            if action == "swipe":
+                (x1, y1), (x2, y2) = device_points
+                console_log(f"同步滑动到设备{slave_id}: ({x1}, {y1}) -> ({x2}, {y2})")
+                events[slave_id] = ((x1, y1, x2, y2), None, "swipe")
+            else:
+                target_x, target_y = device_points[0]
+                console_log(f"同步{action}事件到设备{slave_id}: ({target_x}, {target_y})")
+                events[slave_id] = (target_x, target_y, action)
+        return events
+
+    def _get_sync_mapper(self, main_geometry, slave_geometries):
+        """按几何信息复用已构建的坐标映射器，尺寸或方向变化时重建。"""
+        key = (
+            (main_geometry["size"], main_geometry["rotation"], main_geometry["orientation"]),
+            tuple(
+                (slave_id, geometry["size"], geometry["rotation"], geometry["orientation"])
+                for slave_id, geometry in slave_geometries.items()
+            ),
+        )
+        if self._sync_mapper is None or self._sync_mapper[0] != key:
+            self._sync_mapper = (key, CoordinateMapper.from_geometry(main_geometry, slave_geometries))
+        return self._sync_mapper[1]
+
+    def _fan_out_sync(self, slave_device_ids, events, workers, device_timeout=10.0, retry_delay=0.2):
+        """在有界线程池中并发下发同步事件，超过截止时间的设备记为超时。"""
+        dispatch_start = time.perf_counter()
+        deadline = dispatch_start + device_timeout
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sync-touch")
+        futures = {
+            executor.submit(
+                self._sync_to_slave, slave_id, events.get(slave_id),
+                dispatch_start, deadline, retry_delay,
+            ): slave_id
+            for slave_id in slave_device_ids
+        }
+
+        results = {}
+        try:
+            for future in as_completed(futures, timeout=max(0.0, deadline - time.perf_counter()) + 1.0):
+                results[futures[future]] = future.result()
+        except FuturesTimeoutError:
+            pass
+        finally:
+            # 不等待仍在执行的慢设备，避免拖住整组
+            executor.shutdown(wait=False)
+
+        for future, slave_id in futures.items():
+            if slave_id not in results:
+                future.cancel()
+                console_log(f"设备 {slave_id} 超过 {device_timeout:.1f} 秒未完成同步", "WARN")
+                results[slave_id] = {
+                    "success": False,
+                    "attempts": 0,
+                    "latency_ms": (time.perf_counter() - dispatch_start) * 1000,
+                    "error": "timeout",
+                }
+        # 按传入顺序返回，便于日志比对
+        return {slave_id: results[slave_id] for slave_id in slave_device_ids}
+
+    def _sync_to_slave(self, slave_id, event, dispatch_start, deadline, retry_delay):
+        """下发一台从设备的同步事件，失败时在截止时间内重试一次。
+
+        Returns:
+            dict: success、attempts、latency_ms（自开始下发起到该设备完成的耗时）、error
+        """
+        result = {"success": False, "attempts": 0, "latency_ms": 0.0, "error": ""}
+        try:
+            if event is None:
+                result["error"] = "无法获取屏幕尺寸"
+                return result
+
+            target_x, target_y, event_action = event
+            remaining = deadline - time.perf_counter()
+            result["attempts"] = 1
+            success = remaining > 0 and self.send_touch_event(
+                slave_id, target_x, target_y, event_action, timeout=remaining
+            )
+            if not success and event_action == "tap":
+                console_log(f"设备{slave_id}命令失败，尝试重试...", "WARN")
+                if deadline - time.perf_counter() > retry_delay:
+                    time.sleep(retry_delay)
+                    # 尝试点击屏幕附近位置
+                    retry_x = target_x + random.randint(-15, 15)
+                    retry_y = target_y + random.randint(-15, 15)
+                    result["attempts"] = 2
+                    success = self.send_touch_event(
+                        slave_id, retry_x, retry_y, "tap",
+                        timeout=max(0.1, deadline - time.perf_counter()),
+                    )
+                    if success:
+                        console_log(f"设备{slave_id}重试成功: ({retry_x}, {retry_y})")
+            result["success"] = bool(success)
+            if not success:
+                result["error"] = "命令失败" if deadline > time.perf_counter() else "timeout"
+        except Exception as e:
+            result["error"] = str(e)
+            console_log(f"同步操作到设备 {slave_id} 出错: {e}", "ERROR")
+        finally:
+            result["latency_ms"] = (time.perf_counter() - dispatch_start) * 1000
+        return result
+
+    def get_screen_rotation(self, device_id):
+        """获取设备当前旋转方向
         
+        Args:
+            device_id (str): 设备ID
+            
+        Returns:
+            int: 0-3 对应 0/90/180/270 度，无法判断时返回 None
+        """
+        try:
+            # 只取方向所在行，避免在常驻会话中传输完整的 dumpsys 输出
+            result = self._run_shell("dumpsys", "input", "|", "grep", "SurfaceOrientation", device_id=device_id, timeout=3)
+            match = re.search(r'SurfaceOrientation: (\d)', result.stdout or "")
+            return int(match.group(1)) if match else None
+        except Exception as e:
+            console_log(f"获取设备 {device_id} 旋转方向失败: {e}", "ERROR")
+            return None
+
+    def get_screen_density(self, device_id):
+        """获取设备屏幕密度（dpi），优先返回 Override density，失败返回 None"""
+        try:
+            result = self._run_shell("wm", "density", device_id=device_id, timeout=3)
+            output = result.stdout or ""
+            match = re.search(r'Override density: (\d+)', output) or re.search(r'Physical density: (\d+)', output)
+            return int(match.group(1)) if match else None
+        except Exception as e:
+            console_log(f"获取设备 {device_id} 屏幕密度失败: {e}", "ERROR")
+            return None
+
     def get_screen_orientation(self, device_id):
         """获取设备屏幕方向
         
@@ -1239,23 +1317,12 @@ class ScrcpyController:
             str: 'portrait'或'landscape'
         """
         try:
-            kwargs = {}
-            if self.system == 'Windows':
-                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-            result = subprocess.run(
-                self._adb_command("shell", "dumpsys", "input", device_id=device_id),
-                capture_output=True,
-                text=True,
-                check=False,
-                timeout=3,
-                **kwargs
-            )
-            output = result.stdout or ""
+            rotation = self.get_screen_rotation(device_id)
             
             # 检查输出中的方向信息
-            if "SurfaceOrientation: 0" in output or "SurfaceOrientation: 2" in output:
+            if rotation in (0, 2):
                 return "portrait"
-            elif "SurfaceOrientation: 1" in output or "SurfaceOrientation: 3" in output:
+            elif rotation in (1, 3):
                 return "landscape"
             else:
                 # 如果无法通过dumpsys判断，尝试通过分辨率判断
@@ -1271,6 +1338,12 @@ class ScrcpyController:
             console_log(f"获取设备 {device_id} 屏幕方向失败: {e}", "ERROR")
             return "portrait"  # 默认返回竖屏方向
 
+    def _get_sync_geometry(self, device_id):
+        """群控会话中读取几何缓存，未建立桥接时直接查询设备。"""
+        if self.geometry_cache.active:
+            return self.geometry_cache.get(device_id)
+        return self.geometry_cache.fetch(device_id)
+
     def create_sync_control_bridge(self, main_device_id, slave_device_ids):
         """
         建立主控设备和从设备之间的控制桥接
@@ -1303,13 +1376,14 @@ class ScrcpyController:
             self.sync_control_main_device = main_device_id
             self.sync_control_slave_devices = slave_device_ids.copy()
             
-            # 可以在这里初始化一些群控预设或者特定设备的映射关系
+            # 预热几何缓存并启动旋转探测，后续同步事件不再查询尺寸和方向
+            self.geometry_cache.start(all_devices)
+            geometry = self.geometry_cache.snapshot()
             self.device_mapping = {}
             
+            main_size = geometry.get(main_device_id, {}).get("size")
             for slave_id in slave_device_ids:
-                # 获取主设备和从设备信息
-                main_size = self.get_screen_size(main_device_id)
-                slave_size = self.get_screen_size(slave_id)
+                slave_size = geometry.get(slave_id, {}).get("size")
                 
                 if main_size and slave_size:
                     # 记录屏幕尺寸映射关系
@@ -1325,4 +1399,12 @@ class ScrcpyController:
             
         except Exception as e:
             console_log(f"建立群控桥接时出错: {e}", "ERROR")
-            return False 
\ No newline at end of file
+            return False
+
+    def close_sync_control_bridge(self):
+        """结束群控会话，停止旋转探测并清空几何缓存。"""
+        self.geometry_cache.stop()
+        self.geometry_cache.invalidate()
+        self.sync_control_main_device = None
+        self.sync_control_slave_devices = []
+        self.device_mapping = {}
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+from collections import deque
+
+from PyQt5.QtCore import QProcess, QTimer
+
+from utils import console_log
+
+"""
+scrcpy 会话守护。
+
+墙面展示等无人值守场景中，USB 抖动会让 scrcpy 退出，之后一直无人重启。
+SessionSupervisor 在启用后接管异常退出的会话：
+1. 仅在异常退出（退出码非 0 或崩溃）时重启，用户关闭窗口或主动停止不会重启
+2. 设备重新出现在设备列表中才重启；设备回来时退避已过则立即重启
+3. 重启间隔按指数退避，稳定运行一段时间后退避清零
+4. 短时间内崩溃次数过多视为崩溃循环，暂停守护直到用户手动重新投屏
+录屏会话不自动重启，避免覆盖已有录像文件。
+"""
+
+
+class SessionSupervisor:
+    """记录每个会话的重启次数与运行时长，并按退避策略重启异常退出的会话（在 Qt 主线程中使用）。"""
+
+    def __init__(self, launch, is_available, log=None, base_delay=0.5, max_delay=30.0,
+                 stable_after=30.0, crash_window=120.0, max_crashes=5):
+        """
+        Args:
+            launch (callable): launch(device_id, command) 重新启动会话
+            is_available (callable): is_available(device_id) 判断设备当前是否可用
+            log (callable): 日志输出函数，默认输出到控制台
+            base_delay (float): 首次重启前的最短间隔（秒）
+            max_delay (float): 退避间隔上限（秒）
+            stable_after (float): 单次运行超过该时长视为稳定，退避清零
+            crash_window (float): 统计崩溃循环的时间窗口（秒）
+            max_crashes (int): 时间窗口内允许的最多异常退出次数
+        """
+        self.launch = launch
+        self.is_available = is_available
+        self.log = log or console_log
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.crash_window = crash_window
+        self.max_crashes = max_crashes
+        self.enabled = False
+        self.sessions = {}
+        self._relaunching = set()
+
+    def watch(self, device_id, command):
+        """登记新启动的会话；由守护发起的重启沿用原有统计。"""
+        now = time.monotonic()
+        session = self.sessions.get(device_id)
+        if session is None or device_id not in self._relaunching:
+            session = {
+                "command": list(command),
+                "state": "running",
+                "restarts": 0,
+                "failures": 0,
+                "crashes": deque(),
+                "uptime": 0.0,
+                "started_at": now,
+                "exited_at": None,
+                "retry_at": 0.0,
+            }
+            self.sessions[device_id] = session
+        self._relaunching.discard(device_id)
+        session["state"] = "running"
+        session["started_at"] = now
+        if "--record" in command:
+            session["state"] = "unsupervised"
+
+    def release(self, device_id):
+        """用户主动停止时调用，之后该会话退出不再重启。"""
+        session = self.sessions.get(device_id)
+        if session is not None:
+            self._close_run(session)
+            session["state"] = "stopped"
+
+    def on_exit(self, device_id, exit_code, exit_status):
+        session = self.sessions.get(device_id)
+        if session is None or session["state"] != "running":
+            if session is not None:
+                self._close_run(session)
+            return
+        run_seconds = self._close_run(session)
+        if exit_code == 0 and exit_status == QProcess.NormalExit:
+            session["state"] = "stopped"
+            return
+        if not self.enabled:
+            session["state"] = "stopped"
+            return
+
+        now = time.monotonic()
+        crashes = session["crashes"]
+        crashes.append(now)
+        while crashes and now - crashes[0] > self.crash_window:
+            crashes.popleft()
+        if len(crashes) >= self.max_crashes:
+            session["state"] = "suppressed"
+            self.log(f"设备 {device_id} 在 {self.crash_window:.0f} 秒内异常退出 {len(crashes)} 次，已暂停自动重连")
+            return
+
+        session["failures"] = 1 if run_seconds >= self.stable_after else session["failures"] + 1
+        delay = min(self.max_delay, self.base_delay * (2 ** (session["failures"] - 1)))
+        session["state"] = "waiting"
+        session["retry_at"] = now + delay
+        self.log(f"设备 {device_id} 的投屏异常退出 (代码: {exit_code})，设备重新可用后将在 {delay:.1f} 秒内自动重连")
+        QTimer.singleShot(int(delay * 1000), lambda dev=device_id: self._try_restart(dev))
+
+    def notify_devices(self, available_ids):
+        """设备列表刷新后调用，设备重新出现且退避已过的会话立即重启。"""
+        if not self.enabled:
+            return
+        available = set(available_ids)
+        for device_id, session in list(self.sessions.items()):
+            if session["state"] == "waiting" and device_id in available:
+                self._try_restart(device_id)
+
+    def _try_restart(self, device_id):
+        session = self.sessions.get(device_id)
+        if not self.enabled or session is None or session["state"] != "waiting":
+            return
+        if time.monotonic() < session["retry_at"]:
+            return
+        try:
+            available = self.is_available(device_id)
+        except Exception:
+            available = False
+        if not available:
+            return
+
+        down_seconds = time.monotonic() - (session["exited_at"] or time.monotonic())
+        session["restarts"] += 1
+        session["state"] = "restarting"
+        self._relaunching.add(device_id)
+        try:
+            self.launch(device_id, session["command"])
+        except Exception as e:
+            self._relaunching.discard(device_id)
+            session["restarts"] -= 1
+            session["state"] = "waiting"
+            session["retry_at"] = time.monotonic() + self.max_delay
+            self.log(f"设备 {device_id} 自动重连失败: {e}，{self.max_delay:.0f} 秒后重试")
+            QTimer.singleShot(int(self.max_delay * 1000), lambda dev=device_id: self._try_restart(dev))
+            return
+        self.log(f"设备 {device_id} 已自动重连（第 {session['restarts']} 次，中断 {down_seconds:.1f} 秒）")
+
+    def _close_run(self, session):
+        if session["started_at"] is None:
+            return 0.0
+        now = time.monotonic()
+        run_seconds = now - session["started_at"]
+        session["uptime"] += run_seconds
+        session["started_at"] = None
+        session["exited_at"] = now
+        return run_seconds
+
+    def get_stats(self):
+        """返回 {设备ID: {state, restarts, uptime}}，uptime 含当前这次运行。"""
+        now = time.monotonic()
+        return {
+            device_id: {
+                "state": session["state"],
+                "restarts": session["restarts"],
+                "uptime": session["uptime"] + ((now - session["started_at"]) if session["started_at"] else 0.0),
+            }
+            for device_id, session in self.sessions.items()
+        }
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import platform
+import queue
+import subprocess
+import threading
+import time
+import uuid
+
+from utils import console_log
+
+"""
+常驻 adb shell 会话池。
+
+每台设备保持一个长期运行的 `adb shell` 进程，命令写入其标准输入，
+输出以唯一的结束标记 + 退出码分帧：
+    ( <command> ) </dev/null 2>&1; echo <sentinel> $?
+命令放在子 shell 中，重定向作用于整条命令，不会只接到管道的最后一段上。
+群控时每次点击只需写入几十个字节，不再为每条命令启动一个 adb 进程。
+"""
+
+
+class ShellSessionError(Exception):
+    """会话无法建立或命令未能写入（命令尚未下发，调用方可安全回退）。"""
+
+
+class ShellSession:
+    """单台设备上的常驻 adb shell。"""
+
+    def __init__(self, adb_path, device_id=None, server_args=(), server_env=None):
+        self.adb_path = adb_path
+        self.device_id = device_id
+        self.server_args = list(server_args)
+        self.server_env = dict(server_env or {})
+        self.process = None
+        self.last_used = time.time()
+        self._lines = queue.Queue()
+        self._lock = threading.Lock()
+        self._reader = None
+
+    def start(self):
+        cmd = [self.adb_path, *self.server_args]
+        if self.device_id:
+            cmd.extend(["-s", self.device_id])
+        cmd.append("shell")
+
+        kwargs = {}
+        if platform.system() == 'Windows':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        # 分片 server 未运行时 adb 会自动拉起它，需带上禁用 USB 的环境变量
+        if self.server_env:
+            kwargs['env'] = {**os.environ, **self.server_env}
+        try:
+            self.process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0,
+                **kwargs
+            )
+        except OSError as e:
+            raise ShellSessionError(f"无法启动 adb shell: {e}")
+
+        self._lines = queue.Queue()
+        self._reader = threading.Thread(
+            target=self._read_output,
+            args=(self.process, self._lines),
+            name=f"adb-shell-{self.device_id or 'default'}",
+            daemon=True,
+        )
+        self._reader.start()
+
+    @staticmethod
+    def _read_output(process, lines):
+        for line in iter(process.stdout.readline, b""):
+            lines.put(line)
+        lines.put(None)
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def run(self, command, timeout=None):
+        """执行一条命令，返回 (退出码, 输出字节)。
+
+        写入失败时抛出 ShellSessionError；命令已下发后超时或会话断开时
+        抛出 subprocess.TimeoutExpired，并关闭会话避免后续输出错位。
+        """
+        with self._lock:
+            if not self.is_alive():
+                raise ShellSessionError("adb shell 会话已退出")
+
+            sentinel = f"__SCRCPY_GUI_END_{uuid.uuid4().hex}__"
+            payload = f"( {command} ) </dev/null 2>&1; echo {sentinel} $?\n".encode("utf-8")
+            try:
+                self.process.stdin.write(payload)
+                self.process.stdin.flush()
+            except (OSError, ValueError) as e:
+                self.close()
+                raise ShellSessionError(f"写入 adb shell 失败: {e}")
+
+            self.last_used = time.time()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            marker = sentinel.encode("ascii")
+            output = []
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.close()
+                    raise subprocess.TimeoutExpired(command, timeout)
+                try:
+                    line = self._lines.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    self.close()
+                    raise subprocess.TimeoutExpired(command, timeout)
+
+                # 部分 shell 在命令无换行输出时会把结束标记拼在同一行
+                index = line.find(marker)
+                if index < 0:
+                    output.append(line)
+                    continue
+                if index:
+                    output.append(line[:index])
+                try:
+                    exit_code = int(line[index + len(marker):].strip() or 0)
+                except ValueError:
+                    exit_code = 1
+                self.last_used = time.time()
+                return exit_code, b"".join(output)
+
+    def close(self):
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        if process.poll() is None:
+            try:
+                process.terminate()
+                process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                try:
+                    process.kill()
+                except OSError:
+                    pass
+
+
+class ShellSessionPool:
+    """按设备管理常驻 adb shell，自动重连并回收空闲会话。"""
+
+    def __init__(self, adb_path="adb", idle_timeout=120.0, server_args=None, server_env=None):
+        """server_args(device_id) 返回路由到设备所在 adb server 的全局参数（如 -P 端口），
+        server_env(device_id) 返回访问该 server 时需要追加的环境变量。"""
+        self.adb_path = adb_path
+        self.idle_timeout = idle_timeout
+        self.server_args = server_args
+        self.server_env = server_env
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._janitor = None
+
+    def run(self, device_id, command, timeout=None):
+        """在设备的常驻会话中执行命令，返回 (退出码, 输出字节, 耗时秒)。
+
+        会话已断开时自动重建一次；仍无法下发时抛出 ShellSessionError。
+        """
+        for attempt in range(2):
+            session = self._get_session(device_id)
+            start_time = time.perf_counter()
+            try:
+                exit_code, output = session.run(command, timeout=timeout)
+            except ShellSessionError:
+                self._discard(device_id, session)
+                if attempt:
+                    raise
+                continue
+            except subprocess.TimeoutExpired:
+                self._discard(device_id, session)
+                raise
+            return exit_code, output, time.perf_counter() - start_time
+
+    def _get_session(self, device_id):
+        key = device_id or ""
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and session.is_alive():
+                return session
+            if session is not None:
+                console_log(f"设备 {device_id or '默认'} 的 adb shell 会话已断开，正在重连", "WARN")
+                session.close()
+            session = ShellSession(
+                self.adb_path, device_id,
+                self.server_args(device_id) if self.server_args else (),
+                self.server_env(device_id) if self.server_env else None,
+            )
+            session.start()
+            self._sessions[key] = session
+            self._ensure_janitor()
+            return session
+
+    def _discard(self, device_id, session):
+        key = device_id or ""
+        with self._lock:
+            if self._sessions.get(key) is session:
+                del self._sessions[key]
+        session.close()
+
+    def _ensure_janitor(self):
+        if self._janitor and self._janitor.is_alive():
+            return
+        self._stop_event.clear()
+        self._janitor = threading.Thread(target=self._evict_loop, name="adb-shell-janitor", daemon=True)
+        self._janitor.start()
+
+    def _evict_loop(self):
+        interval = max(1.0, min(self.idle_timeout / 4, 30.0))
+        while not self._stop_event.wait(interval):
+            self.evict_idle()
+
+    def evict_idle(self):
+        """关闭超过 idle_timeout 未使用的会话。"""
+        now = time.time()
+        with self._lock:
+            idle = [
+                (key, session) for key, session in self._sessions.items()
+                if now - session.last_used > self.idle_timeout or not session.is_alive()
+            ]
+            for key, _ in idle:
+                del self._sessions[key]
+        for key, session in idle:
+            session.close()
+            console_log(f"已回收设备 {key or '默认'} 的空闲 adb shell 会话")
+
+    def close_all(self):
+        self._stop_event.set()
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import time
+from collections import deque
+
+from process_telemetry import RingBuffer
+
+"""
+scrcpy 输出中的投屏统计解析。
+
+以 --print-fps 启动时 scrcpy 每秒输出一行 `INFO: 58 fps` 或 `INFO: 57 fps (+3 frames skipped)`。
+StreamStatsParser 按设备流式解析输出（保留未换行的片段等待下一块数据）：
+1. 帧率与跳帧数写入定长环形缓冲区，形成每台设备的时间序列
+2. 编码器选择、编码重试/失败与分辨率（Texture/New texture）消息记入事件列表
+3. 以上统计行从返回文本中剔除（编码错误除外），其余输出原样返回给主日志
+"""
+
+FPS_RE = re.compile(r'\b(\d+) fps(?: \(\+(\d+) frames? skipped\))?')
+TEXTURE_RE = re.compile(r'\b(?:New texture|Texture): (\d+)x(\d+)')
+ENCODER_RE = re.compile(r"Using (?:video )?encoder: '([^']+)'")
+ENCODER_EVENT_RE = re.compile(r'encod|Retrying with', re.IGNORECASE)
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values, width=30):
+    """把最近 width 个数值画成字符火花线。"""
+    values = list(values)[-width:]
+    if not values:
+        return ""
+    top = max(values) or 1.0
+    return "".join(SPARK_CHARS[min(len(SPARK_CHARS) - 1, int(value / top * (len(SPARK_CHARS) - 1)))] for value in values)
+
+
+class StreamStatsParser:
+    """按设备解析 scrcpy 输出中的帧率、跳帧、编码器与分辨率信息。"""
+
+    def __init__(self, capacity=300, max_events=20):
+        """
+        Args:
+            capacity (int): 每台设备保留的帧率采样数（--print-fps 每秒一条）
+            max_events (int): 每台设备保留的编码器/分辨率事件数
+        """
+        self.capacity = capacity
+        self.max_events = max_events
+        self._devices = {}
+
+    def _state(self, device_id):
+        state = self._devices.get(device_id)
+        if state is None:
+            state = self._devices[device_id] = {
+                "fps": RingBuffer(self.capacity),
+                "skipped": RingBuffer(self.capacity),
+                "skipped_total": 0,
+                "encoder": "",
+                "resolution": "",
+                "events": deque(maxlen=self.max_events),
+                "partial": "",
+                "updated_at": None,
+            }
+        return state
+
+    def reset(self, device_id):
+        """设备重新启动投屏时清空历史。"""
+        self._devices.pop(device_id, None)
+
+    def feed(self, device_id, text):
+        """解析一块输出，返回需要写入主日志的剩余文本。"""
+        if not text:
+            return ""
+        state = self._state(device_id)
+        text = state["partial"] + text
+        lines = text.split("\n")
+        state["partial"] = lines.pop()
+        if len(state["partial"]) > 4096:
+            lines.append(state["partial"])
+            state["partial"] = ""
+        remaining = [line for line in lines if not self._consume(state, line.rstrip("\r"))]
+        return "\n".join(remaining)
+
+    def flush(self, device_id):
+        """进程结束时取出尚未换行的剩余输出。"""
+        state = self._devices.get(device_id)
+        if state is None:
+            return ""
+        partial, state["partial"] = state["partial"], ""
+        return partial if partial and not self._consume(state, partial.rstrip("\r")) else ""
+
+    def _consume(self, state, line):
+        """识别统计行并记录，返回是否已消化（不需要写入主日志）。"""
+        if not line.strip():
+            return False
+        match = FPS_RE.search(line)
+        if match:
+            skipped = int(match.group(2) or 0)
+            state["fps"].append(int(match.group(1)))
+            state["skipped"].append(skipped)
+            state["skipped_total"] += skipped
+            state["updated_at"] = time.time()
+            return True
+        match = TEXTURE_RE.search(line)
+        if match:
+            state["resolution"] = f"{match.group(1)}x{match.group(2)}"
+            self._event(state, f"分辨率 {state['resolution']}")
+            return True
+        match = ENCODER_RE.search(line)
+        if match:
+            state["encoder"] = match.group(1)
+            self._event(state, f"编码器 {state['encoder']}")
+            return True
+        if ENCODER_EVENT_RE.search(line):
+            self._event(state, line.strip())
+            # 编码错误仍写入主日志，便于及时发现
+            return "ERROR" not in line
+        return False
+
+    def _event(self, state, message):
+        state["events"].append((time.strftime("%H:%M:%S"), message))
+
+    def get_stats(self):
+        """返回 {设备ID: {fps, fps_avg, fps_min, skipped, skipped_total, encoder, resolution, history, events}}。"""
+        result = {}
+        for device_id, state in self._devices.items():
+            fps_values = state["fps"].values()
+            result[device_id] = {
+                "fps": state["fps"].last(),
+                "fps_avg": sum(fps_values) / len(fps_values) if fps_values else 0.0,
+                "fps_min": min(fps_values) if fps_values else 0.0,
+                "skipped": state["skipped"].last(),
+                "skipped_total": state["skipped_total"],
+                "encoder": state["encoder"],
+                "resolution": state["resolution"],
+                "history": fps_values,
+                "events": list(state["events"]),
+                "updated_at": state["updated_at"],
+            }
+        return result
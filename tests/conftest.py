@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """无界面的 QApplication，未安装 PyQt5 时跳过依赖 Qt 的测试。"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    widgets = pytest.importorskip("PyQt5.QtWidgets")
+    return widgets.QApplication.instance() or widgets.QApplication([])
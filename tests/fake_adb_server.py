@@ -0,0 +1,122 @@
+import socket
+import struct
+import threading
+
+"""
+测试用的脚本化 adb server。
+
+在本机随机端口监听，按 smart-socket 协议读取 4 位十六进制长度前缀的请求，
+交给脚本处理函数生成回复。处理函数返回 (回复字节, 是否保持连接)；
+host:transport: 这类切换请求保持连接，后续请求在同一连接上继续处理。
+"""
+
+
+def okay(data=None):
+    """OKAY，data 不为 None 时追加长度前缀的数据块。"""
+    return b"OKAY" + (b"" if data is None else length_prefixed(data))
+
+
+def fail(message):
+    return b"FAIL" + length_prefixed(message)
+
+
+def length_prefixed(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return f"{len(data):04x}".encode("ascii") + data
+
+
+def shell_v2_packets(stdout=b"", stderr=b"", exit_code=0):
+    packets = b""
+    if stdout:
+        packets += struct.pack("<BI", 1, len(stdout)) + stdout
+    if stderr:
+        packets += struct.pack("<BI", 2, len(stderr)) + stderr
+    return packets + struct.pack("<BI", 3, 1) + bytes([exit_code])
+
+
+class FakeAdbServer:
+    """按请求前缀分派的脚本化 adb server。"""
+
+    def __init__(self, handlers):
+        """
+        Args:
+            handlers (dict): {请求前缀: handler}，handler(request, state) 返回 (回复字节, 是否保持连接)；
+                state 为当前连接的字典，transport 切换后含 "serial"
+        """
+        self.handlers = handlers
+        self.requests = []
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(16)
+        self.port = self._sock.getsockname()[1]
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    def close(self):
+        self._closed = True
+        # 先 shutdown 唤醒阻塞在 accept 的线程并等待其退出，再释放 fd，
+        # 否则该线程可能在 fd 编号被下一个测试的 server 复用后继续 accept
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        if self._thread.is_alive():
+            self._thread.join(timeout=2)
+        self._sock.close()
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn, _addr = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        state = {}
+        with conn:
+            while True:
+                header = self._recv_exact(conn, 4)
+                if header is None:
+                    return
+                request = self._recv_exact(conn, int(header, 16)).decode("utf-8")
+                self.requests.append(request)
+                reply, keep_open = self._dispatch(request, state)
+                conn.sendall(reply)
+                if not keep_open:
+                    return
+
+    def _dispatch(self, request, state):
+        for prefix in sorted(self.handlers, key=len, reverse=True):
+            if request.startswith(prefix):
+                return self.handlers[prefix](request, state)
+        return fail(f"unknown host service: {request}"), False
+
+    @staticmethod
+    def _recv_exact(conn, size):
+        data = b""
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+
+def transport_handler(serials):
+    """只接受 serials 中设备的 host:transport: 处理函数。"""
+    def handle(request, state):
+        serial = request[len("host:transport:"):]
+        if serial not in serials:
+            return fail(f"device '{serial}' not found"), False
+        state["serial"] = serial
+        return okay(), True
+    return handle
@@ -0,0 +1,17 @@
+import time
+
+"""
+Qt 相关测试的辅助函数。
+"""
+
+
+def wait_until(app, predicate, timeout=5.0):
+    """处理 Qt 事件直到 predicate() 为真，超时返回 False。"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if predicate():
+            return True
+        time.sleep(0.01)
+    app.processEvents()
+    return predicate()
@@ -0,0 +1,101 @@
+from adaptive_quality import AdaptiveQualityController, AdaptiveQualityPolicy, build_quality_levels
+from runtime_helpers import scrcpy_option_value
+
+LEVELS = build_quality_levels(8, 1920, 60)
+
+# 合成采样：(fps, skipped, host_cpu)
+BEHIND = (45, 15, 40.0)        # 跳帧率 25%
+OVERLOADED = (60, 0, 95.0)
+HEALTHY = (60, 0, 30.0)
+MIDDLE = (58, 3, 70.0)         # 介于两组阈值之间
+
+
+def run(policy, trace):
+    """依次输入采样，执行每个决策，返回 [(采样序号, 方向, 目标档位)]。"""
+    decisions = []
+    for index, sample in enumerate(trace):
+        decision = policy.evaluate(*sample)
+        if decision:
+            policy.apply(decision)
+            decisions.append((index, decision["direction"], decision["level"]))
+    return decisions
+
+
+def test_levels_step_down_to_floor():
+    assert LEVELS[0] == {"bit_rate": 8.0, "max_size": 1920, "max_fps": 60}
+    assert LEVELS[1] == {"bit_rate": 5.6, "max_size": 1536, "max_fps": 48}
+    assert LEVELS[-1]["max_size"] >= 720 and LEVELS[-1]["max_fps"] >= 20 and LEVELS[-1]["bit_rate"] >= 1.0
+    floor = build_quality_levels(1, 720, 20)
+    assert floor == [{"bit_rate": 1.0, "max_size": 720, "max_fps": 20}]
+
+
+def test_degrades_after_consecutive_bad_samples():
+    policy = AdaptiveQualityPolicy(LEVELS)
+    assert run(policy, [BEHIND, BEHIND]) == []
+    assert run(policy, [BEHIND]) == [(0, "down", 1)]
+
+
+def test_overload_reason_and_metrics():
+    policy = AdaptiveQualityPolicy(LEVELS)
+    decisions = [policy.evaluate(*OVERLOADED) for _ in range(3)]
+    assert decisions[:2] == [None, None]
+    assert decisions[2]["reason"] == "主机 CPU 过载"
+    assert decisions[2]["metrics"]["host_cpu"] == 95.0
+
+
+def test_hysteresis_band_resets_counters():
+    policy = AdaptiveQualityPolicy(LEVELS)
+    trace = [BEHIND, BEHIND, MIDDLE, BEHIND, BEHIND, MIDDLE] * 5
+    assert run(policy, trace) == []
+    # 恢复时同样需要连续的健康采样
+    policy.level = 2
+    assert run(policy, ([HEALTHY] * 14 + [MIDDLE]) * 3) == []
+
+
+def test_cooldown_blocks_adjustments_after_a_switch():
+    policy = AdaptiveQualityPolicy(LEVELS, cooldown=5)
+    decisions = run(policy, [BEHIND] * 11)
+    # 第 3 个采样降档，之后 5 个采样处于冷却，再连续 3 个坏采样才再降
+    assert decisions == [(2, "down", 1), (10, "down", 2)]
+
+
+def test_recovers_one_level_at_a_time():
+    policy = AdaptiveQualityPolicy(LEVELS, cooldown=5)
+    trace = [BEHIND] * 3 + [HEALTHY] * 5 + [HEALTHY] * 15 + [HEALTHY] * 5 + [HEALTHY] * 15
+    assert run(policy, trace) == [(2, "down", 1), (22, "up", 0)]
+    assert policy.level == 0
+
+
+def test_floor_and_ceiling_are_clamped():
+    policy = AdaptiveQualityPolicy(LEVELS, cooldown=0)
+    run(policy, [BEHIND] * 100)
+    assert policy.level == len(LEVELS) - 1
+    assert policy.evaluate(*BEHIND) is None
+    run(policy, [HEALTHY] * 1000)
+    assert policy.level == 0
+    assert policy.evaluate(*HEALTHY) is None
+
+
+def test_no_metrics_is_ignored():
+    policy = AdaptiveQualityPolicy(LEVELS)
+    assert run(policy, [(None, 0, None)] * 10) == []
+
+
+def test_controller_relaunches_with_next_level():
+    relaunched = []
+    controller = AdaptiveQualityController(lambda device_id, command: relaunched.append((device_id, command)),
+                                           log=lambda _msg: None)
+    controller.enabled = True
+    command = ["scrcpy", "-s", "a", "--video-bit-rate", "8M", "--max-size", "1920", "--max-fps", "60"]
+    controller.watch("a", command)
+    controller.watch("rec", command + ["--record", "out.mp4"])
+    for _ in range(3):
+        controller.tick({"a": {"fps": 45, "skipped": 15, "host_cpu": 40.0},
+                         "rec": {"fps": 45, "skipped": 15, "host_cpu": 40.0}})
+    assert [device_id for device_id, _command in relaunched] == ["a"]
+    new_command = relaunched[0][1]
+    assert scrcpy_option_value(new_command, "--max-size") == "1536"
+    assert scrcpy_option_value(new_command, "--max-fps") == "48"
+    # 重启后的会话保留当前档位
+    controller.watch("a", new_command)
+    assert controller.get_stats() == {"a": 1}
@@ -0,0 +1,94 @@
+import socket
+
+import pytest
+
+from adb_client import (
+    AdbClient, AdbConnectionError, AdbDeviceError, AdbProtocolError, parse_device_lines,
+)
+from fake_adb_server import (
+    FakeAdbServer, fail, length_prefixed, okay, shell_v2_packets, transport_handler,
+)
+
+DEVICES_L = (
+    "emulator-5554          device product:sdk_gphone model:sdk_gphone64 device:emu64 transport_id:1\n"
+    "R58M12ABCDE            unauthorized usb:1-1.2 transport_id:2\n"
+)
+
+
+def test_parse_device_lines_skips_headers_and_reads_attrs():
+    text = "* daemon started successfully\nList of devices attached\n" + DEVICES_L + "\n"
+    assert parse_device_lines(text) == [
+        ("emulator-5554", "device",
+         {"product": "sdk_gphone", "model": "sdk_gphone64", "device": "emu64", "transport_id": "1"}),
+        ("R58M12ABCDE", "unauthorized", {"usb": "1-1.2", "transport_id": "2"}),
+    ]
+
+
+def test_devices_long():
+    with FakeAdbServer({"host:devices-l": lambda _req, _state: (okay(DEVICES_L), False)}) as server:
+        devices = AdbClient(port=server.port).devices_long()
+    assert [(device_id, status) for device_id, status, _attrs in devices] == [
+        ("emulator-5554", "device"), ("R58M12ABCDE", "unauthorized"),
+    ]
+    assert server.requests == ["host:devices-l"]
+
+
+def test_query_fail_raises_protocol_error():
+    with FakeAdbServer({"host:version": lambda _req, _state: (fail("closed"), False)}) as server:
+        with pytest.raises(AdbProtocolError, match="closed"):
+            AdbClient(port=server.port).query("host:version")
+
+
+def test_unreachable_server_is_transport_error():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    with pytest.raises(AdbConnectionError):
+        AdbClient(port=port, timeout=1).devices_long()
+
+
+def test_shell_v2_collects_streams_and_exit_code():
+    def shell(request, state):
+        assert state["serial"] == "emulator-5554"
+        assert request == "shell,v2,raw:wm size"
+        return okay() + shell_v2_packets(b"Physical size: 1080x2400\n", b"warn\n", exit_code=3), False
+
+    handlers = {"host:transport:": transport_handler({"emulator-5554"}), "shell,v2,": shell}
+    with FakeAdbServer(handlers) as server:
+        result = AdbClient(port=server.port).shell("emulator-5554", "wm size", timeout=2)
+    assert result == (3, b"Physical size: 1080x2400\n", b"warn\n")
+    assert server.requests == ["host:transport:emulator-5554", "shell,v2,raw:wm size"]
+
+
+def test_shell_falls_back_to_v1_when_v2_is_refused():
+    handlers = {
+        "host:transport:": transport_handler({"old-device"}),
+        "shell,v2,": lambda _req, _state: (fail("unsupported"), False),
+        "shell:": lambda _req, _state: (okay() + b"legacy output\n", False),
+    }
+    with FakeAdbServer(handlers) as server:
+        result = AdbClient(port=server.port).shell("old-device", "echo hi", timeout=2)
+    assert result == (None, b"legacy output\n", b"")
+
+
+def test_unknown_transport_is_device_error():
+    with FakeAdbServer({"host:transport:": transport_handler(set())}) as server:
+        with pytest.raises(AdbDeviceError, match="not found"):
+            AdbClient(port=server.port).shell("missing", "true", timeout=2)
+
+
+def test_track_devices_yields_each_snapshot():
+    snapshots = ["emulator-5554\tdevice transport_id:1\n", "emulator-5554\toffline transport_id:1\n", ""]
+
+    def track(_request, _state):
+        return okay() + b"".join(length_prefixed(item) for item in snapshots), False
+
+    with FakeAdbServer({"host:track-devices-l": track}) as server:
+        client = AdbClient(port=server.port)
+        with client.open_connection() as sock:
+            stream = client.track_devices(sock)
+            received = [next(stream) for _ in snapshots]
+            with pytest.raises(AdbProtocolError):
+                next(stream)
+    assert [[status for _id, status, _attrs in devices] for devices in received] == [["device"], ["offline"], []]
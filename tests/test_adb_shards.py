@@ -0,0 +1,109 @@
+import os
+import stat
+
+import pytest
+
+from adb_shards import ADB_SERVER_PORT_ENV, AdbShardManager
+from scrcpy_control import ScrcpyControlChannel
+from shell_session_pool import ShellSessionPool
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="需要 POSIX sh 模拟 adb")
+
+# 记录每次调用的参数与 ADB_USB 环境变量；devices 输出由 DEVICES 文件决定
+FAKE_ADB = """#!/bin/sh
+echo "$* ADB_USB=$ADB_USB" >> "{log}"
+case "$*" in
+  *devices*) echo "List of devices attached"; cat "{devices}" ;;
+esac
+exit 0
+"""
+
+
+@pytest.fixture
+def fake_adb(tmp_path):
+    log = tmp_path / "calls.log"
+    devices = tmp_path / "devices.txt"
+    devices.write_text("")
+    path = tmp_path / "adb"
+    path.write_text(FAKE_ADB.format(log=log, devices=devices))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path), log, devices
+
+
+def test_shard_servers_start_without_usb(fake_adb):
+    adb_path, log, _devices = fake_adb
+    shards = AdbShardManager(adb_path, 2)
+    assert shards.ensure_server(5038)
+    assert log.read_text().splitlines() == ["-P 5038 start-server ADB_USB=0", "-P 5038 devices ADB_USB=0"]
+    assert shards.server_environment(5038) == {ADB_SERVER_PORT_ENV: "5038", "ADB_USB": "0", "ADB_EMU": "0"}
+    assert shards.server_environment(5037) == {}
+
+
+def test_base_server_is_left_to_adb(fake_adb):
+    adb_path, log, _devices = fake_adb
+    shards = AdbShardManager(adb_path, 2)
+    assert shards.ensure_server(5037)
+    assert not log.exists()
+
+
+def test_shell_sessions_and_control_channels_start_shards_without_usb(fake_adb):
+    adb_path, log, _devices = fake_adb
+    shards = AdbShardManager(adb_path, 2)
+    shards.assign("10.0.0.2:5555", 5038)
+    pool = ShellSessionPool(adb_path, server_args=shards.server_args, server_env=shards.environment)
+    try:
+        pool._get_session("10.0.0.2:5555").process.wait(timeout=5)
+        pool._get_session("R58M12ABCDE").process.wait(timeout=5)
+    finally:
+        pool.close_all()
+    channel = ScrcpyControlChannel(adb_path, "10.0.0.2:5555", None, "2.4", (1080, 2400),
+                                   server_args=shards.server_args("10.0.0.2:5555"),
+                                   server_env=shards.environment("10.0.0.2:5555"))
+    channel._adb("forward", "--list")
+    assert log.read_text().splitlines() == [
+        "-P 5038 -s 10.0.0.2:5555 shell ADB_USB=0",
+        "-s R58M12ABCDE shell ADB_USB=",
+        "-P 5038 -s 10.0.0.2:5555 forward --list ADB_USB=0",
+    ]
+
+
+def test_shard_that_still_claims_usb_is_disabled(fake_adb):
+    adb_path, log, devices = fake_adb
+    devices.write_text("R58M12ABCDE\tdevice\n10.0.0.2:5555\tdevice\n")
+    shards = AdbShardManager(adb_path, 3)
+    assert not shards.ensure_server(5038)
+    assert "-P 5038 kill-server ADB_USB=" in log.read_text()
+    assert shards.active_ports == [5037, 5039]
+    assert not shards.ensure_server(5038)
+
+
+def test_shards_only_accept_network_devices():
+    shards = AdbShardManager("adb", 2)
+    assert shards.accepts("R58M12ABCDE", 5037)
+    assert shards.accepts("10.0.0.2:5555", 5038)
+    assert not shards.accepts("R58M12ABCDE", 5038)
+    shards.assign("R58M12ABCDE", 5038)
+    assert shards.port_for("R58M12ABCDE") == 5037
+    assert shards.environment("R58M12ABCDE") == {}
+
+
+def test_port_for_is_read_only_and_assign_balances():
+    shards = AdbShardManager("adb", 3)
+    assert shards.port_for("10.0.0.1:5555") == 5037
+    assert shards.get_stats() == {5037: 0, 5038: 0, 5039: 0}
+    ports = [shards.assign(f"10.0.0.{index}:5555") for index in range(1, 7)]
+    assert ports == [5037, 5038, 5039, 5037, 5038, 5039]
+    # 已分配的设备保持原分片，查询不改变分配
+    assert shards.assign("10.0.0.2:5555") == 5038
+    assert shards.port_for("10.0.0.2:5555") == 5038
+    assert shards.server_args("10.0.0.2:5555") == ["-P", "5038"]
+    assert shards.assign("10.0.0.2:5555", 5039) == 5039
+    assert shards.assign("10.0.0.2:5555", 6000) == 5039
+    shards.release("10.0.0.2:5555")
+    assert shards.port_for("10.0.0.2:5555") == 5037
+
+
+def test_single_shard_never_assigns():
+    shards = AdbShardManager("adb", 1)
+    assert shards.assign("10.0.0.1:5555") == 5037
+    assert shards.get_stats() == {5037: 0}
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import stat
+
+import pytest
+
+from async_controller import AsyncScrcpyController
+from scrcpy_controller import ScrcpyController
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="需要 POSIX sh 模拟 adb")
+
+FAKE_ADB = """#!/bin/sh
+echo "$*" >> "{log}"
+while [ "$1" = "-s" ] || [ "$1" = "-P" ]; do shift 2; done
+case "$*" in
+  "devices -l")
+    echo "List of devices attached"
+    echo "R58M12ABCDE    device usb:1-1.2 product:beyond1 model:SM_G973F device:beyond1 transport_id:3"
+    echo "10.0.0.7:5555  device product:raven device:raven transport_id:4"
+    echo "emulator-5554  offline transport_id:5"
+    ;;
+  "shell getprop")
+    echo "[ro.product.brand]: [google]"
+    echo "[ro.product.model]: [Pixel 6 Pro]"
+    echo "[ro.build.version.release]: [14]"
+    ;;
+esac
+"""
+
+
+@pytest.fixture
+def fake_adb(tmp_path):
+    log = tmp_path / "calls.log"
+    path = tmp_path / "adb"
+    path.write_text(FAKE_ADB.format(log=log))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path), log
+
+
+def test_statuses_match_sync_controller_shape(fake_adb):
+    adb_path, _log = fake_adb
+    entries = asyncio.run(AsyncScrcpyController(adb_path).get_device_statuses())
+    assert entries == [
+        {"device_id": "R58M12ABCDE", "status": "device", "model": "SM_G973F", "transport": "usb",
+         "transport_id": "3", "usb_bus": "1", "usb_path": "1.2"},
+        {"device_id": "10.0.0.7:5555", "status": "device", "model": "Pixel 6 Pro", "transport": "wifi",
+         "transport_id": "4", "usb_bus": None, "usb_path": None},
+        {"device_id": "emulator-5554", "status": "offline", "model": "离线设备", "transport": "usb",
+         "transport_id": "5", "usb_bus": None, "usb_path": None},
+    ]
+
+    sync = ScrcpyController(adb_path=adb_path, use_native_adb=False, use_shell_sessions=False)
+    sync_entries = {entry["device_id"]: entry for entry in sync.device_registry.refresh(0)}
+    # 型号已在 devices -l 中给出的条目与同步控制器完全一致（型号保留下划线）
+    assert sync_entries["R58M12ABCDE"] == entries[0]
+    assert sync_entries["emulator-5554"] == entries[2]
+    assert set(sync_entries["10.0.0.7:5555"]) == set(entries[1])
+    sync.close_shell_sessions()
+
+
+def test_get_devices_and_full_info(fake_adb):
+    adb_path, _log = fake_adb
+    controller = AsyncScrcpyController(adb_path)
+
+    async def scenario():
+        return await controller.get_devices(), await controller.get_device_full_info("10.0.0.7:5555")
+
+    devices, info = asyncio.run(scenario())
+    assert devices == [("R58M12ABCDE", "SM_G973F"), ("10.0.0.7:5555", "Pixel 6 Pro")]
+    assert info == {"brand": "google", "model": "Pixel 6 Pro", "android": "14", "id": "10.0.0.7:5555"}
+
+
+def test_commands_follow_shard_routing(fake_adb, tmp_path):
+    from adb_shards import AdbShardManager
+
+    adb_path, log = fake_adb
+    shards = AdbShardManager(adb_path, 2)
+    shards.assign("10.0.0.9:5555", 5038)
+    controller = AsyncScrcpyController(adb_path, shards=shards)
+
+    async def scenario():
+        await controller.send_key_event("10.0.0.9:5555", 4)
+        return await controller.get_device_statuses()
+
+    entries = asyncio.run(scenario())
+    calls = log.read_text().splitlines()
+    assert "-P 5038 -s 10.0.0.9:5555 shell input keyevent 4" in calls
+    assert "devices -l" in calls and "-P 5038 devices -l" in calls
+    # 分片上列出的 USB 设备不使用，网络设备在先扫描到的 server 上
+    assert [entry["device_id"] for entry in entries] == ["R58M12ABCDE", "10.0.0.7:5555", "emulator-5554"]
+
+
+def test_one_instance_survives_several_event_loops(fake_adb):
+    adb_path, _log = fake_adb
+    controller = AsyncScrcpyController(adb_path=adb_path, per_device_limit=1, host_limit=1)
+
+    async def contended():
+        # 名额为 1 时并发调用必然在信号量上等待，使信号量绑定到当前事件循环
+        calls = asyncio.gather(*(controller.get_device_brand("a") for _ in range(3)))
+        # 信号量仍绑定在上一个事件循环时这里会一直等待
+        return await asyncio.wait_for(calls, 10)
+
+    assert asyncio.run(contended()) == ["google"] * 3
+    assert asyncio.run(contended()) == ["google"] * 3
@@ -0,0 +1,183 @@
+import importlib
+import random
+
+import pytest
+
+import coordinate_mapper
+from coordinate_mapper import CoordinateMapper, build_transform, display_size
+
+# wm size 返回的自然方向物理尺寸：手机、窄屏手机、自然方向为横屏的平板、方屏
+SIZES = [(1080, 2400), (720, 1280), (1440, 3200), (2560, 1600), (1200, 1200)]
+
+
+@pytest.fixture(params=["python", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        try:
+            numpy = importlib.import_module("numpy")
+        except ImportError:
+            pytest.skip("未安装 numpy")
+        monkeypatch.setattr(coordinate_mapper, "_NUMPY_CACHE", numpy)
+    else:
+        monkeypatch.setattr(coordinate_mapper, "_NUMPY_CACHE", None)
+    return request.param
+
+
+def legacy_ratio_mapping(x, y, main_size, slave_size):
+    """原 sync_touch_from_main_to_slaves 在主从方向一致时的比例映射（不含随机偏移）。"""
+    main_width, main_height = main_size
+    slave_width, slave_height = slave_size
+    target_x = int(x / main_width * slave_width)
+    target_y = int(y / main_height * slave_height)
+    return max(1, min(target_x, slave_width - 1)), max(1, min(target_y, slave_height - 1))
+
+
+def random_points(rng, size, count=200):
+    width, height = size
+    return [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("rotation", [0, 1, 2, 3])
+def test_same_orientation_matches_legacy_ratio_mapping(backend, rotation):
+    rng = random.Random(rotation)
+    for main_size in SIZES:
+        slaves = {f"slave-{index}": {"size": size, "rotation": rotation} for index, size in enumerate(SIZES)}
+        mapper = CoordinateMapper.from_geometry({"size": main_size, "rotation": rotation}, slaves)
+        main_display = display_size(main_size, rotation)
+        points = random_points(rng, main_display)
+        mapped = mapper.map_points(points)
+        for device_id, geometry in slaves.items():
+            slave_display = display_size(geometry["size"], rotation)
+            for (x, y), (mx, my) in zip(points, mapped[device_id]):
+                lx, ly = legacy_ratio_mapping(x, y, main_display, slave_display)
+                # 浮点乘法顺序不同，在整数边界上最多相差 1 像素
+                assert abs(mx - lx) <= 1 and abs(my - ly) <= 1
+
+
+def test_unknown_rotation_keeps_natural_axes(backend):
+    # 自然方向为横屏的平板：旋转未知时不能因为宽大于高就交换坐标轴
+    tablet = {"size": (2560, 1600), "rotation": None, "orientation": "landscape"}
+    mapper = CoordinateMapper.from_geometry(tablet, {"tablet": dict(tablet), "phone": {"size": (1080, 2400)}})
+    mapped = mapper.map_points([(2000, 400)])
+    assert mapped["tablet"] == [(2000, 400)]
+    assert mapped["phone"] == [(843, 600)]
+
+
+@pytest.mark.parametrize("main_rotation", [0, 1, 2, 3])
+@pytest.mark.parametrize("slave_rotation", [0, 1, 2, 3])
+def test_rotation_round_trip(backend, main_rotation, slave_rotation):
+    rng = random.Random(main_rotation * 4 + slave_rotation)
+    main = {"size": (1080, 2400), "rotation": main_rotation}
+    slave = {"size": (1600, 2560), "rotation": slave_rotation}
+    forward = CoordinateMapper.from_geometry(main, {"slave": slave})
+    backward = CoordinateMapper.from_geometry(slave, {"main": main})
+    main_display = display_size(main["size"], main_rotation)
+    points = random_points(rng, main_display, count=50)
+    there = forward.map_points(points)["slave"]
+    back = backward.map_points(there)["main"]
+    for (x, y), (bx, by) in zip(points, back):
+        # 两次截断，每次在从设备上最多损失 1 像素，按尺寸比例放大后仍应在 3 像素内
+        assert abs(bx - x) <= 3 and abs(by - y) <= 3
+
+
+@pytest.mark.parametrize("delta", [0, 1, 2, 3])
+def test_center_is_fixed_and_corners_rotate(delta):
+    matrix = build_transform((0, 0, 100, 200), (0, 0, 300, 300), delta)
+
+    def apply(x, y):
+        return (matrix[0][0] * x + matrix[0][1] * y + matrix[0][2],
+                matrix[1][0] * x + matrix[1][1] * y + matrix[1][2])
+
+    assert apply(50, 100) == pytest.approx((150, 150))
+    # 每转 90 度执行 (u, v) -> (v, 1 - u)
+    u, v = 0.0, 0.0
+    for _ in range(delta):
+        u, v = v, 1 - u
+    assert apply(0, 0) == pytest.approx((u * 300, v * 300))
+
+
+def test_crop_and_display_offset():
+    mapper = CoordinateMapper()
+    mapper.add_device("slave", build_transform((100, 200, 500, 1000), (40, 80, 1000, 2000)), (1080, 2160))
+    assert mapper.map_points([(100, 200), (350, 700), (600, 1200)])["slave"] == [(40, 80), (540, 1080), (1040, 2080)]
+
+
+def test_results_are_clamped_inside_screen(backend):
+    mapper = CoordinateMapper.from_geometry({"size": (100, 100), "rotation": 0}, {"s": {"size": (50, 80), "rotation": 0}})
+    assert mapper.map_points([(-10, 500), (100, 100)])["s"] == [(1, 79), (49, 79)]
+
+
+@pytest.fixture
+def python_backend(monkeypatch):
+    """强制使用纯 Python 回退路径，并确保不会误入 numpy 路径。"""
+    monkeypatch.setattr(coordinate_mapper, "_NUMPY_CACHE", None)
+
+    def fail(*_args):
+        raise AssertionError("不应调用 numpy 路径")
+
+    monkeypatch.setattr(CoordinateMapper, "_map_points_numpy", fail)
+
+
+@pytest.mark.parametrize("slave_rotation, expected", [
+    (0, (270, 1200)),
+    (1, (1200, 810)),
+    (2, (810, 1200)),
+    (3, (1200, 270)),
+])
+def test_fallback_rotates_exactly(python_backend, slave_rotation, expected):
+    # (u, v) = (0.25, 0.5) 在二进制下可精确表示，结果无截断误差
+    mapper = CoordinateMapper.from_geometry({"size": (1080, 2400), "rotation": 0},
+                                            {"s": {"size": (1080, 2400), "rotation": slave_rotation}})
+    assert mapper.map_points([(270, 1200)])["s"] == [expected]
+
+
+def test_fallback_maps_every_point_to_every_device(python_backend):
+    mapper = CoordinateMapper.from_geometry(
+        {"size": (1000, 2000), "rotation": 0},
+        {"half": {"size": (500, 1000), "rotation": 0}, "double": {"size": (2000, 4000), "rotation": 0}},
+    )
+    assert mapper.map_points([(100, 200), (500, 1000)]) == {
+        "half": [(50, 100), (250, 500)],
+        "double": [(200, 400), (1000, 2000)],
+    }
+    assert mapper.map_points([]) == {"half": [], "double": []}
+    assert CoordinateMapper().map_points([(1, 1)]) == {}
+
+
+def old_zone(x_ratio, y_ratio, rotated):
+    """原方向不一致时的 9 宫格映射：返回目标区域 (列, 行)。"""
+    x_pos = 0 if x_ratio < 0.33 else (2 if x_ratio > 0.66 else 1)
+    y_pos = 0 if y_ratio < 0.33 else (2 if y_ratio > 0.66 else 1)
+    if rotated:
+        x_pos, y_pos = y_pos, 2 - x_pos
+    return x_pos, y_pos
+
+
+def test_rotated_tap_lands_in_the_old_zone(backend):
+    # 精确旋转落在原 9 宫格映射选中的同一区域内，只是不再吸附到区域中心
+    rng = random.Random(6)
+    main = {"size": (1080, 2400), "rotation": 0}
+    slave = {"size": (1200, 1920), "rotation": 1}
+    slave_width, slave_height = display_size(slave["size"], 1)
+    mapper = CoordinateMapper.from_geometry(main, {"s": slave})
+    ratios = [(rng.uniform(0, 1), rng.uniform(0, 1)) for _ in range(300)]
+    # 跳过 0.33/0.66 边界附近的点：旋转后 1 - u 的区域边界为 0.34/0.67
+    ratios = [(u, v) for u, v in ratios if not any(0.32 < r < 0.35 or 0.65 < r < 0.68 for r in (u, v))]
+    mapped = mapper.map_points([(u * 1080, v * 2400) for u, v in ratios])["s"]
+    for (u, v), (x, y) in zip(ratios, mapped):
+        assert old_zone(x / slave_width, y / slave_height, False) == old_zone(u, v, True)
+
+
+def test_backends_agree(monkeypatch):
+    numpy = pytest.importorskip("numpy")
+    rng = random.Random(42)
+    slaves = {f"s{index}": {"size": size, "rotation": index % 4} for index, size in enumerate(SIZES)}
+    points = random_points(rng, (1080, 2400), count=500)
+    mapper = CoordinateMapper.from_geometry({"size": (1080, 2400), "rotation": 0}, slaves)
+    fast = mapper._map_points_numpy(numpy, points)
+    monkeypatch.setattr(coordinate_mapper, "_NUMPY_CACHE", None)
+    slow = mapper.map_points(points)
+    for device_id in slaves:
+        for (fx, fy), (sx, sy) in zip(fast[device_id], slow[device_id]):
+            # 两条路径的浮点求和顺序不同，只在整数边界上可能差 1 像素
+            assert abs(fx - sx) <= 1 and abs(fy - sy) <= 1
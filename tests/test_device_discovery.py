@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from device_discovery import DeviceDiscoveryWorker, EventLoopStallMonitor
+
+
+class BlockingScan:
+    """每次扫描阻塞到 release() 为止，记录收到的 max_age。"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Semaphore(0)
+        self.gate = threading.Event()
+        self.fail_next = False
+
+    def __call__(self, max_age):
+        self.calls.append(max_age)
+        self.started.release()
+        assert self.gate.wait(5)
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("adb 不可用")
+        return [{"device_id": f"scan-{len(self.calls)}"}]
+
+
+@pytest.fixture
+def worker():
+    scan = BlockingScan()
+    results = []
+    delivered = threading.Semaphore(0)
+
+    def on_result(result):
+        results.append(result)
+        delivered.release()
+
+    worker = DeviceDiscoveryWorker(scan, on_result)
+    worker.scan, worker.results, worker.delivered = scan, results, delivered
+    worker.start()
+    yield worker
+    scan.gate.set()
+    worker.stop()
+
+
+def test_requests_while_busy_merge_into_one_follow_up_scan(worker):
+    worker.request()
+    assert worker.scan.started.acquire(timeout=5)
+    # 第一次扫描进行中提交的请求只触发一次后续扫描，标志位取并集
+    worker.request()
+    worker.request(show_message=True)
+    worker.request(force=True)
+    worker.scan.gate.set()
+    assert worker.delivered.acquire(timeout=5) and worker.delivered.acquire(timeout=5)
+    assert not worker.delivered.acquire(timeout=0.3)
+
+    assert worker.scan.calls == [None, 0]
+    first, second = worker.results
+    assert (first["devices"], first["merged"], first["show_message"]) == ([{"device_id": "scan-1"}], 1, False)
+    assert (second["devices"], second["merged"], second["show_message"]) == ([{"device_id": "scan-2"}], 3, True)
+    stats = worker.get_stats()
+    assert (stats["requests"], stats["scans"], stats["merged"]) == (4, 2, 2)
+
+
+def test_scan_errors_are_not_delivered_and_the_worker_keeps_running(worker):
+    worker.scan.fail_next = True
+    worker.scan.gate.set()
+    worker.request()
+    assert worker.scan.started.acquire(timeout=5)
+    assert not worker.delivered.acquire(timeout=0.3)
+    worker.request(show_message=True)
+    assert worker.delivered.acquire(timeout=5)
+    assert worker.results[-1]["show_message"] is True
+
+
+def test_stall_monitor_measures_timer_lateness(monkeypatch):
+    clock = iter([0.0, 0.05, 0.45, 0.5])
+    monkeypatch.setattr("device_discovery.time.monotonic", lambda: next(clock))
+    monitor = EventLoopStallMonitor(interval=0.05, warn_threshold=0.25)
+    for _ in range(4):
+        monitor.tick()
+    assert monitor.stall_count == 1
+    assert monitor.get_stats()["max_ms"] == pytest.approx(350)
@@ -0,0 +1,81 @@
+import subprocess
+
+from device_props import BOOT_ID_PATH, DevicePropsCache, parse_getprop
+
+GETPROP = "[ro.product.model]: [Pixel 7]\n[ro.product.brand]: [google]\n[ro.build.version.release]: [14]\n"
+
+
+class FakeController:
+    """记录 shell 调用次数，按当前 boot_id 返回 `cat boot_id; getprop` 的输出。"""
+
+    def __init__(self, transport_id="1"):
+        self.boot_id = "boot-a"
+        self.transport_id = transport_id
+        self.calls = []
+        self.device_registry = self
+
+    def get(self, device_id):
+        return {"device_id": device_id, "transport_id": self.transport_id}
+
+    def _run_shell(self, *args, device_id=None, timeout=None):
+        self.calls.append(" ".join(args))
+        stdout = self.boot_id + "\n"
+        if "getprop" in args:
+            stdout += GETPROP
+        return subprocess.CompletedProcess(list(args), 0, stdout=stdout, stderr="")
+
+
+def test_parse_getprop():
+    assert parse_getprop(GETPROP + "[multi]: [first\nsecond]\n")["ro.product.model"] == "Pixel 7"
+
+
+def test_same_transport_is_a_hit():
+    controller = FakeController()
+    cache = DevicePropsCache(controller)
+    assert cache.get("a")["ro.product.brand"] == "google"
+    assert cache.peek("a")["ro.product.model"] == "Pixel 7"
+    assert cache.get("a")["ro.build.version.release"] == "14"
+    assert len(controller.calls) == 1
+    assert cache.get_stats()["hits"] == 2 and cache.get_stats()["misses"] == 1
+
+
+def test_new_transport_refetches():
+    controller = FakeController()
+    cache = DevicePropsCache(controller)
+    cache.get("a")
+    controller.transport_id = "2"
+    assert cache.peek("a") is None
+    cache.get("a")
+    assert len(controller.calls) == 2
+
+
+def test_missing_transport_id_is_a_miss_checked_against_boot_id():
+    controller = FakeController(transport_id=None)
+    cache = DevicePropsCache(controller)
+    cache.get("a")
+    assert cache.peek("a") is None
+    # 同一次启动：只读取 boot_id 即可沿用快照
+    assert cache.get("a")["ro.product.model"] == "Pixel 7"
+    assert controller.calls[-1] == f"cat {BOOT_ID_PATH}"
+    assert cache.get_stats()["hits"] == 0 and cache.get_stats()["misses"] == 2
+
+
+def test_boot_id_mismatch_invalidates_snapshot():
+    controller = FakeController(transport_id=None)
+    cache = DevicePropsCache(controller)
+    cache.get("a")
+    controller.boot_id = "boot-b"
+    assert cache.get("a")["ro.product.model"] == "Pixel 7"
+    assert controller.calls[-2:] == [f"cat {BOOT_ID_PATH}", f"cat {BOOT_ID_PATH} ; getprop"]
+    assert cache._entries["a"]["key"] == (None, "boot-b")
+
+
+def test_failed_refetch_after_reboot_drops_stale_snapshot():
+    controller = FakeController()
+    cache = DevicePropsCache(controller)
+    cache.get("a")
+    controller.transport_id = "2"
+    controller.boot_id = "boot-b"
+    controller._run_shell = lambda *args, **kwargs: subprocess.CompletedProcess(list(args), 1, stdout="boot-b\n")
+    assert cache.get("a") == {}
+    assert "a" not in cache._entries
@@ -0,0 +1,86 @@
+import os
+import stat
+import threading
+
+import pytest
+
+from device_registry import DeviceRegistry
+from scrcpy_controller import ScrcpyController
+
+# 每次 devices -l 追加一行计数并稍作停顿，让并发调用落在同一次扫描期间
+FAKE_ADB = """#!/bin/sh
+case "$*" in
+  "devices -l")
+    echo scan >> "{log}"
+    sleep 0.3
+    echo "List of devices attached"
+    echo "R58M12ABCDE            device usb:1-1.2 product:a model:Pixel_7 device:b transport_id:3"
+    echo "10.0.0.2:5555          device product:c model:Galaxy device:d transport_id:4"
+    ;;
+esac
+exit 0
+"""
+
+
+@pytest.fixture
+def controller(tmp_path):
+    if os.name == "nt":
+        pytest.skip("需要 POSIX sh 模拟 adb")
+    log = tmp_path / "scans.log"
+    path = tmp_path / "adb"
+    path.write_text(FAKE_ADB.format(log=log))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    controller = ScrcpyController(adb_path=str(path), use_native_adb=False, use_shell_sessions=False)
+    controller.scans = lambda: len(log.read_text().splitlines()) if log.exists() else 0
+    return controller
+
+
+def test_concurrent_refreshes_share_one_adb_call(controller):
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        results.append(controller.get_device_statuses(max_age=0))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert controller.scans() == 1
+    assert len(results) == 8
+    assert all([entry["device_id"] for entry in result] == ["R58M12ABCDE", "10.0.0.2:5555"] for result in results)
+    info = controller.device_registry.scan_info()
+    assert info["scans"] == 1 and info["coalesced"] == 7
+
+
+def test_recent_snapshot_is_reused_until_max_age(controller):
+    first = controller.get_device_statuses(max_age=60)
+    assert controller.get_device_statuses(max_age=60) == first
+    assert controller.scans() == 1
+    controller.get_device_statuses(max_age=0)
+    assert controller.scans() == 2
+
+
+def entry(device_id, model="未知设备", status="device"):
+    return {"device_id": device_id, "status": status, "model": model}
+
+
+def test_late_models_are_applied_once_and_pruned_with_the_scan():
+    registry = DeviceRegistry()
+    # 型号在设备记录写入前解析完成
+    assert not registry.update_model("a", "Pixel 7")
+    assert not registry.update_model("gone", "Galaxy")
+    registry.apply_snapshot([entry("a"), entry("b")])
+    assert registry.get("a")["model"] == "Pixel 7"
+    # 不在本次扫描中的设备不会一直占用暂存
+    assert registry._late_models == {}
+
+    registry.update_model("c", "Mate")
+    registry.apply_snapshot([entry("c", status="offline")])
+    assert registry._late_models == {"c": "Mate"}
+    registry.apply_snapshot([entry("c")])
+    assert registry.get("c")["model"] == "Mate"
+    assert registry._late_models == {}
@@ -0,0 +1,109 @@
+import pytest
+
+from device_service import DeviceService
+
+
+def raw(*devices):
+    """(device_id, model[, status]) -> 后台扫描得到的设备条目。"""
+    return [
+        {"device_id": item[0], "model": item[1], "status": item[2] if len(item) > 2 else "device"}
+        for item in devices
+    ]
+
+
+@pytest.fixture
+def combos(qapp):
+    from PyQt5.QtWidgets import QComboBox
+    return QComboBox(), QComboBox()
+
+
+class Syncer:
+    def __init__(self, primary, secondary=None):
+        self.service = DeviceService(controller=None)
+        self.primary = primary
+        self.secondary = secondary
+        self.styled = []
+
+    def sync(self, devices, preferred=None):
+        _entries, selected = self.service.sync_device_widgets(
+            self.primary, self.secondary, preferred_device_id=preferred, raw_devices=devices,
+            row_styler=lambda combo, row, item: self.styled.append((row, item["device_id"])),
+        )
+        return selected
+
+    def rows(self, combo=None):
+        combo = combo or self.primary
+        return [(combo.itemData(row), combo.itemText(row)) for row in range(combo.count())]
+
+    def ids(self, combo=None):
+        return [device_id for device_id, _text in self.rows(combo)]
+
+
+def test_initial_sync_inserts_rows_and_selects_preferred(combos):
+    syncer = Syncer(*combos)
+    selected = syncer.sync(raw(("a", "Pixel"), ("b", "Galaxy"), ("10.0.0.2:5555", "Mate")), preferred="b")
+    assert syncer.rows() == [
+        ("a", "Pixel (a) [USB]"), ("b", "Galaxy (b) [USB]"), ("10.0.0.2:5555", "Mate (10.0.0.2:5555) [WiFi]"),
+    ]
+    assert syncer.rows(combos[1]) == syncer.rows()
+    assert selected == "b" and combos[0].currentData() == "b" and combos[1].currentData() == "b"
+    assert sorted(syncer.styled) == sorted([(0, "a"), (1, "b"), (2, "10.0.0.2:5555")] * 2)
+
+
+def test_unchanged_snapshot_touches_nothing(combos):
+    syncer = Syncer(combos[0])
+    devices = raw(("a", "Pixel"), ("b", "Galaxy"))
+    syncer.sync(devices)
+    combos[0].setCurrentIndex(1)
+    syncer.styled.clear()
+    assert syncer.sync(devices, preferred="a") == "b"
+    assert combos[0].currentData() == "b"
+    assert syncer.styled == []
+
+
+def test_insert_keeps_the_current_selection(combos):
+    syncer = Syncer(combos[0])
+    syncer.sync(raw(("a", "Pixel"), ("c", "Mate")), preferred="c")
+    syncer.styled.clear()
+    selected = syncer.sync(raw(("a", "Pixel"), ("b", "Galaxy"), ("c", "Mate")), preferred=combos[0].currentData())
+    assert syncer.ids() == ["a", "b", "c"]
+    assert selected == "c" and combos[0].currentData() == "c"
+    assert syncer.styled == [(1, "b")]
+
+
+def test_remove_keeps_selection_and_falls_back_when_selected_row_goes(combos):
+    syncer = Syncer(combos[0])
+    syncer.sync(raw(("a", "Pixel"), ("b", "Galaxy"), ("c", "Mate")), preferred="c")
+    assert syncer.sync(raw(("b", "Galaxy"), ("c", "Mate")), preferred=combos[0].currentData()) == "c"
+    assert syncer.ids() == ["b", "c"]
+    assert syncer.sync(raw(("b", "Galaxy")), preferred="c") == "b"
+    assert syncer.ids() == ["b"]
+
+
+def test_rename_updates_text_in_place(combos):
+    syncer = Syncer(combos[0])
+    syncer.sync(raw(("a", "未知设备"), ("b", "Galaxy")), preferred="b")
+    syncer.styled.clear()
+    selected = syncer.sync(raw(("a", "Pixel 7"), ("b", "Galaxy", "offline")), preferred=combos[0].currentData())
+    assert syncer.rows() == [("a", "Pixel 7 (a) [USB]"), ("b", "Galaxy (b) [离线]")]
+    assert selected == "b"
+    assert syncer.styled == [(0, "a"), (1, "b")]
+
+
+def test_reorder_moves_rows(combos):
+    syncer = Syncer(combos[0])
+    syncer.sync(raw(("a", "A"), ("b", "B"), ("c", "C")), preferred="a")
+    syncer.styled.clear()
+    assert syncer.sync(raw(("c", "C"), ("a", "A"), ("b", "B")), preferred=combos[0].currentData()) == "a"
+    assert syncer.ids() == ["c", "a", "b"]
+    assert syncer.styled == [(0, "c")]
+
+
+def test_externally_cleared_combo_is_rebuilt(combos):
+    syncer = Syncer(combos[0])
+    devices = raw(("a", "A"), ("b", "B"))
+    syncer.sync(devices)
+    combos[0].clear()
+    syncer.sync(devices, preferred="b")
+    assert syncer.ids() == ["a", "b"]
+    assert combos[0].currentData() == "b"
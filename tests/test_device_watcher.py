@@ -0,0 +1,35 @@
+import queue
+
+from device_watcher import DeviceTrackWatcher
+from fake_adb_server import FakeAdbServer, length_prefixed, okay
+
+
+def test_watcher_pushes_deltas_then_goes_offline():
+    snapshots = [
+        "emulator-5554\tdevice transport_id:1\n",
+        "emulator-5554\tdevice transport_id:1\nR58M12ABCDE\tunauthorized usb:1-1 transport_id:2\n",
+        "emulator-5554\tdevice transport_id:1\nR58M12ABCDE\tdevice usb:1-1 transport_id:2\n",
+        "R58M12ABCDE\tdevice usb:1-1 transport_id:2\n",
+    ]
+
+    def track(_request, _state):
+        return okay() + b"".join(length_prefixed(item) for item in snapshots), False
+
+    deltas = queue.Queue()
+    with FakeAdbServer({"host:track-devices-l": track}) as server:
+        watcher = DeviceTrackWatcher(deltas.put, port=server.port, reconnect_delays=(30.0,))
+        watcher.start()
+        try:
+            received = [deltas.get(timeout=5) for _ in range(len(snapshots) + 1)]
+        finally:
+            watcher.stop()
+
+    summary = [(delta["live"], delta["added"], delta["removed"], delta["changed"]) for delta in received]
+    assert summary == [
+        (True, ["emulator-5554"], [], []),
+        (True, ["R58M12ABCDE"], [], []),
+        (True, [], [], ["R58M12ABCDE"]),
+        (True, [], ["emulator-5554"], []),
+        (False, [], [], []),
+    ]
+    assert all(delta["port"] == server.port for delta in received)
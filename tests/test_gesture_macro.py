@@ -0,0 +1,82 @@
+from gesture_macro import GestureMacroRecorder, parse_axis_ranges
+
+AXES = """add device 1: /dev/input/event2
+  name:     "touchscreen"
+  events:
+    ABS (0003): ABS_MT_POSITION_X     : value 0, min 0, max 1079, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_Y     : value 0, min 0, max 2399, fuzz 0, flat 0, resolution 0
+add device 2: /dev/input/event0
+  name:     "gpio-keys"
+"""
+
+
+def touch_lines(start, end, points, node="/dev/input/event2"):
+    """生成一次单指触摸的 getevent -lt 输出，points 在 start 到 end 间均匀分布。"""
+    lines = []
+    step = (end - start) / max(1, len(points) - 1)
+    for index, (x, y) in enumerate(points):
+        timestamp = start + step * index
+        if not index:
+            lines.append(f"[{timestamp:15.6f}] {node}: EV_ABS       ABS_MT_TRACKING_ID   00000001")
+        lines.append(f"[{timestamp:15.6f}] {node}: EV_ABS       ABS_MT_POSITION_X    {x:08x}")
+        lines.append(f"[{timestamp:15.6f}] {node}: EV_ABS       ABS_MT_POSITION_Y    {y:08x}")
+        lines.append(f"[{timestamp:15.6f}] {node}: EV_SYN       SYN_REPORT           00000000")
+    lines.append(f"[{end:15.6f}] {node}: EV_ABS       ABS_MT_TRACKING_ID   ffffffff")
+    lines.append(f"[{end:15.6f}] {node}: EV_SYN       SYN_REPORT           00000000")
+    return lines
+
+
+def key_lines(timestamp, name="KEY_BACK", node="/dev/input/event0"):
+    return [
+        f"[{timestamp:15.6f}] {node}: EV_KEY       {name:<20} DOWN",
+        f"[{timestamp:15.6f}] {node}: EV_SYN       SYN_REPORT           00000000",
+        f"[{timestamp + 0.05:15.6f}] {node}: EV_KEY       {name:<20} UP",
+        f"[{timestamp + 0.05:15.6f}] {node}: EV_SYN       SYN_REPORT           00000000",
+    ]
+
+
+def record(lines, rotation=0):
+    recorder = GestureMacroRecorder(None, "serial")
+    recorder.geometry = {"size": (1080, 2400), "rotation": rotation}
+    recorder._axis_ranges = parse_axis_ranges(AXES)
+    for line in lines:
+        recorder.feed_line(line)
+    return recorder.stop()
+
+
+def test_parse_axis_ranges():
+    assert parse_axis_ranges(AXES) == {"/dev/input/event2": (1079, 2399)}
+
+
+def test_classifies_tap_long_press_swipe_and_key():
+    lines = (touch_lines(100.0, 100.08, [(540, 1200)])
+             + touch_lines(101.0, 101.6, [(100, 100), (102, 103)])
+             + touch_lines(102.0, 102.3, [(540, 2000), (540, 1500), (540, 400)])
+             + key_lines(103.0))
+    macro = record(lines)
+    assert macro["source"] == {"device_id": "serial", "size": [1080, 2400], "rotation": 0}
+    assert macro["events"] == [
+        {"t": 0, "duration": 80, "type": "tap", "points": [[540, 1200]]},
+        {"t": 1000, "duration": 600, "type": "long", "points": [[100, 100]]},
+        {"t": 2000, "duration": 300, "type": "swipe", "points": [[540, 2000], [540, 400]]},
+        {"t": 3000, "type": "key", "keycode": 4},
+    ]
+
+
+def test_key_pressed_during_touch_is_ordered_after_it():
+    # 按键在触摸进行中按下：触摸抬起时才写入，但开始时间更早
+    lines = touch_lines(50.0, 50.5, [(540, 2000), (540, 400)])
+    lines[4:4] = key_lines(50.2, name="KEY_VOLUMEUP")
+    macro = record(lines)
+    assert [(event["t"], event["type"]) for event in macro["events"]] == [(0, "swipe"), (200, "key")]
+
+
+def test_key_first_anchors_timeline():
+    macro = record(key_lines(10.0, name="KEY_HOME") + touch_lines(10.25, 10.3, [(10, 10)]))
+    assert [(event["t"], event["type"]) for event in macro["events"]] == [(0, "key"), (250, "tap")]
+    assert all(event["t"] >= 0 for event in macro["events"])
+
+
+def test_rotation_maps_raw_coordinates_to_display():
+    macro = record(touch_lines(1.0, 1.05, [(100, 200)]), rotation=1)
+    assert macro["events"][0]["points"] == [[200, 980]]
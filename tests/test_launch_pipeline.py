@@ -0,0 +1,98 @@
+import os
+import time
+
+import pytest
+
+from qt_helpers import wait_until
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="需要 POSIX sh 模拟 scrcpy")
+
+
+@pytest.fixture
+def harness(qapp):
+    from PyQt5.QtCore import QProcess
+    from launch_pipeline import LaunchPipeline
+
+    class Harness:
+        def __init__(self):
+            self.processes = []
+            self.concurrency = []
+            self.logs = []
+            self.finished = None
+
+        def pipeline(self, **kwargs):
+            self.instance = LaunchPipeline(log=self.logs.append, **kwargs)
+            return self.instance
+
+        def job(self, device_id, script=None, program="/bin/sh"):
+            """返回一个启动任务：以 sh 脚本模拟 scrcpy 输出，并把输出转交给流水线。"""
+            def launch():
+                self.concurrency.append(len(self.instance._starting) + 1)
+                process = QProcess()
+                process.setProcessChannelMode(QProcess.MergedChannels)
+                process.readyReadStandardOutput.connect(
+                    lambda: self.instance.observe_output(device_id, bytes(process.readAllStandardOutput()).decode())
+                )
+                process.start(program, ["-c", script] if script else [])
+                self.processes.append(process)
+                return process
+            return device_id, device_id, launch
+
+        def run(self, jobs, timeout=5.0):
+            self.instance.start(jobs, on_finished=lambda results, total: setattr(self, "finished", results))
+            assert wait_until(qapp, lambda: self.finished is not None, timeout)
+            return {device_id: item["status"] for device_id, item in self.finished.items()}
+
+    harness = Harness()
+    yield harness
+    for process in harness.processes:
+        process.kill()
+        process.waitForFinished(1000)
+
+
+READY_LATER = 'sleep 0.2; echo "INFO: Device: [Google] Pixel"; sleep 5'
+
+
+def test_concurrency_limit_and_ready_gate(harness):
+    harness.pipeline(max_concurrent=2, ready_timeout=5)
+    statuses = harness.run([harness.job(f"d{index}", READY_LATER) for index in range(5)])
+    assert statuses == {f"d{index}": "ready" for index in range(5)}
+    assert max(harness.concurrency) == 2
+    assert any("5/5 台就绪" in line for line in harness.logs)
+
+
+def test_timeout_exit_and_launch_error_release_the_slot(harness):
+    harness.pipeline(max_concurrent=1, ready_timeout=0.3)
+
+    def broken():
+        raise OSError("no scrcpy")
+
+    statuses = harness.run([
+        harness.job("silent", "sleep 5"),
+        harness.job("exits", "exit 1"),
+        ("broken", "broken", broken),
+        ("none", "none", lambda: None),
+        harness.job("ready", READY_LATER),
+    ])
+    assert statuses == {"silent": "timeout", "exits": "exited", "broken": "failed", "none": "failed", "ready": "ready"}
+
+
+def test_failed_to_start_does_not_hold_the_slot(harness):
+    harness.pipeline(max_concurrent=1, ready_timeout=8)
+    started = time.monotonic()
+    statuses = harness.run([harness.job("missing", program="/nonexistent/scrcpy"), harness.job("ok", READY_LATER)])
+    assert statuses == {"missing": "failed", "ok": "ready"}
+    assert time.monotonic() - started < 4
+    assert any("启动失败" in line for line in harness.logs)
+
+
+def test_cancel_drops_queued_jobs(harness, qapp):
+    pipeline = harness.pipeline(max_concurrent=1, ready_timeout=5)
+    pipeline.start([harness.job(f"d{index}", "sleep 5") for index in range(3)],
+                   on_finished=lambda results, total: setattr(harness, "finished", results))
+    qapp.processEvents()
+    assert pipeline.running
+    pipeline.cancel()
+    assert not pipeline.running
+    assert {device_id: item["status"] for device_id, item in harness.finished.items()} == {"d0": "cancelled"}
+    assert len(harness.processes) == 1
@@ -0,0 +1,104 @@
+import socket
+import struct
+
+import pytest
+
+from scrcpy_control import (
+    ACTION_DOWN, ACTION_MOVE, ACTION_UP, INJECT_TEXT_MAX_LENGTH, POINTER_ID_GENERIC_FINGER,
+    TYPE_INJECT_KEYCODE, TYPE_INJECT_TEXT, TYPE_INJECT_TOUCH_EVENT, ScrcpyControlChannel,
+    ScrcpyControlError, encode_inject_keycode, encode_inject_text, encode_inject_touch,
+)
+
+TOUCH_SIZE = struct.calcsize(">BBqiiHHHII")
+KEYCODE_SIZE = struct.calcsize(">BBIII")
+
+
+def test_touch_layout():
+    message = encode_inject_touch(ACTION_DOWN, 540.7, 1200, 1080, 2400)
+    assert len(message) == TOUCH_SIZE == 32
+    assert message == (
+        b"\x02"                              # type
+        b"\x00"                              # action
+        b"\xff\xff\xff\xff\xff\xff\xff\xfe"  # pointer_id = -2
+        b"\x00\x00\x02\x1c"                  # x = 540
+        b"\x00\x00\x04\xb0"                  # y = 1200
+        b"\x04\x38\x09\x60"                  # 1080 x 2400
+        b"\xff\xff"                          # pressure 1.0
+        b"\x00\x00\x00\x00\x00\x00\x00\x00"  # action_button, buttons
+    )
+
+
+@pytest.mark.parametrize("pressure, fixed", [(1.0, 0xFFFF), (2.0, 0xFFFF), (0.5, 0x8000), (0.0, 0), (-1.0, 0)])
+def test_touch_pressure_is_u16_fixed_point(pressure, fixed):
+    fields = struct.unpack(">BBqiiHHHII", encode_inject_touch(ACTION_MOVE, 1, 2, 3, 4, pressure=pressure))
+    assert fields == (TYPE_INJECT_TOUCH_EVENT, ACTION_MOVE, POINTER_ID_GENERIC_FINGER, 1, 2, 3, 4, fixed, 0, 0)
+
+
+def test_keycode_layout():
+    message = encode_inject_keycode(ACTION_UP, 66, repeat=2, metastate=0x1000)
+    assert len(message) == KEYCODE_SIZE == 14
+    assert message == b"\x00\x01" + b"\x00\x00\x00\x42" + b"\x00\x00\x00\x02" + b"\x00\x00\x10\x00"
+
+
+def test_text_layout():
+    assert encode_inject_text("héllo") == b"\x01\x00\x00\x00\x06" + "héllo".encode("utf-8")
+
+
+def test_text_is_truncated_on_a_character_boundary():
+    # 每个汉字 3 字节，截断到 300 字节时正好 100 个字符
+    message = encode_inject_text("测" * 150)
+    assert struct.unpack(">BI", message[:5]) == (TYPE_INJECT_TEXT, INJECT_TEXT_MAX_LENGTH)
+    assert message[5:].decode("utf-8") == "测" * 100
+    # 前置一个 ASCII 字符后 300 字节落在汉字中间，不完整的字符被丢弃
+    message = encode_inject_text("a" + "测" * 150)
+    assert struct.unpack(">BI", message[:5]) == (TYPE_INJECT_TEXT, 298)
+    assert message[5:].decode("utf-8") == "a" + "测" * 99
+
+
+def read_messages(sock):
+    """按 scrcpy 控制消息格式解析 socket 中收到的全部数据。"""
+    data = b""
+    while True:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    messages = []
+    while data:
+        kind = data[0]
+        if kind == TYPE_INJECT_TOUCH_EVENT:
+            messages.append(("touch",) + struct.unpack(">BBqiiHHHII", data[:TOUCH_SIZE])[1:])
+            data = data[TOUCH_SIZE:]
+        elif kind == TYPE_INJECT_KEYCODE:
+            messages.append(("key",) + struct.unpack(">BBIII", data[:KEYCODE_SIZE])[1:])
+            data = data[KEYCODE_SIZE:]
+        elif kind == TYPE_INJECT_TEXT:
+            (length,) = struct.unpack(">I", data[1:5])
+            messages.append(("text", data[5:5 + length].decode("utf-8")))
+            data = data[5 + length:]
+        else:
+            raise AssertionError(f"未知消息类型 {kind}")
+    return messages
+
+
+def test_channel_round_trip_over_socketpair():
+    device_end, gui_end = socket.socketpair()
+    channel = ScrcpyControlChannel("adb", "serial", None, "2.4", (1080, 2400))
+    channel.sock = gui_end
+    channel.tap(100, 200)
+    channel.key(4)
+    channel.text("ok")
+    channel.close()
+    with pytest.raises(ScrcpyControlError):
+        channel.text("closed")
+
+    with device_end:
+        messages = read_messages(device_end)
+    finger = POINTER_ID_GENERIC_FINGER
+    assert messages == [
+        ("touch", ACTION_DOWN, finger, 100, 200, 1080, 2400, 0xFFFF, 0, 0),
+        ("touch", ACTION_UP, finger, 100, 200, 1080, 2400, 0, 0, 0),
+        ("key", ACTION_DOWN, 4, 0, 0),
+        ("key", ACTION_UP, 4, 0, 0),
+        ("text", "ok"),
+    ]
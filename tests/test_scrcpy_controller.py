@@ -0,0 +1,68 @@
+import os
+import socket
+import stat
+
+import pytest
+
+from adb_client import AdbClient
+from fake_adb_server import FakeAdbServer, okay, shell_v2_packets, transport_handler
+from scrcpy_controller import ScrcpyController
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="需要 POSIX sh 模拟 adb")
+
+
+def unused_port():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+@pytest.fixture
+def fake_adb(tmp_path):
+    path = tmp_path / "adb"
+    path.write_text('#!/bin/sh\necho "List of devices attached"\n')
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def test_native_backoff_is_per_server_port(fake_adb):
+    devices = "emulator-5554\tdevice transport_id:1\n"
+    with FakeAdbServer({"host:devices-l": lambda _req, _state: (okay(devices), False)}) as server:
+        controller = ScrcpyController(adb_path=fake_adb, adb_shards=2)
+        primary, shard = controller.shards.ports
+        controller._adb_clients[primary] = AdbClient(port=server.port)
+        # 分片 server 尚未启动：原生连接失败，回退到 CLI 并只对该端口退避
+        controller._adb_clients[shard] = AdbClient(port=unused_port(), timeout=1)
+
+        assert controller._run_adb("devices", "-l", port=shard).stdout == "List of devices attached\n"
+        assert shard in controller._native_adb_retry_at
+        assert primary not in controller._native_adb_retry_at
+
+        result = controller._run_adb("devices", "-l", port=primary)
+        assert "emulator-5554 device" in result.stdout
+        assert server.requests == ["host:devices-l"]
+        assert controller.adb_call_stats["native"]["count"] == 1
+        assert controller.adb_call_stats["cli"]["count"] == 1
+
+
+def test_unknown_serial_does_not_back_off_the_port(fake_adb):
+    handlers = {
+        "host:transport:": transport_handler({"online"}),
+        "shell,v2,": lambda _req, _state: (okay() + shell_v2_packets(b"ok\n"), False),
+    }
+    with FakeAdbServer(handlers) as server:
+        controller = ScrcpyController(adb_path=fake_adb)
+        port = controller.shards.base_port
+        controller._adb_clients[port] = AdbClient(port=server.port)
+
+        result = controller._run_adb("shell", "echo", "ok", device_id="offline", timeout=2)
+        assert result.returncode == 1
+        assert "not found" in result.stderr
+        assert port not in controller._native_adb_retry_at
+
+        # 同一 server 上的其他设备继续走原生协议
+        assert controller._run_adb("shell", "echo", "ok", device_id="online", timeout=2).stdout == "ok\n"
+        assert controller.adb_call_stats["native"]["count"] == 2
+        assert controller.adb_call_stats["cli"]["count"] == 0
@@ -0,0 +1,84 @@
+import os
+import stat
+
+import pytest
+
+from adb_client import AdbClient, benchmark_calls
+from fake_adb_server import FakeAdbServer, okay, shell_v2_packets, transport_handler
+from shell_session_pool import ShellSessionPool
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="需要 POSIX sh 模拟 adb shell")
+
+# 跳过 -s <serial>，带命令时执行一次后退出，否则进入交互 sh，充当设备上的 adb shell
+FAKE_ADB = """#!/bin/sh
+while [ "$1" = "-s" ] || [ "$1" = "-P" ]; do shift 2; done
+shift
+if [ $# -gt 0 ]; then exec /bin/sh -c "$*"; fi
+exec /bin/sh
+"""
+
+
+@pytest.fixture
+def fake_adb(tmp_path):
+    path = tmp_path / "adb"
+    path.write_text(FAKE_ADB)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture
+def pool(fake_adb):
+    pool = ShellSessionPool(adb_path=fake_adb)
+    yield pool
+    pool.close_all()
+
+
+def test_piped_command_reads_from_pipe(pool):
+    exit_code, output, _elapsed = pool.run(
+        "serial", 'printf "SurfaceOrientation: 1\\n" | grep SurfaceOrientation', timeout=5
+    )
+    assert exit_code == 0
+    assert output == b"SurfaceOrientation: 1\n"
+
+
+def test_stdin_is_not_consumed_from_session(pool):
+    exit_code, output, _elapsed = pool.run("serial", "cat", timeout=5)
+    assert (exit_code, output) == (0, b"")
+    assert pool.run("serial", "echo still-alive", timeout=5)[1] == b"still-alive\n"
+
+
+def test_output_containing_sentinel_prefix_is_kept(pool):
+    command = "echo __SCRCPY_GUI_END_deadbeef__ 0; echo __SCRCPY_GUI_END_; exit 7"
+    exit_code, output, _elapsed = pool.run("serial", command, timeout=5)
+    assert exit_code == 7
+    assert output == b"__SCRCPY_GUI_END_deadbeef__ 0\n__SCRCPY_GUI_END_\n"
+    assert pool.run("serial", "echo next", timeout=5)[:2] == (0, b"next\n")
+
+
+def test_non_zero_exit_and_missing_newline(pool):
+    assert pool.run("serial", "printf partial; false", timeout=5)[:2] == (1, b"partial")
+    assert pool.run("serial", "ls /nonexistent-path", timeout=5)[0] != 0
+    assert pool.run("serial", "true", timeout=5)[:2] == (0, b"")
+
+
+def test_sessions_are_per_device_and_reconnect(pool):
+    pool.run("a", "true", timeout=5)
+    pool.run("b", "true", timeout=5)
+    first = pool._sessions["a"]
+    first.close()
+    assert pool.run("a", "echo back", timeout=5)[:2] == (0, b"back\n")
+    assert pool._sessions["a"] is not first
+
+
+def test_benchmark_reports_each_path(fake_adb):
+    handlers = {
+        "host:transport:": transport_handler({"serial"}),
+        "shell,v2,": lambda _req, _state: (okay() + shell_v2_packets(b"ok\n"), False),
+    }
+    with FakeAdbServer(handlers) as server:
+        client = AdbClient(port=server.port)
+        # 默认只比较原生协议与 CLI，会话池按需加入
+        assert set(benchmark_calls(fake_adb, "serial", rounds=3, client=client)) == {"cli", "native"}
+        results = benchmark_calls(fake_adb, "serial", rounds=3, client=client, with_pool=True)
+    assert set(results) == {"cli", "native", "pool"}
+    assert all(rate > 0 for rate in results.values())
@@ -0,0 +1,27 @@
+import pytest
+
+from runtime_helpers import scrcpy_option_value
+from usb_scheduler import UsbBandwidthScheduler, command_bit_rate, replace_bit_rate
+
+COMMAND = ["scrcpy", "-s", "a", "--video-bit-rate", "8M", "--max-size", "1920"]
+
+
+@pytest.mark.parametrize("mbps, value", [(4, "4M"), (4.0, "4M"), (2.5, "2500K"), (0.75, "750K")])
+def test_replace_bit_rate_keeps_fractions(mbps, value):
+    command = replace_bit_rate(COMMAND, mbps)
+    assert command[:3] == ["scrcpy", "--video-bit-rate", value]
+    assert command.count("--video-bit-rate") == 1
+    assert scrcpy_option_value(command, "--max-size") == "1920"
+    assert command_bit_rate(command) == pytest.approx(mbps)
+
+
+def test_replace_bit_rate_drops_short_and_inline_forms():
+    command = replace_bit_rate(["scrcpy", "-b", "8M", "--video-bit-rate=6M", "-s", "a"], 3)
+    assert command == ["scrcpy", "--video-bit-rate", "3M", "-s", "a"]
+
+
+def test_granted_fraction_survives_rewrite():
+    scheduler = UsbBandwidthScheduler(lambda _device_id: "1", bus_budget_mbps=10.0, transfer_mbps=2.5)
+    granted = scheduler.reserve_stream("a", 8.0)
+    assert granted == 7.5
+    assert command_bit_rate(replace_bit_rate(COMMAND, granted)) == 7.5
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from qt_helpers import wait_until
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="需要 POSIX sleep 模拟 scrcpy 进程")
+
+
+@pytest.fixture
+def process(qapp):
+    from PyQt5.QtCore import QProcess
+    process = QProcess()
+    process.start("/bin/sh", ["-c", "sleep 10"])
+    assert process.waitForStarted(2000)
+    yield process
+    process.kill()
+    process.waitForFinished(1000)
+
+
+def make_tracker(windows=None, **kwargs):
+    from window_readiness import WindowReadinessTracker
+    logs = []
+    tracker = WindowReadinessTracker(windows, log=logs.append, intervals=(0.01, 0.02), **kwargs)
+    return tracker, logs
+
+
+def flaky_hook(failures, calls, exception=False):
+    """前 failures 次返回 False（或抛出异常），之后成功。"""
+    def hook(device_id, handles):
+        calls.append((device_id, list(handles)))
+        if len(calls) <= failures:
+            if exception:
+                raise RuntimeError("窗口尚未调整尺寸")
+            return False
+        return None
+    return hook
+
+
+def test_failed_hook_is_retried_until_it_succeeds(qapp, process):
+    pid = int(process.processId())
+    tracker, _logs = make_tracker(lambda: [(42, pid, "Pixel")])
+    flaky, once = [], []
+    tracker.track("a", process, "Pixel", [flaky_hook(2, flaky), lambda dev, handles: once.append(dev)])
+    assert wait_until(qapp, lambda: tracker.get_stats()["pending"] == 0)
+    assert flaky == [("a", [42])] * 3
+    assert once == ["a"]
+    assert tracker.get_stats()["devices"] == 1
+
+
+def test_hook_exceptions_give_up_after_the_retry_limit(qapp, process):
+    pid = int(process.processId())
+    tracker, logs = make_tracker(lambda: [(7, pid, "")], hook_attempts=3)
+    calls = []
+    tracker.track("a", process, "", [flaky_hook(10, calls, exception=True)])
+    assert wait_until(qapp, lambda: tracker.get_stats()["pending"] == 0)
+    assert len(calls) == 3
+    assert logs == ["设备 a 的窗口设置重试 3 次仍未完成，已放弃"]
+
+
+def test_output_signal_without_window_enumeration(qapp, process):
+    tracker, _logs = make_tracker()
+    calls = []
+    tracker.track("a", process, "", [flaky_hook(1, calls)])
+    tracker.observe_output("a", "INFO: Renderer: opengl")
+    assert calls == [("a", [])]
+    assert wait_until(qapp, lambda: tracker.get_stats()["pending"] == 0)
+    assert calls == [("a", [])] * 2
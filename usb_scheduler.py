@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from runtime_helpers import format_bit_rate
+from utils import console_log
+
+"""
+按 USB 总线调度高带宽任务。
+
+`adb devices -l` 的 `usb:` 属性给出设备所在的总线与端口路径（Linux 为 `1-4.2`，
+macOS/Windows 为十进制 location id，最高字节为总线号）。同一根集线器上的设备共享带宽，
+多路投屏叠加 APK 安装时会出现丢帧。UsbBandwidthScheduler 为每条总线维护带宽预算：
+1. 投屏按码率占用预算，预算不足时降低新投屏的码率，并为传输任务预留一份带宽
+2. install/pull/push/截图等传输任务在预算不足时排队，每条总线至少允许一个传输任务运行
+3. 批量操作按总线交错排序，避免集中压在同一条总线上
+
+网络设备没有总线信息，不受限制。
+"""
+
+# scrcpy 未指定 --video-bit-rate 时的默认码率（Mbps）
+DEFAULT_STREAM_MBPS = 8.0
+
+_BIT_RATE_RE = re.compile(r'^(\d+(?:\.\d+)?)([KkMm]?)$')
+
+
+def parse_usb_location(value):
+    """把 usb 属性解析为 (总线, 端口路径)，无法识别时返回 (None, None)。"""
+    value = (value or "").strip()
+    if not value:
+        return None, None
+    if "-" in value:
+        bus, _, path = value.partition("-")
+        return bus, path
+    digits = value.rstrip("Xx")
+    if digits.isdigit():
+        location = int(digits)
+        return str(location >> 24), f"{location & 0xFFFFFF:06x}"
+    return value, ""
+
+
+def command_bit_rate(command):
+    """返回 scrcpy 命令中的视频码率（Mbps），未指定时返回默认码率。"""
+    for index, arg in enumerate(command):
+        value = None
+        if arg in ("--video-bit-rate", "-b") and index + 1 < len(command):
+            value = command[index + 1]
+        elif arg.startswith("--video-bit-rate="):
+            value = arg.split("=", 1)[1]
+        if value is not None:
+            match = _BIT_RATE_RE.match(str(value))
+            if match:
+                number = float(match.group(1))
+                unit = match.group(2).upper()
+                if unit == "K":
+                    return number / 1000
+                if unit == "M":
+                    return number
+                return number / 1000000
+    return DEFAULT_STREAM_MBPS
+
+
+def replace_bit_rate(command, mbps):
+    """返回把视频码率替换为 mbps 的新命令列表，小数码率以 K 为单位保留精度。"""
+    value = format_bit_rate(mbps)
+    result = []
+    skip_next = False
+    for index, arg in enumerate(command):
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in ("--video-bit-rate", "-b") and index + 1 < len(command):
+            skip_next = True
+            continue
+        if arg.startswith("--video-bit-rate="):
+            continue
+        result.append(arg)
+    result[1:1] = ["--video-bit-rate", value]
+    return result
+
+
+class UsbBandwidthScheduler:
+    """按总线限制投屏码率与并发传输任务。"""
+
+    def __init__(self, bus_lookup, bus_budget_mbps=240.0, transfer_mbps=120.0, min_stream_mbps=2.0):
+        """
+        Args:
+            bus_lookup (callable): bus_lookup(device_id) 返回总线号，网络设备返回 None
+            bus_budget_mbps (float): 每条总线可用于投屏与传输的带宽
+            transfer_mbps (float): 每个传输任务按该带宽计入预算
+            min_stream_mbps (float): 降低码率时的下限
+        """
+        self.bus_lookup = bus_lookup
+        self.bus_budget_mbps = bus_budget_mbps
+        self.transfer_mbps = transfer_mbps
+        self.min_stream_mbps = min_stream_mbps
+        self._streams = {}
+        self._transfers = {}
+        self._condition = threading.Condition()
+
+    def _bus_of(self, device_id):
+        try:
+            return self.bus_lookup(device_id)
+        except Exception:
+            return None
+
+    def _stream_load(self, bus, exclude=None):
+        return sum(
+            mbps for device_id, (stream_bus, mbps) in self._streams.items()
+            if stream_bus == bus and device_id != exclude
+        )
+
+    def reserve_stream(self, device_id, requested_mbps=DEFAULT_STREAM_MBPS):
+        """登记一路投屏并返回允许使用的码率（Mbps）。
+
+        总线剩余预算（扣除为一个传输任务预留的带宽）不足时返回降低后的码率，不低于 min_stream_mbps。
+        """
+        bus = self._bus_of(device_id)
+        with self._condition:
+            if bus is None:
+                self._streams[device_id] = (None, requested_mbps)
+                return requested_mbps
+            available = self.bus_budget_mbps - self.transfer_mbps - self._stream_load(bus, exclude=device_id)
+            granted = min(requested_mbps, max(self.min_stream_mbps, available))
+            self._streams[device_id] = (bus, granted)
+        if granted < requested_mbps:
+            console_log(
+                f"USB 总线 {bus} 带宽不足，设备 {device_id} 的投屏码率由 {requested_mbps:g}M 降为 {granted:g}M",
+                "WARN",
+            )
+        return granted
+
+    def release_stream(self, device_id):
+        with self._condition:
+            if self._streams.pop(device_id, None) is not None:
+                self._condition.notify_all()
+
+    @contextmanager
+    def transfer(self, device_id, timeout=None):
+        """传输任务上下文，总线预算不足时等待；超过 timeout 秒仍未获得名额时照常执行。"""
+        bus = self._bus_of(device_id)
+        if bus is None:
+            yield
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        with self._condition:
+            while True:
+                running = self._transfers.get(bus, 0)
+                load = self._stream_load(bus) + (running + 1) * self.transfer_mbps
+                if running == 0 or load <= self.bus_budget_mbps:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    console_log(f"等待 USB 总线 {bus} 带宽超时，设备 {device_id} 的传输任务直接执行", "WARN")
+                    break
+                if not waited:
+                    waited = True
+                    console_log(f"USB 总线 {bus} 上已有 {running} 个传输任务，设备 {device_id} 排队等待", "DEBUG")
+                self._condition.wait(remaining)
+            self._transfers[bus] = self._transfers.get(bus, 0) + 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._transfers[bus] -= 1
+                if not self._transfers[bus]:
+                    del self._transfers[bus]
+                self._condition.notify_all()
+
+    def spread(self, items, key=lambda item: item):
+        """按总线交错排序，相邻任务尽量落在不同总线上，同一总线内保持原有顺序。"""
+        groups = {}
+        for item in items:
+            groups.setdefault(self._bus_of(key(item)), []).append(item)
+        ordered = []
+        queues = list(groups.values())
+        while queues:
+            for queue in queues:
+                ordered.append(queue.pop(0))
+            queues = [queue for queue in queues if queue]
+        return ordered
+
+    def get_stats(self):
+        """返回 {总线: {streams, stream_mbps, transfers}}，网络设备的总线记为 None。"""
+        with self._condition:
+            stats = {}
+            for bus, mbps in self._streams.values():
+                entry = stats.setdefault(bus, {"streams": 0, "stream_mbps": 0.0, "transfers": 0})
+                entry["streams"] += 1
+                entry["stream_mbps"] += mbps
+            for bus, count in self._transfers.items():
+                stats.setdefault(bus, {"streams": 0, "stream_mbps": 0.0, "transfers": 0})["transfers"] = count
+            return stats
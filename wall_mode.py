@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+
+from runtime_helpers import override_scrcpy_options
+from utils import console_log
+
+"""
+墙面模式。
+
+同时查看几十台设备时，每个 scrcpy 窗口都按完整画质解码没有意义。墙面模式下批量连接
+以缩略图画质（默认 320 像素、10 帧、1 Mbps）启动所有设备，并记住每台设备的完整画质命令；
+选中或点击某台设备时只把这一台切换为完整画质，之前的焦点设备同时降回缩略图。
+进程替换由 ProcessManager.swap_process 完成：旧进程退出后立即以新命令启动。
+"""
+
+THUMBNAIL_QUALITY = {"bit_rate": 1, "max_size": 320, "max_fps": 10}
+
+
+class WallModeController:
+    """记录墙面设备的完整画质命令，并在焦点变化时切换画质（在 Qt 主线程中使用）。"""
+
+    def __init__(self, swap, log=None, thumbnail=None, swap_timeout_ms=1000, settle=2.0):
+        """
+        Args:
+            swap (callable): swap(device_id, command, timeout_ms) 替换设备进程
+            log (callable): 日志输出函数，默认输出到控制台
+            thumbnail (dict): 缩略图画质 {bit_rate, max_size, max_fps}
+            swap_timeout_ms (int): 切换时等待旧进程退出的时长
+            settle (float): 切换后忽略窗口焦点变化的秒数（新窗口创建时会抢占焦点）
+        """
+        self.swap = swap
+        self.log = log or console_log
+        self.thumbnail = dict(thumbnail or THUMBNAIL_QUALITY)
+        self.swap_timeout_ms = swap_timeout_ms
+        self.settle = settle
+        self.enabled = False
+        self.focused = None
+        self.swaps = 0
+        self._full_commands = {}
+        self._swapping = set()
+        self._last_swap_at = 0.0
+
+    def thumbnail_command(self, full_command):
+        return override_scrcpy_options(full_command, **self.thumbnail)
+
+    def register(self, device_id, full_command):
+        """登记墙面设备，返回用于启动的缩略图命令。"""
+        self._full_commands[device_id] = list(full_command)
+        return self.thumbnail_command(full_command)
+
+    def is_member(self, device_id):
+        return device_id in self._full_commands
+
+    @property
+    def settling(self):
+        return time.monotonic() - self._last_swap_at < self.settle
+
+    def watch(self, device_id):
+        """设备进程启动后调用，结束一次切换。"""
+        self._swapping.discard(device_id)
+
+    def forget(self, device_id):
+        """设备进程在切换之外退出时移出墙面。"""
+        if device_id in self._swapping:
+            return
+        self._full_commands.pop(device_id, None)
+        if self.focused == device_id:
+            self.focused = None
+
+    def abort(self, device_id):
+        """切换失败时调用，把设备移出墙面。"""
+        self._swapping.discard(device_id)
+        self.forget(device_id)
+
+    def focus(self, device_id):
+        """把设备切换为完整画质，并把之前的焦点设备降回缩略图。"""
+        if not self.enabled or device_id == self.focused or device_id not in self._full_commands:
+            return False
+        if device_id in self._swapping:
+            return False
+        previous, self.focused = self.focused, device_id
+        self._last_swap_at = time.monotonic()
+        self.swaps += 1
+        if previous in self._full_commands and previous not in self._swapping:
+            self._swapping.add(previous)
+            self.swap(previous, self.thumbnail_command(self._full_commands[previous]), self.swap_timeout_ms)
+        self._swapping.add(device_id)
+        self.swap(device_id, self._full_commands[device_id], self.swap_timeout_ms)
+        self.log(f"墙面模式: 设备 {device_id} 切换为完整画质" + (f"，设备 {previous} 降为缩略图" if previous else ""))
+        return True
+
+    def get_stats(self):
+        return {"devices": len(self._full_commands), "focused": self.focused, "swaps": self.swaps}
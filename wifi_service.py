@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from PyQt5.QtCore import QProcess, QTimer
+from PyQt5.QtCore import QProcess, QProcessEnvironment, QTimer
 
 from utils import decode_process_output
 
@@ -134,7 +134,22 @@ class WifiConnectionService:
         temp_process.finished.connect(
             lambda _code, _status, proc=temp_process, ip=ip_address, orig=original_device_id, attempt=connect_attempt: self._handle_wireless_connect_finished(proc, ip, orig, attempt)
         )
-        temp_process.start(self.adb_path, ['connect', f"{ip_address}:5555"])
+        # 启用 adb server 分片时连接到为该地址分配的分片
+        target = f"{ip_address}:5555"
+        shards = self.owner.controller.shards
+        server_port = shards.assign(target)
+        if not shards.ensure_server(server_port):
+            # 分片不可用时改连主 server
+            shards.release(target)
+            server_port = shards.base_port
+        server_args = shards.server_args(port=server_port)
+        extra_env = shards.server_environment(server_port)
+        if extra_env:
+            env = QProcessEnvironment.systemEnvironment()
+            for key, value in extra_env.items():
+                env.insert(key, value)
+            temp_process.setProcessEnvironment(env)
+        temp_process.start(self.adb_path, [*server_args, 'connect', target])
 
     def _handle_wireless_connect_finished(self, process, ip_address, original_device_id=None, connect_attempt=0):
         output = decode_process_output(process.readAllStandardOutput())
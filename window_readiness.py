@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import time
+
+from PyQt5.QtCore import QTimer
+
+from utils import console_log
+
+"""
+scrcpy 窗口就绪跟踪。
+
+启动后需要对窗口执行的操作（置顶、控制栏兼容逻辑）原先每台设备各自排布一串定时器重试，
+设备多时会产生上百个定时器并反复枚举全部窗口。WindowReadinessTracker 统一处理：
+1. 所有待就绪设备共用一个轮询定时器，每轮只枚举一次窗口，间隔按退避逐步拉长
+2. scrcpy 输出 Renderer:/Texture:（窗口已创建）时立即检查一次并重置退避
+3. 无法枚举窗口的平台以该输出作为窗口就绪信号
+回调成功后不再执行；返回 False 或抛出异常视为窗口尚未就绪（如已出现但尚未调整好尺寸），
+设备保持待定并按同一退避重试未完成的回调，最多 hook_attempts 次。
+同时记录从启动到窗口出现的耗时。
+"""
+
+WINDOW_READY_PATTERN = re.compile(r'Renderer:|Texture:')
+
+
+class WindowReadinessTracker:
+    """跟踪 scrcpy 窗口出现并触发一次性回调（在 Qt 主线程中使用）。"""
+
+    def __init__(self, enumerate_windows=None, log=None, intervals=(0.2, 0.4, 0.8, 1.6), timeout=15.0,
+                 hook_attempts=5):
+        """
+        Args:
+            enumerate_windows (callable): 返回 [(hwnd, pid, title)]，为 None 时仅依据进程输出判断
+            log (callable): 日志输出函数，默认输出到控制台
+            intervals (tuple): 轮询间隔（秒）的退避序列，最后一项重复使用
+            timeout (float): 单台设备等待窗口的最长秒数
+            hook_attempts (int): 窗口出现后每个回调最多执行的次数
+        """
+        self.enumerate_windows = enumerate_windows
+        self.log = log or console_log
+        self.intervals = tuple(intervals) or (0.5,)
+        self.timeout = timeout
+        self.hook_attempts = max(1, int(hook_attempts))
+        self.window_times = {}
+        self.polls = 0
+        self._pending = {}
+        self._backoff = 0
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._poll)
+
+    def track(self, device_id, process, title, hooks):
+        """登记一台刚启动的设备。
+
+        Args:
+            device_id (str): 设备ID
+            process (QProcess): scrcpy 进程
+            title (str): 窗口标题，按 PID 找不到窗口时用于匹配
+            hooks (list): hook(device_id, handles)，窗口出现后依次调用；返回 False 或抛出异常时稍后重试
+        """
+        self._pending[device_id] = {
+            "process": process,
+            "title": title or "",
+            "hooks": list(hooks),
+            "started_at": time.monotonic(),
+            "window_at": None,
+            "handles": [],
+            "attempts": 0,
+        }
+        process.finished.connect(lambda *_args, dev=device_id, proc=process: self._forget(dev, proc))
+        self._schedule(reset=True)
+
+    def observe_output(self, device_id, text):
+        """由进程输出处理函数调用，窗口创建的输出出现时立即检查。"""
+        if device_id not in self._pending or not WINDOW_READY_PATTERN.search(text or ""):
+            return
+        if self.enumerate_windows is None:
+            self._settle(device_id, [])
+            self._schedule()
+        else:
+            self._schedule(reset=True, immediate=True)
+
+    def cancel_all(self):
+        self._timer.stop()
+        self._pending.clear()
+
+    def _forget(self, device_id, process):
+        state = self._pending.get(device_id)
+        if state is not None and state["process"] is process:
+            del self._pending[device_id]
+
+    def _schedule(self, reset=False, immediate=False):
+        if not self._pending:
+            self._timer.stop()
+            return
+        if reset:
+            self._backoff = 0
+        delay = 0 if immediate else self.intervals[min(self._backoff, len(self.intervals) - 1)]
+        if self._timer.isActive() and self._timer.remainingTime() <= delay * 1000:
+            return
+        self._timer.start(int(delay * 1000))
+
+    def _poll(self):
+        now = time.monotonic()
+        windows = []
+        if self.enumerate_windows is not None and self._pending:
+            self.polls += 1
+            try:
+                windows = self.enumerate_windows()
+            except Exception as e:
+                console_log(f"枚举窗口失败: {e}", "WARN")
+
+        for device_id, state in list(self._pending.items()):
+            pid = int(state["process"].processId() or 0)
+            handles = [hwnd for hwnd, window_pid, _title in windows if pid and window_pid == pid]
+            if not handles and state["title"]:
+                handles = [hwnd for hwnd, _pid, title in windows if state["title"] in title]
+            if state["window_at"] is not None:
+                # 窗口已出现但仍有回调未完成，沿用上次找到的句柄重试
+                self._settle(device_id, handles or state["handles"])
+            elif handles:
+                self._settle(device_id, handles)
+            elif now - state["started_at"] >= self.timeout:
+                del self._pending[device_id]
+                self.log(f"设备 {device_id} 的窗口在 {self.timeout:.0f} 秒内未出现，已跳过窗口设置")
+            elif self.enumerate_windows is None and now - state["started_at"] >= self.intervals[-1]:
+                # 无法枚举窗口且进程没有输出就绪信息时，按最长轮询间隔放行
+                self._settle(device_id, [])
+
+        self._backoff += 1
+        self._schedule()
+
+    def _settle(self, device_id, handles):
+        state = self._pending.get(device_id)
+        if state is None:
+            return
+        if state["window_at"] is None:
+            state["window_at"] = time.monotonic()
+            seconds = state["window_at"] - state["started_at"]
+            self.window_times[device_id] = seconds
+            console_log(f"设备 {device_id} 窗口已就绪，耗时 {seconds:.2f} 秒", "DEBUG")
+        state["handles"] = handles
+        state["attempts"] += 1
+
+        remaining = []
+        for hook in state["hooks"]:
+            try:
+                done = hook(device_id, handles) is not False
+            except Exception as e:
+                console_log(f"设备 {device_id} 窗口就绪回调出错: {e}", "WARN")
+                done = False
+            if not done:
+                remaining.append(hook)
+        state["hooks"] = remaining
+
+        if not remaining:
+            del self._pending[device_id]
+        elif state["attempts"] >= self.hook_attempts:
+            del self._pending[device_id]
+            self.log(f"设备 {device_id} 的窗口设置重试 {state['attempts']} 次仍未完成，已放弃")
+
+    def get_stats(self):
+        times = list(self.window_times.values())
+        return {
+            "pending": len(self._pending),
+            "polls": self.polls,
+            "devices": len(times),
+            "avg_s": (sum(times) / len(times)) if times else 0.0,
+            "max_s": max(times) if times else 0.0,
+        }